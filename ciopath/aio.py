@@ -0,0 +1,122 @@
+from __future__ import unicode_literals
+
+"""
+asyncio versions of the PathList methods that touch the filesystem.
+
+Use them through PathList.aglob(), PathList.areal_files() and
+PathList.aremove_missing(). Filesystem calls run on a pool of `concurrency`
+threads, so no more than that many are in flight, and the event loop is
+never blocked.
+
+The results are the same as those of the synchronous methods. The list is
+only changed once everything has been found, so if the task is cancelled,
+the list is left as it was. Calls already running on threads finish, but
+nothing new is started after cancellation.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from ciopath.path_glob import GlobExpansion
+from ciopath.walk import list_directory, scan
+
+
+class _Runner(object):
+    """Run blocking calls on a thread pool from a coroutine."""
+
+    def __init__(self, concurrency):
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._loop = asyncio.get_running_loop()
+
+    def call(self, func, *args):
+        """Return an awaitable for func(*args) on the pool."""
+        return self._loop.run_in_executor(self._executor, func, *args)
+
+    async def map(self, func, items):
+        """Return a list of func applied to each item, in the order of items."""
+        return await asyncio.gather(*[self.call(func, item) for item in items])
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _glob(runner, plist, cache):
+    """Return a list of the entries of plist with globs expanded."""
+    listdir = cache.listdir if cache is not None else list_directory
+    patterns = []
+    result = []
+    for entry, is_glob in plist._glob_candidates():
+        (patterns if is_glob else result).append(entry)
+    expansion = GlobExpansion(patterns)
+    while not expansion.done:
+        keys = expansion.needed()
+        listings = await runner.map(listdir, keys)
+        expansion.step(dict(zip(keys, listings)))
+    return result + expansion.result
+
+
+async def _walk(runner, directories, listdir, concurrency):
+    """Return a list of the Paths of all files below the directories.
+
+    Up to concurrency listings are in flight. Each finished listing queues
+    its subdirectories.
+    """
+    result = []
+    todo = list(reversed(directories))
+    running = set()
+    try:
+        while todo or running:
+            while todo and len(running) < concurrency:
+                running.add(runner.call(scan, todo.pop(), listdir))
+            done, running = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                files, subdirectories = future.result()
+                result.extend(files)
+                todo.extend(reversed(subdirectories))
+    except asyncio.CancelledError:
+        await _cancel(running)
+        raise
+    return result
+
+
+async def glob(plist, concurrency, cache=None):
+    runner = _Runner(concurrency)
+    try:
+        result = await _glob(runner, plist, cache)
+    finally:
+        runner.close()
+    plist._replace(result)
+
+
+async def real_files(plist, concurrency, cache=None):
+    runner = _Runner(concurrency)
+    listdir = cache.listdir if cache is not None else list_directory
+    try:
+        entries = list(plist._new_storage(await _glob(runner, plist, cache)))
+        all_stats = await runner.map(lambda entry: entry.stat(cache), entries)
+        result, directories, missing = plist._classify(entries, all_stats)
+        result.extend(await _walk(runner, directories, listdir, concurrency))
+    finally:
+        runner.close()
+    plist._replace(result)
+    return missing
+
+
+async def remove_missing(plist, concurrency, cache=None):
+    runner = _Runner(concurrency)
+    exists_func = cache.exists if cache is not None else os.path.exists
+    try:
+        candidates = plist._existence_candidates()
+        exists = await runner.map(exists_func, [p.fslash() for p in candidates])
+    finally:
+        runner.close()
+    plist._remove_absent(candidates, exists)
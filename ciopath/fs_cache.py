@@ -0,0 +1,180 @@
+from __future__ import unicode_literals
+
+"""
+A cache of directory listings and stat results.
+
+glob, real_files, remove_missing and Path.stat each go to the filesystem on
+their own, so a submission can stat the same file three or four times. Pass
+one FileSystemCache to all of them with the cache keyword argument and they
+share what each has found.
+
+Stat results, including "doesn't exist", are kept until evicted, and so are
+listings. exists() is answered by a cached listing when the name is in it
+and isn't a symlink, which may be broken. Otherwise it stats. A cached
+listing is revalidated each time it's asked for, by comparing the mtime of
+the directory with the mtime it had when it was listed. That costs one stat
+instead of a listing. If the mtime changed, the directory is listed again
+and stat results of its entries are dropped.
+
+Both kinds of entry are evicted least recently used first when there are
+more than max_listings or max_stats of them. The cache may be shared
+between threads.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from ciopath.walk import list_directory
+
+
+def parent_key(path):
+    """Return the key of the parent directory of a path string.
+
+    The parent of a relative name with no slash is "", the current directory.
+    """
+    parent, sep, _ = path.rstrip("/").rpartition("/")
+    if not sep:
+        return ""
+    if not parent or parent.endswith(":"):
+        parent += "/"
+    return parent
+
+
+def listed_names(listing):
+    """Return the set of names in a listing that exist, with case normalized.
+
+    Symlinks are left out, since a broken one is listed but doesn't exist.
+    """
+    return {os.path.normcase(name) for name, _, is_symlink in listing if not is_symlink}
+
+
+def child_key(path, name):
+    """Return the key of a name in the directory with the given key."""
+    if not path:
+        return name
+    return "{}/{}".format(path.rstrip("/"), name)
+
+
+class FileSystemCache(object):
+    def __init__(self, max_listings=10000, max_stats=1000000):
+        """Initialize with limits on the number of listings and stat results held."""
+        self.max_listings = max_listings
+        self.max_stats = max_stats
+        self.hits = {"listdir": 0, "stat": 0}
+        self.misses = {"listdir": 0, "stat": 0}
+        self._listings = OrderedDict()
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, table, limit, key, value):
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > limit:
+            table.popitem(last=False)
+
+    def _os_stat(self, path):
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def _cached_stat(self, path):
+        """Return (True, result) if we hold a stat result for path, else (False, None).
+
+        Called with the lock held.
+        """
+        if path in self._stats:
+            self._stats.move_to_end(path)
+            return True, self._stats[path]
+        return False, None
+
+    def _cached_listing(self, path):
+        """Return the cached listing of a directory that may answer exists().
+
+        Called with the lock held.
+        """
+        return self._listings.get(path)
+
+    def _listed(self, path):
+        """Called, with the lock held, when a listing is fresh or found unchanged."""
+
+    def _forget(self, path):
+        """Drop the stat result of a path. Called with the lock held."""
+        self._stats.pop(path, None)
+
+    def stat(self, path):
+        """Return the os.stat result of a path string, or None if it doesn't exist."""
+        with self._lock:
+            found, result = self._cached_stat(path)
+            if found:
+                self.hits["stat"] += 1
+                return result
+            self.misses["stat"] += 1
+        result = self._os_stat(path)
+        with self._lock:
+            self._store(self._stats, self.max_stats, path, result)
+        return result
+
+    def exists(self, path):
+        """True if a path string exists.
+
+        If the parent directory has been listed with the name in it, the
+        listing answers without a stat call. A name that isn't listed may
+        still exist under another case, so it's stat'ed.
+        """
+        parent = parent_key(path)
+        name = os.path.normcase(path.rstrip("/").rpartition("/")[2])
+        with self._lock:
+            cached = None if path in self._stats else self._cached_listing(parent)
+            if cached is not None and name in cached[2]:
+                self.hits["stat"] += 1
+                return True
+        return self.stat(path) is not None
+
+    def listdir(self, path):
+        """List a directory path string, like walk.list_directory.
+
+        The directory is always stat'ed, to check its mtime, and the fresh
+        result is kept.
+        """
+        stat_result = self._os_stat(path or ".")
+        with self._lock:
+            self._store(self._stats, self.max_stats, path, stat_result)
+            cached = self._listings.get(path)
+            if stat_result is None:
+                self._listings.pop(path, None)
+                self.misses["listdir"] += 1
+                return []
+            if cached is not None and cached[0] == stat_result.st_mtime:
+                self._listings.move_to_end(path)
+                self._listed(path)
+                self.hits["listdir"] += 1
+                return cached[1]
+            self.misses["listdir"] += 1
+
+        # Stat before listing, so a change made in between is seen next time.
+        listing = list_directory(path)
+        with self._lock:
+            if cached is not None:
+                names = {entry[0] for entry in cached[1]}
+                names.update(entry[0] for entry in listing)
+                for name in names:
+                    self._forget(child_key(path, name))
+            self._store(
+                self._listings,
+                self.max_listings,
+                path,
+                (stat_result.st_mtime, listing, listed_names(listing)),
+            )
+            self._listed(path)
+        return listing
+
+    def clear(self):
+        """Forget everything. Counters are kept."""
+        with self._lock:
+            self._listings.clear()
+            self._stats.clear()
+
+    def __len__(self):
+        return len(self._listings) + len(self._stats)
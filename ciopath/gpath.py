@@ -16,19 +16,27 @@ backslashes, with or without the prefix if it exists.
 See test_gpath.py for full behavior.
 """
 
-from future.utils import python_2_unicode_compatible
-
 import os
 import re
 import stat
+import struct
+from sys import intern
+
+from ciopath import tokens
+from ciopath.hashing import md5_file
 
 # https://regex101.com/r/EeOqb4/1/
 RX_PREFIXED_PATH = re.compile(r"^([a-zA-Z]:|\\|\/)[\\\/]+")
 RX_PREFIX = re.compile(r"^([a-zA-Z]:|\\|\/)")
 
+RX_SEPARATOR = re.compile(r"[\\\/]")
+
 # this matches env style variables: e.g. $FOO or ${FOO}
 RX_DOLLAR_VAR = re.compile(r"\$\{?([A-Za-z][A-Z,a-z0-9_]+)\}?")
 
+# The variables that posixpath.expandvars recognizes.
+RX_ENV_VAR = re.compile(r"\$(\w+|\{[^}]*\})", re.ASCII)
+
 
 def _expand_context(path, context):
     """
@@ -49,6 +57,77 @@ def _expand_context(path, context):
     return result
 
 
+class _EnvSnapshot(dict):
+    """Environment variables, read from os.environ the first time each is asked for.
+
+    Unset variables map to None.
+    """
+
+    def __missing__(self, name):
+        value = self[name] = os.environ.get(name)
+        return value
+
+
+def _expand_vars(path, environ):
+    """Expand $NAME and ${NAME} like posixpath.expandvars, using the given environment.
+
+    Unknown variables are left in place.
+    """
+    i = 0
+    while True:
+        match = RX_ENV_VAR.search(path, i)
+        if not match:
+            return path
+        i, j = match.span(0)
+        name = match.group(1)
+        if name.startswith("{") and name.endswith("}"):
+            name = name[1:-1]
+        value = environ[name]
+        if value is None:
+            i = j
+        else:
+            tail = path[j:]
+            path = path[:i] + value
+            i = len(path)
+            path += tail
+
+
+def _env_var_expander():
+    """Return a function that expands env vars in a string.
+
+    On posix it works from a snapshot of the environment, so each variable
+    is read from os.environ once however many strings use it. Other
+    platforms have their own syntax, so we defer to os.path.expandvars.
+    """
+    if os.name != "posix":
+        return os.path.expandvars
+    environ = _EnvSnapshot()
+    return lambda path: _expand_vars(path, environ) if "$" in path else path
+
+
+def _parse(path, normalize=True):
+    """Split an expanded path string into drive prefix, absolute flag and components.
+
+    Dots are only normalized when there are dot components to resolve, and
+    not at all without normalize, for strings made by fslash().
+    """
+    drive_prefix = None
+    match = RX_PREFIXED_PATH.match(path)
+    if match:
+        drive_prefix = match.group(1).replace("\\", "/")
+        path = RX_PREFIX.sub("", path)
+
+    absolute = path[0] in ["/", "\\"]
+
+    if "\\" in path:
+        components = [s for s in RX_SEPARATOR.split(path) if s]
+    else:
+        components = [s for s in path.split("/") if s]
+    if normalize and ("." in components or ".." in components):
+        components = _normalize_dots(components, absolute)
+    return drive_prefix, absolute, tuple(map(intern, components))
+
+
 def _normalize_dots(components, absolute=True):
     currentdir = "."
     parentdir = ".."
@@ -79,11 +158,104 @@ def _normalize_dots(components, absolute=True):
             result.append(c)
 
     if not result:
-        result = "."
+        result = ["."]
     return result
 
 
+def _relative_components(components, start_components):
+    """Return the components that lead from start_components to components.
+
+    The common leading components are counted once, so it's linear in the
+    depth. Equal components give (".",).
+    """
+    common = 0
+    limit = min(len(components), len(start_components))
+    while common < limit and components[common] == start_components[common]:
+        common += 1
+    result = ("..",) * (len(start_components) - common) + components[common:]
+    return result or (".",)
+
+
+class PathStat(bytes):
+    """The mode, size, mtime and inode of a stat result, packed into 28 bytes.
+
+    A Path carries one of these after it's stat'ed. See Path.stat(). Packing
+    keeps it to one small object per path, where a tuple of Python ints and a
+    float would be about three times the size.
+
+    The inode is None if it doesn't fit in 64 bits. Windows can report 128
+    bit file IDs, for example on ReFS volumes.
+    """
+
+    __slots__ = ()
+
+    _STRUCT = struct.Struct("=IQdQ")
+
+    # Stored in place of an inode that doesn't fit.
+    _NO_INODE = 0xFFFFFFFFFFFFFFFF
+
+    def __new__(cls, mode, size, mtime, inode):
+        if inode is None or not 0 <= inode < cls._NO_INODE:
+            inode = cls._NO_INODE
+        packed = cls._STRUCT.pack(mode, size, mtime, inode)
+        return super(PathStat, cls).__new__(cls, packed)
+
+    @classmethod
+    def from_stat_result(cls, result):
+        return cls(result.st_mode, result.st_size, result.st_mtime, result.st_ino)
+
+    @property
+    def mode(self):
+        return self._STRUCT.unpack(self)[0]
+
+    @property
+    def size(self):
+        return self._STRUCT.unpack(self)[1]
+
+    @property
+    def mtime(self):
+        return self._STRUCT.unpack(self)[2]
+
+    @property
+    def inode(self):
+        inode = self._STRUCT.unpack(self)[3]
+        return None if inode == self._NO_INODE else inode
+
+    @property
+    def is_file(self):
+        return stat.S_ISREG(self.mode)
+
+    @property
+    def is_dir(self):
+        return stat.S_ISDIR(self.mode)
+
+    def __repr__(self):
+        mode, size, mtime, _ = self._STRUCT.unpack(self)
+        return "PathStat(mode={}, size={}, mtime={}, inode={})".format(
+            mode, size, mtime, self.inode
+        )
+
+    __str__ = __repr__
+
+
 class Path(object):
+    """An immutable, platform independent path.
+
+    Large submissions hold millions of paths, so instances are kept small:
+    there is no instance dict, components live in a tuple, and component
+    strings are interned so that directory names shared by many paths are
+    stored once.
+
+    Paths are hashable and must be treated as immutable. Methods that derive
+    a new path, such as make_relative_to, return a new Path.
+
+    A Path may also carry what was found when it was last stat'ed, so that
+    sizes and mtimes can be read later without another system call. See
+    stat(). That isn't part of the path, and isn't compared or hashed.
+    """
+
+    __slots__ = ("_drive_prefix", "_absolute", "_components", "_key", "_stat")
+
     def __init__(self, path, **kw):
         """Initialize a generic path.
 
@@ -93,20 +265,19 @@ class Path(object):
         no_expand option.
         """
 
-        self._drive_prefix = None
-
         if not path:
             raise ValueError("Empty path")
 
-        if isinstance(path, list):
-            ipath = path[:]
+        if isinstance(path, (list, tuple)):
+            ipath = list(path)
             match = RX_PREFIX.match(ipath[0])
-            self._absolute = False
+            drive_prefix = None
+            absolute = False
             if match:
-                self._drive_prefix = ipath.pop(0).replace("\\", "/")
-                self._absolute = True
+                drive_prefix = ipath.pop(0).replace("\\", "/")
+                absolute = True
 
-            self._components = _normalize_dots(ipath)
+            components = tuple(map(intern, _normalize_dots(ipath)))
         else:
             context = kw.get("context")
             if context:
@@ -115,19 +286,79 @@ class Path(object):
             if not kw.get("no_expand", False):
                 path = os.path.expanduser(os.path.expandvars(path))
 
-            match = RX_PREFIXED_PATH.match(path)
+            drive_prefix, absolute, components = _parse(path)
 
-            if match:
-                self._drive_prefix = match.group(1).replace("\\", "/")
-                path = RX_PREFIX.sub("", path)
+        self._drive_prefix = drive_prefix
+        self._absolute = absolute
+        self._components = components
+        self._key = None
+        self._stat = None
 
-            self._absolute = path[0] in ["/", "\\"]
+    @classmethod
+    def from_strings(cls, paths, **kw):
+        """Make a list of Paths from an iterable of strings.
 
-            self._components = _normalize_dots(
-                [s for s in re.split("/|\\\\", path) if s], self._absolute
-            )
+        Takes the same context and no_expand options as the constructor, and
+        gives the same results, but does the setup once for all the strings.
+        The environment is read once, and strings with no "$" or leading "~"
+        skip expansion altogether.
 
-        self._depth = len(self._components)
+        Scraped paths share a small number of directories, so each directory
+        is parsed once, and the file name is appended to its components.
+
+        Paths in the input are passed through, and os.PathLike objects
+        such as pathlib paths are converted to strings.
+        """
+        context = kw.get("context")
+        expand_vars = None if kw.get("no_expand", False) else _env_var_expander()
+        expanduser = os.path.expanduser
+        from_parts = cls._from_parts
+        parents = {}
+        result = []
+        for path in paths:
+            if isinstance(path, Path):
+                result.append(path)
+                continue
+            # Accept os.PathLike objects, such as pathlib paths.
+            path = os.fspath(path)
+            if not path:
+                raise ValueError("Empty path")
+            if context and "$" in path:
+                path = _expand_context(path, context)
+            if expand_vars:
+                path = expand_vars(path)
+                if path[0] == "~":
+                    path = expanduser(path)
+
+            head, sep, tail = path.rpartition("/")
+            if sep and tail and tail != "." and tail != ".." and "\\" not in path:
+                parent = parents.get(head)
+                if parent is None:
+                    parent = parents[head] = _parse(head + "/")
+                drive_prefix, absolute, components = parent
+                # A relative parent that resolves to "." can't simply be extended.
+                if components != (".",):
+                    result.append(
+                        from_parts(drive_prefix, absolute, components + (intern(tail),))
+                    )
+                    continue
+            result.append(from_parts(*_parse(path)))
+        return result
+
+    @classmethod
+    def _from_parts(cls, drive_prefix, absolute, components):
+        """Make a Path from parts that are already split and normalized.
+
+        This skips parsing and expansion altogether. Components must be a
+        tuple, preferably of interned strings.
+        """
+        result = cls.__new__(cls)
+        result._drive_prefix = drive_prefix
+        result._absolute = absolute
+        result._components = components
+        result._key = None
+        result._stat = None
+        return result
 
     def _construct_path(self, sep, with_drive_letter=True):
         """Reconstruct path for given path sep."""
@@ -144,9 +375,21 @@ class Path(object):
                 result = "{}{}".format(prefix, result)
         return result
 
+    def _canonical(self):
+        """The forward slash path with drive letter, built once and cached.
+
+        It is the key for equality, hashing and sorting, so we don't want to
+        rebuild it every time two paths are compared.
+        """
+        if self._key is None:
+            self._key = self._construct_path("/", True)
+        return self._key
+
     def fslash(self, **kw):
         """Path with forward slashes. Can include drive letter."""
         with_drive_letter = kw.get("with_drive", True)
+        if with_drive_letter:
+            return self._canonical()
         return self._construct_path("/", with_drive_letter)
 
     def bslash(self, **kw):
@@ -155,7 +398,7 @@ class Path(object):
         return self._construct_path("\\", with_drive_letter)
 
     def make_relative_to(self, start):
-        """Make this absolute Path relative with respect to the given start folder.
+        """Return a new Path that is this absolute Path made relative to the given start folder.
 
         We don't check that the start folder is in fact a folder. If you give a file instead you may
         get a result with too many '..' components.
@@ -163,7 +406,7 @@ class Path(object):
         We ignore any drive prefixes. This means paths on 2 different Windows drives are considered
         to be on the same drive. This is not a problem for the purpose of this function.
 
-        We don't change the path if it's already relative.
+        If this path is already relative, it is returned unchanged.
         """
         if not isinstance(start, Path):
             raise TypeError("Start path must be a gpath Path")
@@ -173,36 +416,14 @@ class Path(object):
 
             It's impossible to know their relationship.
             """
-            return
-
-        components = self._components
-        other_components = start._components
+            return self
 
-        if components == other_components:
+        if self._components == start._components:
             raise ValueError("Paths (without drive prefixes) must be different.")
 
-        # remove the common parts
-        while (
-            len(components)
-            and len(other_components)
-            and components[0] == other_components[0]
-        ):
-            components = components[1:]
-            other_components = other_components[1:]
-
-        # both or one or none could be empty
-        components = [".."] * len(other_components) + components
-
-        if not components:
-            components = "."
-
-        self._components = components
-        self._drive_prefix = None
-        self._absolute = False
-        self._depth = len(
-            self._components
-        )  # depth is kind of pointless for relative paths.
-        # TODO: Remove depth altogether
+        return Path._from_parts(
+            None, False, _relative_components(self._components, start._components)
+        )
 
     def os_path(self, **kw):
         """Path with slashes for current os. Can include drive letter."""
@@ -213,47 +434,88 @@ class Path(object):
 
     def __str__(self):
         """Same as fslash, with_drive=True"""
-        return self._construct_path("/", True)
+        return self._canonical()
 
     def startswith(self, path):
-        return self.fslash().startswith(path.fslash())
+        return self._canonical().startswith(path._canonical())
 
     def endswith(self, suffix):
-        return self.fslash().endswith(suffix)
+        return self._canonical().endswith(suffix)
 
-    def stat(self):
-        """Return a dict with file stats or None if the file doesn't exist."""
-        try:
-            stat_results = os.stat(self.fslash())
-        except OSError:
+    def stat(self, cache=None):
+        """Return a dict with file stats or None if the file doesn't exist.
+
+        Pass a FileSystemCache to look the result up there first.
+
+        The mode, size, mtime and inode found are kept on the Path, and can be
+        read later with the stat_info, size, mtime and inode properties.
+        """
+        if cache is not None:
+            stat_results = cache.stat(self.fslash())
+        else:
+            try:
+                stat_results = os.stat(self.fslash())
+            except OSError:
+                stat_results = None
+        if stat_results is None:
+            self._stat = None
             return None
-        stat_mode = stat_results.st_mode
-        return {
-            "is_file": stat.S_ISREG(stat_mode),
-            "is_dir": stat.S_ISDIR(stat_mode),
-            "size": stat_results.st_size,
-        }
+        self._stat = info = PathStat.from_stat_result(stat_results)
+        return {"is_file": info.is_file, "is_dir": info.is_dir, "size": info.size}
+
+    @property
+    def stat_info(self):
+        """The PathStat kept by the last stat(), or None. No filesystem access."""
+        return self._stat
+
+    @property
+    def size(self):
+        """The size in bytes found by the last stat(), or None."""
+        return self._stat.size if self._stat else None
+
+    @property
+    def mtime(self):
+        """The mtime found by the last stat(), or None."""
+        return self._stat.mtime if self._stat else None
+
+    @property
+    def inode(self):
+        """The inode number found by the last stat(), or None."""
+        return self._stat.inode if self._stat else None
+
+    def md5(self):
+        """Return the hex MD5 digest of the file. See ciopath.hashing."""
+        return md5_file(self.fslash())[0]
+
+    def expand_tokens(self, frames=None, tiles=None):
+        """Return a list of Paths with frame and UDIM tokens replaced.
+
+        Frame tokens (####, %04d) take each of frames and <UDIM> takes each
+        of tiles. Tokens with no values given are left in place. No files are
+        looked at. See ciopath.tokens.
+        """
+        return tokens.expand(self, frames, tiles)
 
     def __len__(self):
-        return len(self.fslash())
+        return len(self._canonical())
 
     def __eq__(self, rhs):
         if not isinstance(rhs, Path):
             raise NotImplementedError
-        return self.fslash() == rhs.fslash()
+        return self._canonical() == rhs._canonical()
 
     def __lt__(self, other):
-        return self.fslash() < other.fslash()
+        return self._canonical() < other._canonical()
 
     def __hash__(self):
-        return hash(self.fslash())
+        return hash(self._canonical())
 
     def __ne__(self, rhs):
         return not (self == rhs)
 
     @property
     def depth(self):
-        return self._depth
+        return len(self._components)
 
     @property
     def drive_letter(self):
@@ -273,15 +535,28 @@ class Path(object):
 
     @property
     def components(self):
-        return self._components or []
+        return list(self._components)
 
     @property
     def all_components(self):
         if self._drive_prefix:
-            return ["{}".format(self._drive_prefix)] + self.components
+            return ["{}".format(self._drive_prefix)] + list(self._components)
         else:
             return self.components
 
+    def _component_key(self):
+        """Components prefixed with a root token, for prefix trees and containment.
+
+        all_components can't tell "/a/b" from "a/b", or a UNC root from a
+        component, so the first element is one of: "" (relative), "/" (posix
+        absolute), "//" (UNC) or the drive letter, e.g. "C:".
+        """
+        if self._drive_prefix:
+            root = "//" if self.is_unc else self._drive_prefix
+        else:
+            root = "/" if self._absolute else ""
+        return (root,) + self._components
+
     @property
     def tail(self):
         return self._components[-1] if self._components else None
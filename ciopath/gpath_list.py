@@ -1,13 +1,52 @@
 from __future__ import unicode_literals
 import os
 import re
-from itertools import takewhile
-import glob
-import fnmatch
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from ciopath.gpath import Path
+from ciopath import manifest, tokens
+from ciopath.gpath import Path, _relative_components
+from ciopath.hashing import hash_paths
+from ciopath.path_glob import GLOBBABLE_REGEX, PatternSet, glob_paths
+from ciopath.path_storage import STORAGE_ENGINES
+from ciopath.path_trie import PathTrie
+from ciopath.walk import list_directory, walk_files, walk_files_parallel
 
-GLOBBABLE_REGEX = re.compile(r"\*|\?|\[")
+
+def _path_set(paths):
+    """Make a set of Paths from Paths or strings."""
+    return {p if isinstance(p, Path) else Path(p) for p in paths}
+
+
+def _imap(func, items, max_workers=None):
+    """Generate func applied to each item, in the order of items.
+
+    If max_workers is more than 1, calls are made on a pool of that many
+    threads. That's worthwhile for filesystem calls on network storage, where
+    each one waits on a round trip. Items are consumed as results are
+    generated, with a few calls per thread in flight, so items may be a
+    long-running generator.
+    """
+    if not max_workers or max_workers < 2:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        window = deque()
+        for item in items:
+            window.append(executor.submit(func, item))
+            if len(window) >= max_workers * 4:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def _map(func, items, max_workers=None):
+    """Return a list of func applied to each item, in the order of items.
+
+    See _imap for max_workers.
+    """
+    return list(_imap(func, items, max_workers))
 
 
 class PathList(object):
@@ -19,71 +58,233 @@ class PathList(object):
     added. Since adding a single directory can cause many contained
     files to be removed during deduplication, we set the next iterator
     to zero.
+
+    Entries are held by a storage engine, chosen with the storage keyword
+    argument. The default, "list", is cheapest to fill. "trie" keeps entries
+    in a prefix tree, which makes membership, removal and the under() and
+    ancestor_of() queries O(depth) at the cost of more memory. "sequence"
+    groups numbered files, such as the frames of image sequences, and holds
+    each group as frame ranges. "packed" holds entries as strings in one
+    buffer rather than as Paths, which takes a third of the memory of "list",
+    and makes Paths again as they are asked for. See ciopath.path_storage.
+
+    By default, deduplication only removes identical entries. Set the
+    remove_contained keyword argument to also remove entries that lie below
+    another entry, for example /a/b/c when /a/b is in the list.
     """
 
-    def __init__(self, *paths):
+    def __init__(self, *paths, **kwargs):
         """Initialize."""
-        self._entries = []
+        self._storage = kwargs.get("storage", "list")
+        if self._storage not in STORAGE_ENGINES:
+            raise ValueError(
+                "Unknown storage '{}'. Valid values are: {}".format(
+                    self._storage, ", ".join(sorted(STORAGE_ENGINES))
+                )
+            )
+        self._remove_contained = kwargs.get("remove_contained", False)
+        self._entries = self._new_storage()
         self._clean = False
         self._current = 0
+        # The common leading components of all entries and the first entry
+        # in sorted order, kept up to date as paths are added. See
+        # common_path(). They are recomputed when _common_known is False.
+        self._common = None
+        self._common_first = None
+        self._common_known = True
         self.add(*paths)
 
+    def _new_storage(self, paths=None):
+        """Make an empty storage engine of our type, optionally filled with paths."""
+        return STORAGE_ENGINES[self._storage](paths)
+
     def add(self, *paths):
         """Add one or more files.
 
         Duplicate files and directories that contain other files may be
         added and no deduplication will happen at this time.
         """
+        self.add_many(paths)
 
-        for path in paths:
-            self._add_one(path)
+    def add_many(self, paths, **kw):
+        """Add an iterable of Paths or strings.
 
-    def _add_one(self, path):
-        """Add a single file.
+        Strings are converted in bulk by Path.from_strings, which takes the
+        same context and no_expand options as Path.
 
         Note that when an element is added, it may cause the list to
         change next time it is deduplicated, which includes getting
         shorter. This could happen if a containing directory is added.
         Therefore we have to set the peg position to zero.
         """
-
-        if not type(path).__name__ == "Path":
-            path = Path(path)
-        self._entries.append(path)
+        paths = Path.from_strings(paths, **kw)
+        if not paths:
+            return
+        self._entries.extend(paths)
         self._clean = False
         self._current = 0
+        if self._common_known:
+            self._update_common(paths)
 
     def remove(self, *paths):
         """
         Replace the underlying list with a filtered list.
 
-        No deduplication happens yet and the list is marked dirty.
+        Removals are looked up in a set, so this is linear in the number of
+        entries plus the number of removals. No deduplication happens yet and
+        the list is marked dirty.
         """
-        removals = PathList(*paths)
-        result = [p for p in self._entries if p not in removals]
-        self._entries = result
+        self._entries.remove(_path_set(paths))
         self._clean = False
         self._current = 0
+        self._common_known = False
+
+    def _derive(self, paths):
+        """Make a PathList like this one from paths that are sorted and unique."""
+        result = PathList(storage=self._storage, remove_contained=self._remove_contained)
+        result._entries = STORAGE_ENGINES[self._storage].from_sorted(paths)
+        result._clean = True
+        result._common_known = False
+        return result
+
+    @staticmethod
+    def _as_path_list(other):
+        return other if isinstance(other, PathList) else PathList(*other)
+
+    def difference(self, other):
+        """Return a new PathList of entries that are not in other.
+
+        Other may be a PathList or any iterable of Paths or strings. This and
+        the other set operations take linear time, plus the time to
+        deduplicate both lists if they are dirty.
+        """
+        exclude = set(self._as_path_list(other))
+        return self._derive(p for p in self if p not in exclude)
+
+    def intersection(self, other):
+        """Return a new PathList of entries that are also in other."""
+        include = set(self._as_path_list(other))
+        return self._derive(p for p in self if p in include)
+
+    def union(self, other):
+        """Return a new PathList of entries that are in either list.
+
+        The entries of other are merged in when the result is first accessed.
+        """
+        result = self._derive(self)
+        result.add(*self._as_path_list(other))
+        return result
+
+    def symmetric_difference(self, other):
+        """Return a new PathList of entries that are in exactly one of the lists."""
+        other = self._as_path_list(other)
+        mine = set(self)
+        theirs = set(other)
+        result = self._derive(p for p in self if p not in theirs)
+        result.add(*[p for p in other if p not in mine])
+        return result
 
     def _deduplicate(self):
         """Deduplicate if it has become dirty.
 
-        Old algorithm used to remove contained files, i.e. it would remove /a/b/c if /a/b was in the
-        list. It was removed as it was too slow for very large file counts.
-        I believe it's possible to further optimize at some later date, which is why I'll leave the
-        link to the explanation.
-        https://stackoverflow.com/questions/49478361
+        If remove_contained is set, also remove entries contained by other
+        entries, i.e. remove /a/b/c if /a/b is in the list. It's done in
+        O(n log n) by the storage engine. See ListStorage.remove_contained().
         """
         if self._clean:
             return
-        self._entries = sorted(set(self._entries))
+        self._entries.deduplicate()
+        if self._remove_contained:
+            self._entries.remove_contained()
         self._clean = True
 
     def __contains__(self, key):
         if not isinstance(key, Path):
             key = Path(key)
+        self._deduplicate()
         return key in self._entries
 
+    def under(self, path):
+        """Return a new PathList of the entries at or below the given path.
+
+        The path itself is included if it is an entry.
+        """
+        if not isinstance(path, Path):
+            path = Path(path)
+        self._deduplicate()
+        return PathList(*self._entries.under(path))
+
+    def ancestor_of(self, path):
+        """Return the entry that contains the given path, or None.
+
+        If several entries contain it, return the shallowest one. A path is
+        not its own ancestor.
+        """
+        if not isinstance(path, Path):
+            path = Path(path)
+        return self._entries.ancestor_of(path)
+
+    def relative_to(self, start):
+        """Return a new PathList of the entries made relative to a start folder.
+
+        It works like Path.make_relative_to() on each entry, in one pass and
+        in time linear in the depth of each entry. The entries are unchanged.
+        Relative entries are kept as they are, and an entry that is the start
+        folder itself becomes ".".
+        """
+        if not isinstance(start, Path):
+            start = Path(start)
+        start_components = start._components
+        self._deduplicate()
+        paths = []
+        # Entries come sorted, so siblings are next to each other and share
+        # the relative components of their directory.
+        parent = relative_parent = None
+        for entry in self._entries:
+            if entry.absolute and start.absolute:
+                components = entry._components
+                if components[:-1] != parent:
+                    parent = components[:-1]
+                    relative_parent = None
+                    if len(parent) >= len(start_components):
+                        relative_parent = _relative_components(parent, start_components)
+                if relative_parent is None or relative_parent == (".",):
+                    # The start is at or below the entry's directory.
+                    components = _relative_components(components, start_components)
+                else:
+                    components = relative_parent + components[-1:]
+                entry = Path._from_parts(None, False, components)
+            paths.append(entry)
+        result = PathList(
+            storage=self._storage, remove_contained=self._remove_contained
+        )
+        result.add_many(paths)
+        return result
+
+    def _update_common(self, paths):
+        """Shorten the common leading components to cover paths. O(depth) each."""
+        common = self._common
+        first = self._common_first
+        for path in paths:
+            if path._drive_prefix:
+                components = (path._drive_prefix,) + path._components
+            else:
+                components = path._components
+            if first is None:
+                common, first = components, path
+                continue
+            if path < first:
+                first = path
+            if components[: len(common)] != common:
+                size = 0
+                for a, b in zip(common, components):
+                    if a != b:
+                        break
+                    size += 1
+                common = common[:size]
+        self._common = common
+        self._common_first = first
+
     def common_path(self):
         """Find the common path among entries.
 
@@ -101,18 +302,20 @@ class PathList(object):
 
         If the filesystem root is the common path, return root path, which is
         not entirely correct on windows with drive letters.
+
+        The common components are kept up to date as paths are added, so this
+        is O(1) unless entries were removed or replaced since the last call.
+        Then they are found again from all the entries.
         """
-        if not self._entries:
+        if not self._common_known:
+            self._common = self._common_first = None
+            self._update_common(self._entries)
+            self._common_known = True
+        if self._common_first is None:
             return None
 
-        absolute = list(self._entries)[0].absolute
-
-        def _all_the_same(rhs):
-            return all(n == rhs[0] for n in rhs[1:])
-
-        levels = zip(*[p.all_components for p in self._entries])
-
-        common = [x[0] for x in takewhile(_all_the_same, levels)]
+        absolute = self._common_first.absolute
+        common = self._common
 
         if not len(common):
             return Path("/")
@@ -122,7 +325,7 @@ class PathList(object):
             return Path("/" + "/".join(common))
         return Path("/".join(common))
 
-    def glob(self):
+    def glob(self, cache=None):
         """Glob expansion for entries containing globbable characters.
 
         We don't simply glob every entry since that would remove entries
@@ -131,56 +334,253 @@ class PathList(object):
         was globbable but matched nothing. So we test for glob
         characters (*|?|[) to determine whether to attempt a glob.
 
-        However, if it looks like a glob, but the glob library can't
-        handle it, then we have to assume it really is a filename with
-        glob-like characters, and then we just add the literal path
-        unchanged. See the test: test_ignore_invalid_glob().
+        However, if it looks like a glob, but it isn't a valid pattern,
+        then we have to assume it really is a filename with glob-like
+        characters, and then we just add the literal path unchanged. See
+        the test: test_ignore_invalid_glob().
+
+        All patterns are expanded together, so a directory that many
+        patterns point into is listed only once. See ciopath.path_glob.
+
+        Pass a FileSystemCache to share directory listings with other calls.
+        """
+        self._replace(self._globbed(cache))
+
+    def save(self, filename):
+        """Write the entries to a compact binary manifest file.
+
+        Read it back with PathList.load(). See ciopath.manifest.
         """
         self._deduplicate()
-        result = []
-        for entry in self._entries:
-            pp = entry.fslash()
-            if GLOBBABLE_REGEX.search(pp):
-                try:
-                    globs = glob.glob(entry.fslash())
-                    result += globs
-                except re.error:
-                    result.append(pp)
-            else:
-                result.append(pp)
-        self._entries = [Path(g) for g in result]
+        # Packed entries are written as they are held, without making Paths.
+        keys = getattr(self._entries, "keys", None)
+        if keys is not None:
+            manifest.write(filename, keys())
+        else:
+            manifest.write_paths(filename, self._entries)
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """Make a PathList of the entries of a manifest file written by save().
+
+        With mmap=True the file is memory mapped and nothing is read until
+        it's needed. Membership, indexing and under() work on the file, and
+        Paths are made as they are asked for. Otherwise the file is read
+        into memory, still compressed. The list uses "packed" storage, and
+        the entries are copied into it the first time the list changes.
+
+        Raises ValueError if the file is not a manifest.
+        """
+        result = cls(storage="packed")
+        result._entries = manifest.ManifestStorage(
+            manifest.Manifest(filename, use_mmap=mmap)
+        )
+        result._common_known = False
+        return result
+
+    def _replace(self, paths):
+        """Replace all entries with paths."""
+        self._entries = self._new_storage(paths)
         self._clean = False
         self._current = 0
+        self._common_known = False
 
-    def real_files(self):
+    def _glob_candidates(self):
+        """Generate (entry, is_glob) for the deduplicated entries."""
+        self._deduplicate()
+        for entry in self._entries:
+            yield entry, bool(GLOBBABLE_REGEX.search(entry.fslash()))
+
+    def _globbed(self, cache=None):
+        """Return a list of the entries with globs expanded. See glob()."""
+        result = []
+        patterns = []
+        for entry, is_glob in self._glob_candidates():
+            (patterns if is_glob else result).append(entry)
+        if cache is not None:
+            result.extend(glob_paths(patterns, cache.listdir))
+        else:
+            result.extend(glob_paths(patterns))
+        return result
+
+    def remap(self, mapper):
+        """Map every entry to a new place with a ciopath.path_mapper.PathMapper.
+
+        Entries that no rule matches are kept as they are. Two entries that
+        map to the same path become one.
+        """
+        self._replace([mapper.map(p) for p in self._entries])
+
+    def expand_tokens(self, frames=None, tiles=None, verify=False, cache=None):
+        """Replace entries that have frame or UDIM tokens with concrete paths.
+
+        Frame tokens (####, %04d) take each of frames and <UDIM> takes each
+        of tiles, as for Path.expand_tokens(). Paths are generated without
+        looking at the filesystem, so unlike glob() they may not exist.
+
+        Set verify to keep only the generated paths that exist. Each parent
+        directory is listed once, rather than a stat for every frame. Pass a
+        FileSystemCache to share those listings.
+
+        We return a list of generated paths that were not found, which is
+        empty unless verify is set.
+        """
+        if frames is not None:
+            frames = list(frames)
+        if tiles is not None:
+            tiles = list(tiles)
+        self._deduplicate()
+        result = []
+        generated = []
+        for entry in self._entries:
+            expanded = tokens.expand(entry, frames, tiles)
+            if len(expanded) == 1 and expanded[0] is entry:
+                result.append(entry)
+            else:
+                generated.extend(expanded)
+        if verify and generated:
+            listdir = cache.listdir if cache is not None else list_directory
+            found = tokens.verify(generated, listdir)
+            missing = set(generated).difference(found)
+            generated = found
+        else:
+            missing = ()
+        result.extend(generated)
+        self._replace(result)
+        return sorted(p.fslash() for p in missing)
+
+    @staticmethod
+    def _walk(directories, max_workers=None, cache=None):
+        """Generate the Paths of files below the directories. See real_files()."""
+        listdir = cache.listdir if cache is not None else list_directory
+        if max_workers and max_workers > 1:
+            return walk_files_parallel(directories, max_workers, listdir=listdir)
+        return (
+            path for directory in directories for path in walk_files(directory, listdir)
+        )
+
+    def real_files(self, max_workers=None, cache=None, with_stats=False):
         """Replace the list with a list of real files.
 
         We first glob, which gets rid of wildcards.
         Then we walk the directory tree and add all files we find.
-        Directories are not added.
+        Directories are not added. See ciopath.walk for how the walk is done.
+
+        Set max_workers to stat entries and list directories on that many
+        threads at once. All directories are walked together on one pool of
+        threads. The result is the same either way.
+
+        Pass a FileSystemCache to reuse and keep the stats and directory
+        listings. See ciopath.fs_cache.
+
+        Files that were entries in the list carry the stats found for them
+        (see Path.stat_info). Set with_stats to stat the files found by the
+        walk too, so that sizes and mtimes can be read later without another
+        stat call.
 
         We return a list of missing files, which is useful for error reporting.
         """
-        result = []
+        self.glob(cache=cache)
+        entries = list(self._entries)
+        all_stats = _map(lambda entry: entry.stat(cache), entries, max_workers)
+        result, directories, missing = self._classify(entries, all_stats)
+        walked = list(self._walk(directories, max_workers, cache))
+        if with_stats:
+            _map(lambda path: path.stat(cache), walked, max_workers)
+        result.extend(walked)
+        self._replace(result)
+        return missing
+
+    def aglob(self, concurrency=64, cache=None):
+        """Return a coroutine that does what glob() does, with asyncio.
+
+        Directories are listed on up to concurrency threads at once. See
+        ciopath.aio.
+        """
+        from ciopath import aio
+
+        return aio.glob(self, concurrency, cache)
+
+    def areal_files(self, concurrency=64, cache=None):
+        """Return a coroutine that does what real_files() does, with asyncio.
+
+        Stats and listings run on up to concurrency threads at once. The
+        coroutine returns the list of missing files. If it's cancelled, the
+        list is unchanged. See ciopath.aio.
+        """
+        from ciopath import aio
+
+        return aio.real_files(self, concurrency, cache)
+
+    @staticmethod
+    def _classify(entries, all_stats):
+        """Sort stat'ed entries into (files, directories, missing).
+
+        Missing entries are fslash strings.
+        """
+        files = []
+        directories = []
         missing = []
-        self.glob()
-        for entry in self._entries:
-            stats = entry.stat()
+        for entry, stats in zip(entries, all_stats):
             if not stats:
                 missing.append(entry.fslash())
-                continue
-            if stats["is_file"]:
-                result.append(entry)
+            elif stats["is_file"]:
+                files.append(entry)
             elif stats["is_dir"]:
-                for root, _, files in os.walk(entry.fslash()):
-                    for file_name in files:
-                        file_path = os.path.join(root, file_name)
-                        result.append(Path(file_path))
+                directories.append(entry)
+        return files, directories, missing
 
-        self._entries = result
-        self._clean = False
-        self._current = 0
-        return missing
+    def iter_real_files(self, max_workers=None, cache=None, on_missing=None):
+        """Generate (Path, stats) for the real files, as they are found.
+
+        This finds the same files as real_files(), but doesn't wait for the
+        whole tree to be walked and doesn't keep the results, so an upload
+        can start on the first file while the rest are being discovered. The
+        list itself is not changed. Files come in the order they are found.
+
+        Stats are the dict returned by Path.stat(). Every file found by the
+        walk is stat'ed, on the thread pool if max_workers is set.
+
+        The fslash strings of missing entries are passed to on_missing, if
+        given. A file that is listed but can't be stat'ed, for example a
+        broken symlink, counts as missing too. To get a summary, pass the
+        append method of a list.
+
+        Duplicates are skipped. Unless one entry lies below another, that's
+        known without keeping track of the files already generated, so
+        memory use stays flat however large the tree is.
+        """
+        entries = sorted(set(self._globbed(cache)))
+        trie = PathTrie(entries)
+        nested = any(trie.ancestor_of(entry) is not None for entry in entries)
+        seen = set() if nested else None
+
+        def report(path, stats):
+            if not stats:
+                if on_missing is not None:
+                    on_missing(path.fslash())
+                return False
+            if seen is not None:
+                if path in seen:
+                    return False
+                seen.add(path)
+            return True
+
+        def stat(path):
+            return path, path.stat(cache)
+
+        directories = []
+        for entry, stats in _imap(stat, entries, max_workers):
+            if stats and stats["is_dir"]:
+                directories.append(entry)
+            elif not stats or stats["is_file"]:
+                if report(entry, stats):
+                    yield entry, stats
+
+        files = self._walk(directories, max_workers, cache)
+        for path, stats in _imap(stat, files, max_workers):
+            if report(path, stats):
+                yield path, stats
 
     def __iter__(self):
         """Get an iterator to entries.
@@ -213,14 +613,45 @@ class PathList(object):
         self._deduplicate()
         return len(self._entries)
 
-    def remove_missing(self):
-        missing = PathList()
-        for path in self._entries:
-            pp = path.fslash()
-            if GLOBBABLE_REGEX.search(pp):
-                continue
-            if not os.path.exists(pp):
-                missing.add(path)
+    def remove_missing(self, max_workers=None, cache=None):
+        """Remove entries that don't exist on disk. Entries that look like globs are kept.
+
+        Set max_workers to check entries on that many threads at once. Pass a
+        FileSystemCache to check it first.
+        """
+        candidates = self._existence_candidates()
+        exists_func = cache.exists if cache is not None else os.path.exists
+        exists = _map(exists_func, [p.fslash() for p in candidates], max_workers)
+        self._remove_absent(candidates, exists)
+
+    def md5(self, max_workers=4, cache=None):
+        """Return the MD5 digests of the entries, hashed on max_workers threads.
+
+        The result is a ciopath.hashing.Digests dict of Path to hex digest,
+        with the bytes read and the throughput. Pass a HashCache to skip
+        files whose size and mtime haven't changed since they were hashed.
+        Call real_files() first so that the entries are files. Stats carried
+        by the entries are used for the cache lookup instead of a new stat.
+        """
+        return hash_paths(self, max_workers, cache)
+
+    def aremove_missing(self, concurrency=64, cache=None):
+        """Return a coroutine that does what remove_missing() does, with asyncio.
+
+        Entries are checked on up to concurrency threads at once. See
+        ciopath.aio.
+        """
+        from ciopath import aio
+
+        return aio.remove_missing(self, concurrency, cache)
+
+    def _existence_candidates(self):
+        """Return a list of the entries remove_missing() should check."""
+        return [p for p in self._entries if not GLOBBABLE_REGEX.search(p.fslash())]
+
+    def _remove_absent(self, candidates, exists):
+        """Remove the candidates whose exists flag is False."""
+        missing = [p for p, found in zip(candidates, exists) if not found]
         if missing:
             self.remove(*missing)
 
@@ -236,19 +667,14 @@ class PathList(object):
         "*.bak, *.tmp"
         "*.ext", "*.bak, *.tmp"
 
+        Forward and back slashes in patterns are interchangeable. All the
+        patterns are compiled together. See ciopath.path_glob.PatternSet.
         """
         flat_patterns = [
             item for pattern_str in patterns for item in re.split(", ", pattern_str)
         ]
-
-        matches = PathList()
-        for path in self._entries:
-            for pattern in flat_patterns:
-                if fnmatch.fnmatch(path.fslash(), pattern) or fnmatch.fnmatch(
-                    path.bslash(), pattern
-                ):
-                    matches.add(path)
-                    break
-
-        if matches:
-            self.remove(*matches)
+        matcher = PatternSet(flat_patterns)
+        if self._entries.remove_matching(matcher):
+            self._clean = False
+            self._current = 0
+            self._common_known = False
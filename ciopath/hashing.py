@@ -0,0 +1,204 @@
+from __future__ import unicode_literals
+
+"""
+MD5 hashing of files, on threads, with a persistent cache.
+
+Files are read with large unbuffered reads into one reusable buffer per
+call. hashlib releases the GIL while it hashes a block, so several files can
+be read and hashed at once on a thread pool.
+
+A HashCache keeps digests between runs, keyed by path, size and mtime, so a
+file that hasn't changed is never read again.
+
+    with HashCache("~/.conductor/md5_cache.db") as cache:
+        digests = plist.md5(max_workers=8, cache=cache)
+    print(digests.mb_per_second)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Bump this when the table changes. Files of another version are ignored.
+SCHEMA_VERSION = 1
+
+CHUNK_SIZE = 1 << 20
+
+
+def md5_file(filename, chunk_size=CHUNK_SIZE):
+    """Return the hex MD5 digest of a file and the number of bytes read."""
+    digest = hashlib.md5()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    size = 0
+    with open(filename, "rb", buffering=0) as fh:
+        while True:
+            count = fh.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+            size += count
+    return digest.hexdigest(), size
+
+
+class HashCache(object):
+    """Digests kept in a sqlite file, keyed by path, size and mtime.
+
+    The file is read when the cache is made and written by save(), or on
+    leaving a with block without an exception. It's safe to use from several
+    threads.
+    """
+
+    def __init__(self, filename):
+        self.filename = os.path.expanduser(filename)
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.filename):
+            return
+        connection = sqlite3.connect(self.filename)
+        try:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                return
+            rows = connection.execute("SELECT path, size, mtime, md5 FROM digests")
+            for path, size, mtime, md5 in rows:
+                self._digests[path] = (size, mtime, md5)
+        except sqlite3.DatabaseError:
+            # Not a cache file we can read. It's replaced on save.
+            self._digests.clear()
+        finally:
+            connection.close()
+
+    def get(self, path, size, mtime):
+        """Return the digest of a path string, or None.
+
+        None means we don't have a digest for the path at this size and mtime.
+        """
+        with self._lock:
+            entry = self._digests.get(path)
+        if entry is not None and entry[0] == size and entry[1] == mtime:
+            return entry[2]
+        return None
+
+    def set(self, path, size, mtime, md5):
+        with self._lock:
+            self._digests[path] = (size, mtime, md5)
+
+    def save(self):
+        """Write the digests to the file."""
+        with self._lock:
+            rows = [(path,) + entry for path, entry in self._digests.items()]
+        directory = os.path.dirname(self.filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_filename = "{}.{}.tmp".format(self.filename, os.getpid())
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        connection = sqlite3.connect(temp_filename)
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE digests (path TEXT PRIMARY KEY,"
+                    " size INTEGER NOT NULL, mtime REAL NOT NULL, md5 TEXT NOT NULL)"
+                )
+                connection.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+                connection.executemany("INSERT INTO digests VALUES (?, ?, ?, ?)", rows)
+        finally:
+            connection.close()
+        os.replace(temp_filename, self.filename)
+
+    def __len__(self):
+        return len(self._digests)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.save()
+        return False
+
+
+class Digests(dict):
+    """A dict of Path to hex MD5 digest, with statistics of how it was made.
+
+    Missing files have a digest of None.
+    """
+
+    def __init__(self):
+        super(Digests, self).__init__()
+        self.bytes_read = 0
+        self.files_read = 0
+        self.cache_hits = 0
+        self.seconds = 0.0
+
+    @property
+    def mb_per_second(self):
+        """Throughput of the files read. Cached digests don't count."""
+        if not self.seconds:
+            return 0.0
+        return self.bytes_read / 1e6 / self.seconds
+
+
+def _hash_one(path, cache, chunk_size):
+    """Return (digest, bytes read) of a Path, using the cache if given."""
+    filename = path.fslash()
+    # A Path that was stat'ed already carries its size and mtime.
+    carried = path.stat_info
+    if carried is not None:
+        before = (carried.size, carried.mtime)
+    else:
+        try:
+            result = os.stat(filename)
+        except OSError:
+            return None, 0
+        before = (result.st_size, result.st_mtime)
+    if cache is not None:
+        digest = cache.get(filename, *before)
+        if digest is not None:
+            return digest, None
+    try:
+        digest, size = md5_file(filename, chunk_size)
+    except (IOError, OSError):
+        return None, 0
+    if cache is not None:
+        try:
+            after = os.stat(filename)
+        except OSError:
+            return digest, size
+        # Don't remember a digest of a file that changed while we read it.
+        if (after.st_size, after.st_mtime) == before:
+            cache.set(filename, after.st_size, after.st_mtime, digest)
+    return digest, size
+
+
+def hash_paths(paths, max_workers=4, cache=None, chunk_size=CHUNK_SIZE):
+    """Return Digests of an iterable of Paths, hashed on max_workers threads."""
+    result = Digests()
+    paths = list(paths)
+    start = time.time()
+
+    def work(path):
+        return _hash_one(path, cache, chunk_size)
+
+    if max_workers and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(work, paths))
+    else:
+        outcomes = [work(path) for path in paths]
+    result.seconds = time.time() - start
+
+    for path, (digest, size) in zip(paths, outcomes):
+        result[path] = digest
+        if size is None:
+            result.cache_hits += 1
+        elif digest is not None:
+            result.files_read += 1
+            result.bytes_read += size
+    return result
@@ -0,0 +1,318 @@
+from __future__ import unicode_literals
+
+"""
+A compact binary file of the entries of a PathList.
+
+    plist.save("job.manifest")
+    plist = PathList.load("job.manifest")
+    "/proj/tex/a.1001.tx" in plist
+
+Entries are stored in sorted order by their forward slash form, UTF-8
+encoded, as in PackedStorage. Sorted paths share long directory prefixes, so
+each key is stored as the number of bytes it shares with the key before it
+and the bytes that follow. Every RESTART_INTERVAL keys the prefix starts
+again, with a whole key, and the offset of each restart is kept in a table.
+The file is laid out like this, with integers little endian:
+
+    header:   magic, version, restart interval, number of entries
+    restarts: one uint64 offset into the entries for each block
+    entries:  for each key, uint16 shared length, uint16 suffix length,
+              then the suffix
+
+A Manifest reads the file through mmap, so opening one reads nothing but
+the header, and pages are read as entries are asked for. Membership is a
+binary search of the restart keys, then a scan of at most one block.
+
+The file is written to a temporary file first and then moved into place.
+While a Manifest has the file mapped, Windows doesn't let it be replaced or
+removed.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import chain, islice
+
+from ciopath.path_storage import (
+    PackedStorage,
+    _ancestor_by_lookup,
+    _decode,
+    _decode_all,
+    _encode,
+    _under_sorted_keys,
+)
+
+MAGIC = b"CIOPATHS"
+
+# Bump this when the layout changes. Files of another version are refused.
+VERSION = 1
+
+RESTART_INTERVAL = 16
+
+# magic, version, restart interval, number of entries
+_HEADER = struct.Struct("<8sIIQ")
+
+# Bytes shared with the previous key, and bytes that follow.
+_ENTRY = struct.Struct("<HH")
+
+_MAX_KEY_LENGTH = 0xFFFF
+
+
+def _shared_length(previous, key):
+    """Return the length of the common prefix of two byte strings."""
+    size = min(len(previous), len(key))
+    if previous[:size] == key[:size]:
+        return size
+    # previous[:low] matches and previous[:high] doesn't.
+    low, high = 0, size
+    while high - low > 1:
+        middle = (low + high) // 2
+        if previous[:middle] == key[:middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def write(filename, keys, restart_interval=RESTART_INTERVAL):
+    """Write sorted, unique keys to a manifest file.
+
+    Keys are the UTF-8 forward slash forms of Paths, as PackedStorage holds
+    them. Use write_paths() for Paths.
+    """
+    entries = bytearray()
+    restarts = array("Q")
+    count = 0
+    previous = b""
+    for key in keys:
+        if len(key) > _MAX_KEY_LENGTH:
+            text = key[:80].decode("utf-8", "replace")
+            raise ValueError("Path too long for a manifest: {}...".format(text))
+        if count % restart_interval == 0:
+            restarts.append(len(entries))
+            shared = 0
+        else:
+            shared = _shared_length(previous, key)
+        entries += _ENTRY.pack(shared, len(key) - shared)
+        entries += key[shared:]
+        previous = key
+        count += 1
+    if sys.byteorder != "little":
+        restarts.byteswap()
+
+    filename = os.path.expanduser(filename)
+    directory = os.path.dirname(filename)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    temp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    with open(temp_filename, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, VERSION, restart_interval, count))
+        fh.write(restarts.tobytes())
+        fh.write(entries)
+    os.replace(temp_filename, filename)
+
+
+def write_paths(filename, paths, restart_interval=RESTART_INTERVAL):
+    """Write sorted, unique Paths to a manifest file."""
+    write(filename, (_encode(p) for p in paths), restart_interval)
+
+
+class Manifest(object):
+    """The sorted keys of a manifest file, read as they are asked for.
+
+    With use_mmap=False the file is read into memory, still compressed,
+    instead of being mapped.
+    """
+
+    def __init__(self, filename, use_mmap=True):
+        self.filename = os.path.expanduser(filename)
+        with open(self.filename, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError("Not a manifest file: {}".format(self.filename))
+            if use_mmap:
+                data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = fh.read()
+        magic, version, interval, count = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a manifest file: {}".format(self.filename))
+        if version != VERSION:
+            raise ValueError(
+                "Manifest version {} is not supported: {}".format(
+                    version, self.filename
+                )
+            )
+        self._map = data if use_mmap else None
+        self._interval = interval
+        self._count = count
+        self._blocks = (count + interval - 1) // interval
+        view = memoryview(data)
+        start = _HEADER.size
+        end = start + 8 * self._blocks
+        if sys.byteorder == "little":
+            self._restarts = view[start:end].cast("Q")
+        else:
+            self._restarts = array("Q", view[start:end].tobytes())
+            self._restarts.byteswap()
+        self._entries = view[end:]
+
+    def close(self):
+        """Release the mapping. The manifest can't be read after this."""
+        if isinstance(self._restarts, memoryview):
+            self._restarts.release()
+        self._entries.release()
+        if self._map is not None:
+            self._map.close()
+
+    def _block(self, block):
+        """Generate the keys of a block."""
+        entries = self._entries
+        unpack_from = _ENTRY.unpack_from
+        position = self._restarts[block]
+        first = block * self._interval
+        key = b""
+        for _ in range(min(self._interval, self._count - first)):
+            shared, length = unpack_from(entries, position)
+            position += _ENTRY.size
+            key = key[:shared] + entries[position : position + length].tobytes()
+            position += length
+            yield key
+
+    def _first_key(self, block):
+        """The whole key at the start of a block."""
+        position = self._restarts[block]
+        _, length = _ENTRY.unpack_from(self._entries, position)
+        position += _ENTRY.size
+        return self._entries[position : position + length].tobytes()
+
+    def keys(self, start=0, stop=None):
+        """Generate the keys from index start up to stop."""
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return iter(())
+        block, skip = divmod(start, self._interval)
+        keys = chain.from_iterable(self._block(b) for b in range(block, self._blocks))
+        return islice(keys, skip, skip + stop - start)
+
+    def key(self, index):
+        """Return the key at an index."""
+        if not 0 <= index < self._count:
+            raise IndexError("index out of range")
+        return next(self.keys(index, index + 1))
+
+    def bisect(self, key):
+        """Return the index of the first key not less than key.
+
+        The restart keys are searched for the last block that starts at or
+        before key, and then that block is scanned.
+        """
+        low, high = 0, self._blocks
+        while low < high:
+            middle = (low + high) // 2
+            if self._first_key(middle) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return 0
+        index = (low - 1) * self._interval
+        for candidate in self._block(low - 1):
+            if candidate >= key:
+                return index
+            index += 1
+        return index
+
+    def __contains__(self, key):
+        index = self.bisect(key)
+        return index < self._count and self.key(index) == key
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self._count
+
+
+class ManifestStorage(object):
+    """The entries of a PathList loaded from a manifest.
+
+    Entries are read from the Manifest as they are needed, and nothing is
+    held in memory. The first change copies the keys into a PackedStorage,
+    which takes over from then on.
+    """
+
+    def __init__(self, manifest):
+        self._manifest = manifest
+        self._packed = None
+
+    def _thaw(self):
+        """Return the PackedStorage, copying the keys into it the first time."""
+        if self._packed is None:
+            self._packed = PackedStorage.from_keys(self._manifest)
+            self._manifest = None
+        return self._packed
+
+    def keys(self):
+        """Generate the keys of the entries. Call after deduplicate()."""
+        if self._packed is not None:
+            return self._packed.keys()
+        return iter(self._manifest)
+
+    def add(self, path):
+        self._thaw().add(path)
+
+    def extend(self, paths):
+        self._thaw().extend(paths)
+
+    def remove(self, removals):
+        """Remove all entries found in removals, which should be a set of Paths."""
+        self._thaw().remove(removals)
+
+    def deduplicate(self):
+        # A manifest is sorted and unique already.
+        if self._packed is not None:
+            self._packed.deduplicate()
+
+    def remove_matching(self, matcher):
+        """Remove entries that a PatternSet matches. Return True if any were."""
+        return self._thaw().remove_matching(matcher)
+
+    def remove_contained(self):
+        """Remove entries that lie below another entry."""
+        self._thaw().remove_contained()
+
+    def under(self, path):
+        """Generate entries at or below the given path."""
+        if self._packed is not None:
+            return self._packed.under(path)
+        manifest = self._manifest
+        return _under_sorted_keys(self, path, manifest.bisect, manifest.keys)
+
+    def ancestor_of(self, path):
+        """Return the shallowest entry that contains the given path, or None."""
+        return _ancestor_by_lookup(self, path)
+
+    def __contains__(self, path):
+        if self._packed is not None:
+            return path in self._packed
+        return _encode(path) in self._manifest
+
+    def __getitem__(self, index):
+        if self._packed is not None:
+            return self._packed[index]
+        if index < 0:
+            index += len(self._manifest)
+        return _decode(self._manifest.key(index))
+
+    def __iter__(self):
+        if self._packed is not None:
+            return iter(self._packed)
+        return _decode_all(self._manifest)
+
+    def __len__(self):
+        if self._packed is not None:
+            return len(self._packed)
+        return len(self._manifest)
@@ -0,0 +1,283 @@
+from __future__ import unicode_literals
+
+"""
+Glob expansion for many patterns at once.
+
+glob.glob lists the parent directory of every pattern it is given, so 3000
+patterns in a handful of texture directories list those directories 3000
+times. Here, each pattern is split into its literal parent directory and the
+components that follow. Patterns are grouped by directory, each directory is
+listed once, and every pattern of the group is matched against that one
+listing. Components that repeat across patterns are compiled once.
+
+A listing is sorted once, and each pattern component only tests the names
+that start with its literal prefix, found by binary search. So the cost of a
+directory grows with the number of matches, not patterns times names.
+
+Matching follows glob.glob: wildcards don't match names that start with a
+dot unless the pattern component does, components before the last must be
+directories, and matching ignores case on Windows.
+
+Patterns are translated to regular expressions with the bracket expressions
+copied as they are. A malformed range such as [b-a] then fails to compile,
+and the pattern is kept as a literal path. See PathList.glob().
+
+PatternSet matches whole paths against many fnmatch style patterns at once,
+for PathList.remove_pattern.
+"""
+
+import fnmatch
+import os
+import re
+from bisect import bisect_left
+
+from ciopath.walk import _child, list_directory
+
+GLOBBABLE_REGEX = re.compile(r"\*|\?|\[")
+
+_IGNORE_CASE = os.name == "nt"
+_FLAGS = re.IGNORECASE if _IGNORE_CASE else 0
+
+# Pattern characters that can tell one run of digits from another.
+_DIGIT_SENSITIVE_REGEX = re.compile(r"[0-9?\[]")
+
+
+
+def translate(pattern):
+    """Translate a glob pattern component to a regular expression string.
+
+    Unlike fnmatch.translate, the contents of [...] are passed through, so an
+    invalid range raises re.error when the result is compiled.
+    """
+    i, n = 0, len(pattern)
+    result = []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            if not result or result[-1] != ".*":
+                result.append(".*")
+        elif c == "?":
+            result.append(".")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                result.append("\\[")
+                continue
+            stuff = pattern[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if stuff[0] == "!":
+                stuff = "^" + stuff[1:]
+            elif stuff[0] in ("^", "["):
+                stuff = "\\" + stuff
+            result.append("[{}]".format(stuff))
+        else:
+            result.append(re.escape(c))
+    return "(?s:{})\\Z".format("".join(result))
+
+
+def _sort_key(name):
+    return name.lower() if _IGNORE_CASE else name
+
+
+class _Listing(object):
+    """The entries of a directory listing, sorted for prefix search."""
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda entry: _sort_key(entry[0]))
+        self.keys = [_sort_key(entry[0]) for entry in self.entries]
+
+
+class _Matcher(object):
+    """A compiled pattern component."""
+
+    __slots__ = ("match", "hidden", "prefix")
+
+    def __init__(self, component):
+        self.match = re.compile(translate(component), _FLAGS).match
+        self.hidden = component.startswith(".")
+        self.prefix = _sort_key(GLOBBABLE_REGEX.split(component, 1)[0])
+
+    def filter(self, listing):
+        """Generate (name, is_dir) pairs of a _Listing that match."""
+        keys = listing.keys
+        prefix = self.prefix
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            name, is_dir, _ = listing.entries[i]
+            if (self.hidden or not name.startswith(".")) and self.match(name):
+                yield name, is_dir
+            i += 1
+
+
+def _split(pattern, compiled):
+    """Split a pattern Path into its literal parent directory and a tuple of matchers.
+
+    Matchers are shared through the compiled dict, keyed by component.
+    Raises re.error if a component is not a valid pattern.
+    """
+    components = pattern._components
+    literal = 0
+    while literal < len(components) and not GLOBBABLE_REGEX.search(
+        components[literal]
+    ):
+        literal += 1
+    matchers = []
+    for component in components[literal:]:
+        matcher = compiled.get(component)
+        if matcher is None:
+            matcher = compiled[component] = _Matcher(component)
+        matchers.append(matcher)
+    directory = pattern._from_parts(
+        pattern._drive_prefix, pattern._absolute, components[:literal]
+    )
+    return directory, tuple(matchers)
+
+
+class GlobExpansion(object):
+    """The state of expanding a set of pattern Paths.
+
+    Expansion goes one level of every pattern at a time, so all patterns
+    that reach a directory are matched against the same listing. The caller
+    does the listing, which lets it be done on threads or with asyncio:
+
+        expansion = GlobExpansion(patterns)
+        while not expansion.done:
+            expansion.step({d: listdir(d) for d in expansion.needed()})
+        return expansion.result
+
+    Invalid patterns go straight to the result, unchanged.
+    """
+
+    def __init__(self, patterns):
+        self.result = []
+        self._compiled = {}
+        self._listings = {}
+        # Each item of work is a directory and the matchers for what lies below it.
+        self._work = []
+        for pattern in patterns:
+            try:
+                self._work.append(_split(pattern, self._compiled))
+            except re.error:
+                self.result.append(pattern)
+
+    @property
+    def done(self):
+        return not self._work
+
+    def needed(self):
+        """Return a list of the directory strings the next step needs listed.
+
+        Directories listed in an earlier step are not asked for again.
+        """
+        keys = {directory.fslash() for directory, _ in self._work}
+        return sorted(keys.difference(self._listings))
+
+    def step(self, listings):
+        """Match the current level of work.
+
+        Listings is a dict of the listings of the needed() directories, keyed
+        by directory string.
+        """
+        for key, listing in listings.items():
+            self._listings[key] = _Listing(listing)
+        groups = {}
+        for directory, matchers in self._work:
+            groups.setdefault(directory, set()).add(matchers)
+        self._work = []
+        for directory, all_matchers in groups.items():
+            listing = self._listings[directory.fslash()]
+            for matchers in all_matchers:
+                rest = matchers[1:]
+                for name, is_dir in matchers[0].filter(listing):
+                    if not rest:
+                        self.result.append(_child(directory, name))
+                    elif is_dir:
+                        self._work.append((_child(directory, name), rest))
+
+
+def glob_paths(patterns, listdir=list_directory):
+    """Expand pattern Paths. Return a list of the Paths found.
+
+    Invalid patterns are returned unchanged. Pass listdir to list directories
+    another way, for example with a FileSystemCache. See
+    walk.list_directory for what it returns.
+    """
+    expansion = GlobExpansion(patterns)
+    while not expansion.done:
+        expansion.step({key: listdir(key) for key in expansion.needed()})
+    return expansion.result
+
+
+class PatternSet(object):
+    """Match Paths against a set of fnmatch style patterns.
+
+    As with fnmatch, * and ? also match slashes. Paths are matched in their
+    forward slash form, and back slashes in patterns are made forward
+    slashes, so either kind matches. Matching ignores case on Windows.
+
+    Patterns like *.bak are looked up by extension in a set, and patterns
+    like *_v001.exr are tested with one endswith call. All other patterns
+    are compiled into a single regular expression, so each path is matched
+    once however many patterns there are.
+
+    If no pattern has a digit, a ? or a [ in it, ignores_digits is True: a
+    path matches or not whatever run of digits is in place of another, so
+    one frame of an image sequence stands for all of them.
+    """
+
+    def __init__(self, patterns):
+        """Initialize with an iterable of pattern strings."""
+        self.extensions = set()
+        self.ignores_digits = True
+        suffixes = []
+        expressions = []
+        for pattern in patterns:
+            pattern = pattern.replace("\\", "/")
+            if _DIGIT_SENSITIVE_REGEX.search(pattern):
+                self.ignores_digits = False
+            literal = pattern[1:]
+            if (
+                pattern.startswith("*")
+                and not GLOBBABLE_REGEX.search(literal)
+                and "/" not in literal
+            ):
+                literal = _sort_key(literal)
+                if literal.rfind(".") == 0:
+                    self.extensions.add(literal[1:])
+                else:
+                    suffixes.append(literal)
+                continue
+            try:
+                expression = translate(pattern)
+                re.compile(expression)
+            except re.error:
+                # Let fnmatch decide what an invalid range means.
+                expression = fnmatch.translate(pattern)
+            expressions.append(expression)
+        self.suffixes = tuple(suffixes)
+        self.regex = None
+        if expressions:
+            combined = "|".join("(?:{})".format(e) for e in expressions)
+            self.regex = re.compile(combined, _FLAGS)
+
+    def match(self, path):
+        """True if a Path matches any of the patterns."""
+        return self.match_fslash(path.fslash())
+
+    def match_fslash(self, text):
+        """True if a forward slash path string matches any of the patterns."""
+        name = _sort_key(text)
+        if self.extensions:
+            _, dot, extension = name.rpartition(".")
+            if dot and "/" not in extension and extension in self.extensions:
+                return True
+        if self.suffixes and name.endswith(self.suffixes):
+            return True
+        return self.regex is not None and self.regex.match(name) is not None
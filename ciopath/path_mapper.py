@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+
+"""
+Prefix remapping of many paths by many rules, for example from Windows
+workstation paths to the mounts of Linux render nodes.
+
+    mapper = PathMapper({"P:/proj": "/mnt/proj", "//fileserver/share": "/mnt/share"})
+    mapper.map("p:/proj/shot/a.exr")  # Path("/mnt/proj/shot/a.exr")
+    plist.remap(mapper)
+
+Rules are held in a prefix tree of components, like ciopath.path_trie, so a
+path is matched against all rules in one walk down the tree, O(depth)
+whatever the number of rules. The longest matching source wins. Matching is
+by whole components, so P:/proj doesn't match P:/project.
+
+Keys start with the root token of Path._component_key, so posix, UNC and
+drive letter paths never match each other's rules. Drive letters always
+match without case, and with ignore_case=True so do all components, as on
+Windows file servers.
+
+Mapped paths are built from the components of the target and the rest of the
+source path, so nothing is parsed or expanded again.
+"""
+
+from ciopath.gpath import Path
+
+# Components are never None, so None can mark the node of a rule's source.
+_TARGET = None
+
+
+class PathMapper(object):
+    def __init__(self, rules=None, ignore_case=False):
+        """Initialize, optionally with rules.
+
+        Rules are a dict of source to target, or an iterable of (source,
+        target) pairs. Sources and targets are Paths or strings.
+        """
+        self.ignore_case = ignore_case
+        self._root = {}
+        self._size = 0
+        # Root node for each (drive prefix, absolute) seen, to skip making
+        # the root token for every path.
+        self._roots = {}
+        if rules is not None:
+            if isinstance(rules, dict):
+                rules = rules.items()
+            for source, target in rules:
+                self.add(source, target)
+
+    def _root_token(self, path):
+        """Return the root token of Path._component_key, normalized for matching."""
+        if path._drive_prefix:
+            return "//" if path.is_unc else path._drive_prefix.lower()
+        return "/" if path._absolute else ""
+
+    def add(self, source, target):
+        """Add a rule that maps paths at or below source to the same place below target.
+
+        A later rule for the same source replaces the earlier one.
+        """
+        if not isinstance(source, Path):
+            source = Path(source)
+        if not isinstance(target, Path):
+            target = Path(target)
+        node = self._root
+        components = source._components
+        if self.ignore_case:
+            components = [c.lower() for c in components]
+        for component in [self._root_token(source)] + list(components):
+            child = node.get(component)
+            if child is None:
+                child = node[component] = {}
+            node = child
+        self._roots.clear()
+        if _TARGET not in node:
+            self._size += 1
+        node[_TARGET] = (target._drive_prefix, target._absolute, target._components)
+
+    def map(self, path):
+        """Return a Path mapped by the rule with the longest matching source.
+
+        A Path that no rule matches is returned as it is.
+        """
+        if not isinstance(path, Path):
+            path = Path(path)
+        target, depth = self._match(path)
+        if target is None:
+            return path
+        drive_prefix, absolute, components = target
+        return path._from_parts(
+            drive_prefix, absolute, components + path._components[depth:]
+        )
+
+    def _match(self, path):
+        """Return the target parts of the longest matching source and its depth.
+
+        The depth is the number of components of the path that the source
+        matched. Return None and 0 if no rule matches.
+        """
+        root = (path._drive_prefix, path._absolute)
+        try:
+            node = self._roots[root]
+        except KeyError:
+            node = self._roots[root] = self._root.get(self._root_token(path))
+        if node is None:
+            return None, 0
+        target = node.get(_TARGET)
+        depth = 0
+        ignore_case = self.ignore_case
+        for index, component in enumerate(path._components, 1):
+            node = node.get(component.lower() if ignore_case else component)
+            if node is None:
+                break
+            if _TARGET in node:
+                target = node[_TARGET]
+                depth = index
+        return target, depth
+
+    def __len__(self):
+        return self._size
@@ -0,0 +1,831 @@
+from __future__ import unicode_literals
+
+"""
+Storage engines for PathList.
+
+A storage engine holds the entries of a PathList. It accepts new Paths
+without deduplicating them, and only sorts and deduplicates when asked to
+with deduplicate(). After that, iteration and indexing follow the sorted
+order.
+
+ListStorage: A sorted list of unique entries, plus a buffer of entries added
+since the last deduplicate(). Only the buffer is sorted when deduplicating,
+and then merged in, so adding a few paths to a large list is cheap.
+Membership is a binary search.
+
+TrieStorage: A prefix tree of components (see path_trie). Membership,
+insertion and deletion are O(depth) and it can answer containment queries
+directly. It uses more memory than a list.
+
+SequenceStorage: Numbered files, such as the frames of an image sequence,
+are grouped by directory, the name before and after the frame number, and
+the frame width. Each group is held as a list of frame ranges, so
+beauty.1001.exr to beauty.3000.exr is one group with one range. Paths of
+frames are made again as they are asked for. Other paths are held in a
+ListStorage.
+
+PackedStorage: The forward slash form of each entry, UTF-8 encoded, in one
+contiguous buffer with an array of offsets, and no Path objects at all. It
+costs the length of the path plus 8 bytes an entry. Paths are made again as
+they are asked for. Membership is a binary search of the buffer.
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
+
+from ciopath.gpath import Path, _parse
+from ciopath.path_trie import PathTrie
+
+# Up to this many new paths are inserted one at a time. More than that and a
+# single merge of the two sorted runs is faster.
+_INSORT_LIMIT = 100
+
+
+def _is_within(path, start):
+    """True if path is start or lies below it."""
+    key = path._component_key()
+    start_key = start._component_key()
+    return key[: len(start_key)] == start_key
+
+
+def _ancestor_by_lookup(storage, path):
+    """Return the shallowest entry of storage that contains path, or None.
+
+    Each ancestor of the path is looked up in turn, which suits engines with
+    a fast membership test.
+    """
+    components = path._components
+    start = 0 if path._absolute else 1
+    for depth in range(start, len(components)):
+        ancestor = Path._from_parts(
+            path._drive_prefix, path._absolute, components[:depth]
+        )
+        if ancestor in storage:
+            return ancestor
+    return None
+
+
+def _contains_sorted(entries, path):
+    """Binary search a sorted list of unique paths."""
+    index = bisect_left(entries, path)
+    return index < len(entries) and entries[index] == path
+
+
+def _merge(entries, paths):
+    """Merge paths into a sorted list of unique entries and return the result.
+
+    The new paths are sorted and deduplicated on their own, then merged in.
+    That costs O(k log n + n) for k new paths rather than the O(n log n) of
+    sorting everything again. It may modify entries in place.
+    """
+    if len(paths) >= len(entries):
+        # Most of the list is new. Sort it all.
+        return sorted(set(entries).union(paths), key=Path.fslash)
+    delta = [p for p in set(paths) if not _contains_sorted(entries, p)]
+    if len(delta) <= _INSORT_LIMIT:
+        for path in delta:
+            insort(entries, path)
+        return entries
+    # Timsort finds the two sorted runs and merges them in one linear pass.
+    delta.sort(key=Path.fslash)
+    entries.extend(delta)
+    entries.sort(key=Path.fslash)
+    return entries
+
+
+class ListStorage(object):
+    """Entries in a sorted list, with a buffer of paths that are not merged in yet.
+
+    Duplicates are kept in the buffer until deduplicate() is called.
+    """
+
+    def __init__(self, paths=None):
+        self._items = []
+        self._pending = list(paths or [])
+
+    @classmethod
+    def from_sorted(cls, paths):
+        """Make storage from paths that are already sorted and unique."""
+        result = cls()
+        result._items = list(paths)
+        return result
+
+    def add(self, path):
+        self._pending.append(path)
+
+    def extend(self, paths):
+        self._pending.extend(paths)
+
+    def remove(self, removals):
+        """Remove all entries found in removals, which should be a set of Paths."""
+        self._items = [p for p in self._items if p not in removals]
+        self._pending = [p for p in self._pending if p not in removals]
+
+    def deduplicate(self):
+        if self._pending:
+            self._items = _merge(self._items, self._pending)
+            self._pending = []
+
+    def remove_matching(self, matcher):
+        """Remove entries that a PatternSet matches. Return True if any were."""
+        matches = {p for p in self if matcher.match(p)}
+        if matches:
+            self.remove(matches)
+        return bool(matches)
+
+    def remove_contained(self):
+        """Remove entries that lie below another entry. Call after deduplicate().
+
+        Sorting on component keys puts each path directly before the block of
+        paths it contains, so one pass that remembers the last kept path finds
+        them all. Survivors keep their current order.
+        """
+        items = self._items
+        keys = [p._component_key() for p in items]
+        keep = []
+        container = None
+        for i in sorted(range(len(items)), key=keys.__getitem__):
+            key = keys[i]
+            if container is not None and key[: len(container)] == container:
+                continue
+            container = key
+            keep.append(i)
+        if len(keep) < len(items):
+            keep.sort()
+            self._items = [items[i] for i in keep]
+
+    def under(self, path):
+        """Generate entries at or below the given path."""
+        return (p for p in self if _is_within(p, path))
+
+    def ancestor_of(self, path):
+        """Return the shallowest entry that contains the given path, or None."""
+        result = None
+        for entry in self:
+            if entry != path and _is_within(path, entry):
+                if result is None or entry.depth < result.depth:
+                    result = entry
+        return result
+
+    def __contains__(self, path):
+        return _contains_sorted(self._items, path) or path in self._pending
+
+    def __getitem__(self, index):
+        self.deduplicate()
+        return self._items[index]
+
+    def __iter__(self):
+        if self._pending:
+            return chain(self._items, self._pending)
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items) + len(self._pending)
+
+
+class TrieStorage(object):
+    """Entries in a prefix tree.
+
+    The tree never holds duplicates. A sorted list of the entries is kept for
+    ordered iteration and indexing. deduplicate() merges paths added since
+    into it. Removals drop it, and it is only made again when iteration or
+    indexing needs it, so membership tests between removals don't sort.
+    """
+
+    def __init__(self, paths=None):
+        self._trie = PathTrie(paths)
+        self._sorted = None
+        self._pending = []
+
+    @classmethod
+    def from_sorted(cls, paths):
+        """Make storage from paths that are already sorted and unique."""
+        paths = list(paths)
+        result = cls(paths)
+        result._sorted = paths
+        return result
+
+    def add(self, path):
+        if self._trie.add(path) and self._sorted is not None:
+            self._pending.append(path)
+
+    def extend(self, paths):
+        for path in paths:
+            self.add(path)
+
+    def remove(self, removals):
+        """Remove all entries found in removals, which should be a set of Paths."""
+        for path in removals:
+            if self._trie.discard(path):
+                self._sorted = None
+                self._pending = []
+
+    def deduplicate(self):
+        if self._sorted is not None and self._pending:
+            self._sorted = _merge(self._sorted, self._pending)
+        self._pending = []
+
+    def _sorted_entries(self):
+        """Return the sorted list of entries, making it if there is none."""
+        if self._sorted is None:
+            self._sorted = sorted(self._trie, key=Path.fslash)
+            self._pending = []
+        else:
+            self.deduplicate()
+        return self._sorted
+
+    def remove_matching(self, matcher):
+        """Remove entries that a PatternSet matches. Return True if any were."""
+        matches = {p for p in self._trie if matcher.match(p)}
+        if matches:
+            self.remove(matches)
+        return bool(matches)
+
+    def remove_contained(self):
+        """Remove entries that lie below another entry."""
+        if self._trie.prune_contained():
+            self._sorted = None
+            self._pending = []
+
+    def under(self, path):
+        """Generate entries at or below the given path."""
+        return self._trie.under(path)
+
+    def ancestor_of(self, path):
+        """Return the shallowest entry that contains the given path, or None."""
+        return self._trie.ancestor_of(path)
+
+    def __contains__(self, path):
+        return path in self._trie
+
+    def __getitem__(self, index):
+        return self._sorted_entries()[index]
+
+    def __iter__(self):
+        return iter(self._sorted_entries())
+
+    def __len__(self):
+        return len(self._trie)
+
+
+# The last run of digits in a file name, and what follows it.
+_FRAME_REGEX = re.compile(r"(\d+)(\D*)$")
+
+
+def _merge_ranges(ranges):
+    """Merge (first, last) frame ranges into sorted ranges that don't touch."""
+    result = []
+    for first, last in sorted(ranges):
+        if result and first <= result[-1][1] + 1:
+            if last > result[-1][1]:
+                result[-1] = (result[-1][0], last)
+        else:
+            result.append((first, last))
+    return result
+
+
+def _subtract_ranges(ranges, frames):
+    """Remove a set of frames from sorted frame ranges."""
+    result = []
+    frames = sorted(frames)
+    for first, last in ranges:
+        start = bisect_left(frames, first)
+        stop = bisect_right(frames, last)
+        for frame in frames[start:stop]:
+            if frame > first:
+                result.append((first, frame - 1))
+            first = frame + 1
+        if first <= last:
+            result.append((first, last))
+    return result
+
+
+class _Sequence(object):
+    """The frames of one numbered file name in one directory.
+
+    A frame's name is head, then the frame number padded with zeros to
+    width, then tail. Names with more or fewer digits are in other groups.
+    Frames are held as sorted (first, last) ranges, plus frames added since
+    the last deduplicate().
+    """
+
+    __slots__ = ("parent", "prefix", "head", "tail", "width", "ranges", "pending")
+
+    def __init__(self, path, drive_prefix, absolute, components, head, tail, width):
+        self.parent = (drive_prefix, absolute, components)
+        # The forward slash directory, with a trailing slash.
+        self.prefix = path.fslash()[: -len(path.tail)]
+        self.head = head
+        self.tail = tail
+        self.width = width
+        self.ranges = []
+        self.pending = []
+
+    def deduplicate(self):
+        if self.pending:
+            new = [(frame, frame) for frame in self.pending]
+            self.ranges = _merge_ranges(self.ranges + new)
+            self.pending = []
+
+    def remove(self, frames):
+        self.deduplicate()
+        self.ranges = _subtract_ranges(self.ranges, frames)
+
+    def __contains__(self, frame):
+        index = bisect_right(self.ranges, (frame, float("inf"))) - 1
+        return (index >= 0 and frame <= self.ranges[index][1]) or frame in self.pending
+
+    def __len__(self):
+        self.deduplicate()
+        return sum(last - first + 1 for first, last in self.ranges)
+
+    def frames(self):
+        """Generate the frame numbers in order.
+
+        All frames have width digits, so that's also the order of their paths.
+        """
+        self.deduplicate()
+        return (f for first, last in self.ranges for f in range(first, last + 1))
+
+    def path(self, frame):
+        """Make the Path of a frame."""
+        name = "{}{}{}".format(self.head, str(frame).zfill(self.width), self.tail)
+        drive_prefix, absolute, components = self.parent
+        result = Path._from_parts(drive_prefix, absolute, components + (name,))
+        result._key = self.prefix + name
+        return result
+
+    def paths(self):
+        return (self.path(frame) for frame in self.frames())
+
+
+def _split_frame(path):
+    """Return (group key, frame number) of a Path, or None if it isn't numbered.
+
+    The key is the directory's parts, the name before and after the frame
+    number, and the number of digits.
+    """
+    components = path._components
+    match = _FRAME_REGEX.search(components[-1]) if components else None
+    if match is None:
+        return None
+    name = components[-1]
+    digits, tail = match.groups()
+    key = (
+        path._drive_prefix,
+        path._absolute,
+        components[:-1],
+        name[: match.start()],
+        tail,
+        len(digits),
+    )
+    return key, int(digits)
+
+
+class SequenceStorage(object):
+    """Numbered files grouped into sequences of frame ranges.
+
+    Membership, adding and removing a frame don't expand a sequence, and
+    neither do len() or remove_pattern() with patterns that ignore digits.
+    Iteration makes each frame's Path as it goes, in sorted order.
+
+    Entries that are not numbered files are kept in a ListStorage. Paths
+    made for frames are new objects, so they don't carry stats.
+    """
+
+    def __init__(self, paths=None):
+        self._sequences = {}
+        self._others = ListStorage()
+        # (index, iterator) of the last __getitem__, for in-order indexing.
+        self._cursor = None
+        if paths:
+            self.extend(paths)
+
+    @classmethod
+    def from_sorted(cls, paths):
+        """Make storage from paths that are already sorted and unique."""
+        return cls(paths)
+
+    def add(self, path):
+        self._cursor = None
+        split = _split_frame(path)
+        if split is None:
+            self._others.add(path)
+            return
+        key, frame = split
+        sequence = self._sequences.get(key)
+        if sequence is None:
+            sequence = _Sequence(path, *key)
+            self._sequences[key] = sequence
+        sequence.pending.append(frame)
+
+    def extend(self, paths):
+        for path in paths:
+            self.add(path)
+
+    def remove(self, removals):
+        """Remove all entries found in removals, which should be a set of Paths."""
+        self._cursor = None
+        others = set()
+        frames = {}
+        for path in removals:
+            split = _split_frame(path)
+            if split is None:
+                others.add(path)
+            elif split[0] in self._sequences:
+                frames.setdefault(split[0], set()).add(split[1])
+        if others:
+            self._others.remove(others)
+        for key, removed in frames.items():
+            self._sequences[key].remove(removed)
+        self._drop_empty()
+
+    def remove_matching(self, matcher):
+        """Remove entries that a PatternSet matches. Return True if any were.
+
+        If the patterns ignore digits, one frame is matched for each sequence.
+        """
+        self._cursor = None
+        removed = self._others.remove_matching(matcher)
+        for sequence in self._sequences.values():
+            sequence.deduplicate()
+            if not sequence.ranges:
+                continue
+            if matcher.ignores_digits:
+                if matcher.match(sequence.path(sequence.ranges[0][0])):
+                    sequence.ranges = []
+                    removed = True
+                continue
+            matches = [f for f in sequence.frames() if matcher.match(sequence.path(f))]
+            if matches:
+                sequence.remove(matches)
+                removed = True
+        self._drop_empty()
+        return removed
+
+    def _drop_empty(self):
+        empty = [
+            key
+            for key, sequence in self._sequences.items()
+            if not sequence.ranges and not sequence.pending
+        ]
+        for key in empty:
+            del self._sequences[key]
+
+    def deduplicate(self):
+        self._others.deduplicate()
+        for sequence in self._sequences.values():
+            sequence.deduplicate()
+
+    def remove_contained(self):
+        """Remove entries that lie below another entry. Call after deduplicate().
+
+        A sequence is checked once, by its first frame, since all its frames
+        have the same ancestors.
+        """
+        others = {p for p in self._others if self.ancestor_of(p) is not None}
+        sequences = [
+            key
+            for key, sequence in self._sequences.items()
+            if self.ancestor_of(sequence.path(sequence.ranges[0][0])) is not None
+        ]
+        if others:
+            self._others.remove(others)
+        for key in sequences:
+            del self._sequences[key]
+        self._cursor = None
+
+    def under(self, path):
+        """Generate entries at or below the given path."""
+        for entry in self._others:
+            if _is_within(entry, path):
+                yield entry
+        for sequence in self._sequences.values():
+            sequence.deduplicate()
+            first = sequence.path(sequence.ranges[0][0])
+            # All frames are in the same directory, so either all are below
+            # the path or none are. Only the path itself can be one frame.
+            if first.depth > path.depth and _is_within(first, path):
+                for entry in sequence.paths():
+                    yield entry
+        split = _split_frame(path)
+        if split is not None and split[0] in self._sequences:
+            if split[1] in self._sequences[split[0]]:
+                yield path
+
+    def ancestor_of(self, path):
+        """Return the shallowest entry that contains the given path, or None."""
+        return _ancestor_by_lookup(self, path)
+
+    def __contains__(self, path):
+        split = _split_frame(path)
+        if split is None:
+            return path in self._others
+        sequence = self._sequences.get(split[0])
+        return sequence is not None and split[1] in sequence
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0:
+            raise IndexError("index out of range")
+        if self._cursor is None or self._cursor[0] >= index:
+            self._cursor = (-1, iter(self))
+        position, iterator = self._cursor
+        try:
+            result = next(islice(iterator, index - position - 1, None))
+        except StopIteration:
+            self._cursor = None
+            raise IndexError("index out of range")
+        self._cursor = (index, iterator)
+        return result
+
+    def __iter__(self):
+        self.deduplicate()
+        streams = [iter(self._others)]
+        streams.extend(sequence.paths() for sequence in self._sequences.values())
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=Path.fslash)
+
+    def __len__(self):
+        return len(self._others) + sum(len(s) for s in self._sequences.values())
+
+    @property
+    def sequences(self):
+        """The number of numbered file groups held."""
+        return len(self._sequences)
+
+
+def _encode(path):
+    """The key of a Path in a PackedStorage: its forward slash form as UTF-8.
+
+    UTF-8 keeps the order of code points, so keys sort as fslash() does.
+    """
+    return path.fslash().encode("utf-8", "surrogatepass")
+
+
+def _decode(key):
+    """Make the Path of a key, without parsing dots or expanding anything."""
+    text = str(key, "utf-8", "surrogatepass")
+    result = Path._from_parts(*_parse(text, normalize=False))
+    result._key = text
+    return result
+
+
+def _decode_all(keys):
+    """Generate the Paths of keys, parsing a directory once for a run of its files.
+
+    Sorted keys come in runs with the same directory.
+    """
+    directory = parent = None
+    for key in keys:
+        text = str(key, "utf-8", "surrogatepass")
+        head, sep, tail = text.rpartition("/")
+        if not sep or not tail or tail == "." or tail == "..":
+            result = Path._from_parts(*_parse(text, normalize=False))
+        else:
+            if head != directory:
+                directory = head
+                parent = _parse(head + "/", normalize=False)
+            drive_prefix, absolute, components = parent
+            result = Path._from_parts(drive_prefix, absolute, components + (tail,))
+        result._key = text
+        yield result
+
+
+def _keys(buffer, offsets):
+    """Generate the keys packed in a buffer as bytes."""
+    view = memoryview(buffer)
+    start = 0
+    for end in islice(offsets, 1, None):
+        yield view[start:end].tobytes()
+        start = end
+
+
+def _pack(keys):
+    """Pack an iterable of keys into a buffer and an array of offsets.
+
+    offsets[i] is where the ith key starts, and the last offset is the end
+    of the buffer.
+    """
+    buffer = bytearray()
+    offsets = array("Q", [0])
+    for key in keys:
+        buffer += key
+        offsets.append(len(buffer))
+    return buffer, offsets
+
+
+def _unique(keys):
+    """Drop repeats from sorted keys."""
+    last = None
+    for key in keys:
+        if key != last:
+            yield key
+            last = key
+
+
+def _containment_key(key):
+    """A key that sorts a path directly before the paths it contains.
+
+    Separators become NUL, which sorts before any other character, as with
+    Path._component_key(). A leading byte keeps UNC paths apart from posix
+    ones, since //server is not below /.
+    """
+    if key.startswith(b"//"):
+        return b"\x01" + key[2:].replace(b"/", b"\x00")
+    return b"\x00" + key.replace(b"/", b"\x00")
+
+
+def _under_sorted_keys(storage, path, bisect, between):
+    """Generate the entries of storage at or below path, from its sorted keys.
+
+    Keys of the paths below are a block starting with the path's key and a
+    slash, found by binary search. bisect(key) is the index of the first key
+    not less than key, and between(start, stop) generates keys by index.
+    """
+    key = _encode(path)
+    prefix = key if key.endswith(b"/") else key + b"/"
+    # A root's key is its own prefix, so it's found in the block.
+    if prefix != key and path in storage:
+        yield path
+    keys = between(bisect(prefix), bisect(prefix[:-1] + b"0"))
+    for entry in _decode_all(keys):
+        if _is_within(entry, path):
+            yield entry
+
+
+class PackedStorage(object):
+    """Entries packed into one buffer of UTF-8 keys, with an array of offsets.
+
+    After deduplicate() the keys are sorted and unique. Keys of paths added
+    since then are packed into a second buffer. Paths are made from keys as
+    they are asked for, so they are new objects that don't carry stats.
+    Sorting makes a bytes object for each new key while it runs, so fill a
+    large list in batches.
+    """
+
+    def __init__(self, paths=None):
+        self._buffer = bytearray()
+        self._offsets = array("Q", [0])
+        self._pending = bytearray()
+        self._pending_offsets = array("Q", [0])
+        if paths:
+            self.extend(paths)
+
+    @classmethod
+    def from_sorted(cls, paths):
+        """Make storage from paths that are already sorted and unique."""
+        return cls.from_keys(_encode(p) for p in paths)
+
+    @classmethod
+    def from_keys(cls, keys):
+        """Make storage from keys that are already sorted and unique."""
+        result = cls()
+        result._buffer, result._offsets = _pack(keys)
+        return result
+
+    def add(self, path):
+        self._pending += _encode(path)
+        self._pending_offsets.append(len(self._pending))
+
+    def extend(self, paths):
+        pending = self._pending
+        append = self._pending_offsets.append
+        for path in paths:
+            pending += _encode(path)
+            append(len(pending))
+
+    def keys(self):
+        """Generate the keys of the entries. Call after deduplicate()."""
+        return _keys(self._buffer, self._offsets)
+
+    def _filter(self, keep):
+        """Keep the entries whose keys keep() is True for. Return True if any went."""
+        size = len(self)
+        self._buffer, self._offsets = _pack(
+            filter(keep, _keys(self._buffer, self._offsets))
+        )
+        self._pending, self._pending_offsets = _pack(
+            filter(keep, _keys(self._pending, self._pending_offsets))
+        )
+        return len(self) < size
+
+    def remove(self, removals):
+        """Remove all entries found in removals, which should be a set of Paths."""
+        keys = {_encode(p) for p in removals}
+        if keys:
+            self._filter(lambda key: key not in keys)
+
+    def deduplicate(self):
+        if len(self._pending_offsets) == 1:
+            return
+        new = sorted(set(_keys(self._pending, self._pending_offsets)))
+        if len(self._offsets) > 1:
+            new = _unique(heapq.merge(_keys(self._buffer, self._offsets), new))
+        self._buffer, self._offsets = _pack(new)
+        self._pending = bytearray()
+        self._pending_offsets = array("Q", [0])
+
+    def remove_matching(self, matcher):
+        """Remove entries that a PatternSet matches. Return True if any were."""
+        return self._filter(
+            lambda key: not matcher.match_fslash(str(key, "utf-8", "surrogatepass"))
+        )
+
+    def remove_contained(self):
+        """Remove entries that lie below another entry. Call after deduplicate().
+
+        As in ListStorage.remove_contained(), but on containment keys, so no
+        Paths are made.
+        """
+        keys = [_containment_key(k) for k in _keys(self._buffer, self._offsets)]
+        removed = set()
+        container = None
+        for i in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[i]
+            if (
+                container is not None
+                and key.startswith(container)
+                and (container.endswith(b"\x00") or key[len(container)] == 0)
+            ):
+                removed.add(i)
+                continue
+            container = key
+        if removed:
+            self._buffer, self._offsets = _pack(
+                key
+                for i, key in enumerate(_keys(self._buffer, self._offsets))
+                if i not in removed
+            )
+
+    def _key(self, index):
+        offsets = self._offsets
+        return bytes(self._buffer[offsets[index] : offsets[index + 1]])
+
+    def _bisect(self, key):
+        """Return the index of the first entry with a key not less than key."""
+        low, high = 0, len(self._offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _between(self, start, stop):
+        return (self._key(i) for i in range(start, stop))
+
+    def under(self, path):
+        """Generate entries at or below the given path."""
+        self.deduplicate()
+        return _under_sorted_keys(self, path, self._bisect, self._between)
+
+    def ancestor_of(self, path):
+        """Return the shallowest entry that contains the given path, or None."""
+        return _ancestor_by_lookup(self, path)
+
+    def __contains__(self, path):
+        self.deduplicate()
+        key = _encode(path)
+        index = self._bisect(key)
+        return index < len(self._offsets) - 1 and self._key(index) == key
+
+    def __getitem__(self, index):
+        self.deduplicate()
+        count = len(self._offsets) - 1
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("index out of range")
+        return _decode(self._key(index))
+
+    def __iter__(self):
+        keys = _keys(self._buffer, self._offsets)
+        if len(self._pending_offsets) > 1:
+            # A copy, so paths can still be added while we iterate.
+            pending = _keys(bytes(self._pending), self._pending_offsets[:])
+            keys = chain(keys, pending)
+        return _decode_all(keys)
+
+    def __len__(self):
+        return len(self._offsets) + len(self._pending_offsets) - 2
+
+    @property
+    def nbytes(self):
+        """The number of bytes in the buffers and offset arrays."""
+        offsets = len(self._offsets) + len(self._pending_offsets)
+        return len(self._buffer) + len(self._pending) + offsets * self._offsets.itemsize
+
+
+STORAGE_ENGINES = {
+    "list": ListStorage,
+    "trie": TrieStorage,
+    "sequence": SequenceStorage,
+    "packed": PackedStorage,
+}
@@ -0,0 +1,134 @@
+from __future__ import unicode_literals
+
+"""
+A prefix tree of paths.
+
+Each node is a dict of child nodes keyed by path component. A node that
+corresponds to a stored path holds the Path under the None key. Keys start
+with a root token (see Path._component_key) so that relative, posix, UNC and
+drive letter paths live in separate branches.
+
+Membership, insertion and deletion cost O(depth), whatever the number of
+stored paths.
+"""
+
+# Components are never None, so None can mark the node of a stored path.
+_ENTRY = None
+
+
+class PathTrie(object):
+    def __init__(self, paths=None):
+        """Initialize, optionally with an iterable of Paths."""
+        self._root = {}
+        self._size = 0
+        for path in paths or []:
+            self.add(path)
+
+    def _find(self, key):
+        """Return the node for a component key or None."""
+        node = self._root
+        for component in key:
+            node = node.get(component)
+            if node is None:
+                return None
+        return node
+
+    def add(self, path):
+        """Add a Path. Return False if it was already there."""
+        node = self._root
+        for component in path._component_key():
+            child = node.get(component)
+            if child is None:
+                child = node[component] = {}
+            node = child
+        if _ENTRY in node:
+            return False
+        node[_ENTRY] = path
+        self._size += 1
+        return True
+
+    def discard(self, path):
+        """Remove a Path if present and prune empty nodes.
+
+        Return False if it was not there.
+        """
+        node = self._root
+        trail = []
+        for component in path._component_key():
+            child = node.get(component)
+            if child is None:
+                return False
+            trail.append((node, component))
+            node = child
+        if _ENTRY not in node:
+            return False
+        del node[_ENTRY]
+        self._size -= 1
+        for parent, component in reversed(trail):
+            if node:
+                break
+            del parent[component]
+            node = parent
+        return True
+
+    def under(self, path):
+        """Generate stored paths at or below the given path."""
+        node = self._find(path._component_key())
+        if node is None:
+            return iter([])
+        return _walk(node)
+
+    def ancestor_of(self, path):
+        """Return the shallowest stored path that contains the given path.
+
+        The path itself doesn't count as its own ancestor. Return None if no
+        ancestor is stored.
+        """
+        node = self._root
+        key = path._component_key()
+        for component in key[:-1]:
+            node = node.get(component)
+            if node is None:
+                return None
+            if _ENTRY in node:
+                return node[_ENTRY]
+        return None
+
+    def prune_contained(self):
+        """Remove every stored path that has a stored ancestor.
+
+        Return the number of paths removed.
+        """
+        removed = 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if _ENTRY in node:
+                for component in [c for c in node if c is not _ENTRY]:
+                    removed += sum(1 for _ in _walk(node.pop(component)))
+                continue
+            stack.extend(child for c, child in node.items() if c is not _ENTRY)
+        self._size -= removed
+        return removed
+
+    def __contains__(self, path):
+        node = self._find(path._component_key())
+        return node is not None and _ENTRY in node
+
+    def __iter__(self):
+        return _walk(self._root)
+
+    def __len__(self):
+        return self._size
+
+
+def _walk(node):
+    """Generate all stored paths at or below a node, depth first."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        for component, child in node.items():
+            if component is _ENTRY:
+                yield child
+            else:
+                stack.append(child)
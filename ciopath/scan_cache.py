@@ -0,0 +1,208 @@
+from __future__ import unicode_literals
+
+"""
+A FileSystemCache that is kept in a sqlite file between runs.
+
+Resubmitting the same project walks and stats the same asset tree again.
+With a ScanCache, the listing of each directory and the stat results of the
+files found are saved, and on the next run:
+
+* Every directory is still stat'ed, since a change below a directory doesn't
+  change its own mtime. If its mtime is unchanged, the saved listing is used
+  instead of listing it again.
+* Saved stat results of the entries of a directory are used once that
+  directory has been found unchanged in this run. Until then they are not
+  trusted, and a stat call is made as usual.
+
+A file rewritten in place, without entries of its directory being added,
+removed or renamed, doesn't change the directory's mtime. Its saved size and
+mtime would then be out of date. Tools that write to a temporary file and
+rename it, as most DCCs do, are fine.
+
+    with ScanCache("~/.conductor/scan_cache.db") as cache:
+        plist.real_files(cache=cache)
+
+The file is read when the cache is made and written by save(), or on
+leaving the with block without an exception.
+"""
+
+import os
+import sqlite3
+
+from ciopath.fs_cache import FileSystemCache, listed_names, parent_key
+
+# Bump this when the tables or what they hold change. Files of another version are ignored.
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE listings (
+    path TEXT PRIMARY KEY, mtime REAL NOT NULL, entries TEXT NOT NULL
+);
+CREATE TABLE stats (
+    path TEXT PRIMARY KEY, mode INTEGER NOT NULL, ino INTEGER NOT NULL,
+    size INTEGER NOT NULL, mtime REAL NOT NULL
+);
+"""
+
+# Inodes from here up don't fit in a sqlite integer.
+_MAX_INODE = 1 << 63
+
+# Listing entries are stored as one string. Each entry is a flag character
+# followed by the name, and entries are separated by NUL, which can't be in a
+# file name.
+_FLAGS = "0123"
+
+
+def _encode_listing(listing):
+    return "\0".join(
+        _FLAGS[is_dir + 2 * is_symlink] + name for name, is_dir, is_symlink in listing
+    )
+
+
+def _decode_listing(text):
+    if not text:
+        return []
+    result = []
+    for item in text.split("\0"):
+        flags = _FLAGS.index(item[0])
+        result.append((item[1:], bool(flags & 1), bool(flags & 2)))
+    return result
+
+
+def _stat_result(mode, ino, size, mtime):
+    times = (int(mtime), int(mtime), int(mtime))
+    return os.stat_result(
+        (mode, ino, 0, 0, 0, 0, size) + times,
+        {"st_atime": mtime, "st_mtime": mtime, "st_ctime": mtime},
+    )
+
+
+class ScanCache(FileSystemCache):
+    def __init__(self, filename, **kwargs):
+        """Initialize from a sqlite file, which need not exist yet.
+
+        Other keyword arguments are as for FileSystemCache, but the limits
+        don't apply: everything held is written by save(), so nothing is
+        evicted. A listing loaded from the file must still be there when the
+        walk reaches its directory.
+        """
+        super(ScanCache, self).__init__(**kwargs)
+        self.filename = os.path.expanduser(filename)
+        # Saved stat results, not trusted until their directory is validated.
+        self._saved_stats = {}
+        # Directories listed or found unchanged in this run.
+        self._validated = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.filename):
+            return
+        connection = sqlite3.connect(self.filename)
+        try:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                return
+            rows = connection.execute("SELECT path, mtime, entries FROM listings")
+            for path, mtime, entries in rows:
+                listing = _decode_listing(entries)
+                self._store(
+                    self._listings,
+                    self.max_listings,
+                    path,
+                    (mtime, listing, listed_names(listing)),
+                )
+            rows = connection.execute("SELECT path, mode, ino, size, mtime FROM stats")
+            for path, mode, ino, size, mtime in rows:
+                self._saved_stats[path] = _stat_result(mode, ino, size, mtime)
+        except sqlite3.DatabaseError:
+            # Not a cache file we can read. It's replaced on save.
+            self._listings.clear()
+            self._saved_stats.clear()
+        finally:
+            connection.close()
+
+    def save(self):
+        """Write the listings and stat results held to the file."""
+        with self._lock:
+            listings = [
+                (path, mtime, _encode_listing(listing))
+                for path, (mtime, listing, _) in self._listings.items()
+            ]
+            stats = dict(self._saved_stats)
+            stats.update(self._stats)
+        # Windows file IDs can be too wide. Save those as 0, which os.stat
+        # also gives for no inode.
+        stat_rows = [
+            (
+                path,
+                s.st_mode,
+                s.st_ino if s.st_ino < _MAX_INODE else 0,
+                s.st_size,
+                s.st_mtime,
+            )
+            for path, s in stats.items()
+            if s is not None
+        ]
+        directory = os.path.dirname(self.filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # Write a new file and swap it in, so an interrupted save or another
+        # process reading the cache never sees half a file.
+        temp_filename = "{}.{}.tmp".format(self.filename, os.getpid())
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        connection = sqlite3.connect(temp_filename)
+        try:
+            with connection:
+                connection.executescript(_SCHEMA)
+                connection.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+                connection.executemany(
+                    "INSERT INTO listings VALUES (?, ?, ?)", listings
+                )
+                connection.executemany(
+                    "INSERT INTO stats VALUES (?, ?, ?, ?, ?)", stat_rows
+                )
+        finally:
+            connection.close()
+        os.replace(temp_filename, self.filename)
+
+    def _store(self, table, limit, key, value):
+        table[key] = value
+        table.move_to_end(key)
+
+    def _cached_stat(self, path):
+        found, result = super(ScanCache, self)._cached_stat(path)
+        if found:
+            return found, result
+        if path in self._saved_stats and parent_key(path) in self._validated:
+            result = self._saved_stats.pop(path)
+            self._store(self._stats, self.max_stats, path, result)
+            return True, result
+        return False, None
+
+    def _cached_listing(self, path):
+        if path not in self._validated:
+            return None
+        return super(ScanCache, self)._cached_listing(path)
+
+    def _listed(self, path):
+        self._validated.add(path)
+
+    def _forget(self, path):
+        super(ScanCache, self)._forget(path)
+        self._saved_stats.pop(path, None)
+
+    def clear(self):
+        """Forget everything, including what was loaded. The file is unchanged."""
+        with self._lock:
+            self._saved_stats.clear()
+            self._validated.clear()
+        super(ScanCache, self).clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.save()
+        return False
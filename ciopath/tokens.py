@@ -0,0 +1,146 @@
+from __future__ import unicode_literals
+
+"""
+Expansion of frame and UDIM tokens in paths.
+
+Renders and textures are often referenced by a path with a token in place of
+the frame number or UV tile:
+
+* frame.####.exr: one # per digit, so #### is frame 1001 as 1001 and frame 1
+  as 0001.
+* frame.%04d.exr: printf style, with an optional zero padded width.
+* tex.<UDIM>.tx: the 4 digit UDIM tile number, 1001 and up. The token is not
+  case sensitive.
+
+expand() makes the concrete Paths for a frame range and a set of tiles
+directly, without listing any directories. Each component with tokens is
+turned into a format string once, and the new paths are built from the
+components of the original, so nothing is parsed or expanded again.
+
+verify() checks that generated paths exist with one listing per parent
+directory, instead of a stat call for each frame.
+
+    paths = expand(Path("/renders/beauty.####.exr"), frames=range(1001, 1101))
+    found = verify(paths)
+"""
+
+import os
+import re
+from itertools import product
+
+from ciopath.walk import list_directory
+
+FRAME_TOKEN_REGEX = re.compile(r"#+|%(0\d+)?d")
+UDIM_TOKEN_REGEX = re.compile(r"<udim>", re.IGNORECASE)
+
+
+def has_tokens(text):
+    """True if a string has a frame or UDIM token in it."""
+    return bool(FRAME_TOKEN_REGEX.search(text) or UDIM_TOKEN_REGEX.search(text))
+
+
+def _escape(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _frame_field(match):
+    token = match.group(0)
+    if token.startswith("#"):
+        return "{{0:0{}d}}".format(len(token))
+    return "{{0:{}d}}".format(match.group(1) or "")
+
+
+def _template(component, frames, tiles):
+    """Return a format string for a component and the kinds of field in it.
+
+    {0} is the frame and {1} the tile. Frame tokens are only replaced if
+    frames is set, and UDIM tokens if tiles is set. The kinds are a pair of
+    flags, for frame fields and tile fields. The format string is None if
+    there are no tokens to replace.
+    """
+    frame_fields = []
+    tile_fields = []
+    if frames:
+        frame_fields = [
+            (m.start(), m.end(), _frame_field(m))
+            for m in FRAME_TOKEN_REGEX.finditer(component)
+        ]
+    if tiles:
+        tile_fields = [
+            (m.start(), m.end(), "{1:04d}")
+            for m in UDIM_TOKEN_REGEX.finditer(component)
+        ]
+    fields = frame_fields + tile_fields
+    kinds = (bool(frame_fields), bool(tile_fields))
+    if not fields:
+        return None, kinds
+    pieces = []
+    position = 0
+    for start, end, field in sorted(fields):
+        pieces.append(_escape(component[position:start]))
+        pieces.append(field)
+        position = end
+    pieces.append(_escape(component[position:]))
+    return "".join(pieces), kinds
+
+
+def expand(path, frames=None, tiles=None):
+    """Return a list of the Paths made by replacing the tokens in a Path.
+
+    Frame tokens are replaced by each frame in frames, and UDIM tokens by
+    each tile in tiles. With both kinds of token, every frame is combined
+    with every tile. A kind of token with no values given is left as it is,
+    so a path with no tokens to replace comes back alone.
+    """
+    components = path._components
+    templates = []
+    has_frames = has_tiles = False
+    for component in components:
+        template, (frame_fields, tile_fields) = _template(
+            component, frames is not None, tiles is not None
+        )
+        templates.append(template)
+        has_frames = has_frames or frame_fields
+        has_tiles = has_tiles or tile_fields
+    if not any(templates):
+        return [path]
+    combinations = product(
+        frames if has_frames else [None], tiles if has_tiles else [None]
+    )
+    result = []
+    for frame, tile in combinations:
+        replaced = tuple(
+            template.format(frame, tile) if template else component
+            for component, template in zip(components, templates)
+        )
+        result.append(path._from_parts(path._drive_prefix, path._absolute, replaced))
+    return result
+
+
+def _parent(path):
+    """Return the forward slash parent directory of a Path."""
+    components = path._components[:-1]
+    if not components and not path.absolute:
+        return ""
+    return path._from_parts(path._drive_prefix, path._absolute, components).fslash()
+
+
+def verify(paths, listdir=list_directory):
+    """Return the paths that exist, listing each parent directory once.
+
+    listdir lists a directory in the format of ciopath.walk.list_directory.
+    Pass the listdir method of a FileSystemCache to share listings. Names are
+    compared as the filesystem would, so without case on Windows.
+    """
+    paths = list(paths)
+    listings = {}
+    result = []
+    for path in paths:
+        parent = _parent(path)
+        names = listings.get(parent)
+        if names is None:
+            names = {os.path.normcase(entry[0]) for entry in listdir(parent)}
+            listings[parent] = names
+        if os.path.normcase(path.tail) in names:
+            result.append(path)
+    return result
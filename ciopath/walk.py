@@ -0,0 +1,121 @@
+from __future__ import unicode_literals
+
+"""
+Directory expansion for PathList.real_files.
+
+We list directories with os.scandir, which tells us whether each entry is a
+directory without a stat call on most platforms. Paths of the files found are
+built from the components of their parent Path, so nothing is re-parsed or
+expanded.
+
+The files found are the same as the files os.walk would report: everything
+that is not a directory, including broken symlinks. Symlinks to directories
+are not followed.
+
+walk_files_parallel lists directories on a pool of threads, which helps
+when each listing waits on network storage. It finds the same files in a
+different order, which doesn't matter to a PathList since it sorts them.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from sys import intern
+
+
+def _child(directory, name):
+    """Make the Path of an entry in a directory Path."""
+    if "\\" in name:
+        # Backslashes are separators for Path, so this makes several components.
+        names = tuple(intern(n) for n in name.split("\\") if n)
+    else:
+        names = (intern(name),)
+    return directory._from_parts(
+        directory._drive_prefix, directory._absolute, directory._components + names
+    )
+
+
+def list_directory(path):
+    """List a directory path string with os.scandir.
+
+    Return a list of (name, is_dir, is_symlink) tuples, or an empty list if
+    it can't be listed. is_dir follows symlinks, and is_symlink is True for a
+    symlink to anything, or to nothing. This is the listing format
+    used throughout ciopath, so a cache can stand in for it. See
+    ciopath.fs_cache.
+    """
+    result = []
+    try:
+        entries = os.scandir(path or ".")
+    except OSError:
+        return result
+    with entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            result.append((entry.name, is_dir, is_symlink))
+    return result
+
+
+def scan(directory, listdir=list_directory):
+    """List a directory Path. Return a tuple of lists: (files, subdirectories).
+
+    Subdirectories are those we should descend into. If the directory can't
+    be listed, both lists are empty.
+    """
+    if directory._components == (".",):
+        # Children of "." are "a.txt", not "./a.txt", as Path("./a.txt") is.
+        directory = directory._from_parts(
+            directory._drive_prefix, directory._absolute, ()
+        )
+    files = []
+    subdirectories = []
+    for name, is_dir, is_symlink in listdir(directory.fslash()):
+        if not is_dir:
+            files.append(_child(directory, name))
+        elif not is_symlink:
+            subdirectories.append(_child(directory, name))
+    return files, subdirectories
+
+
+def walk_files(directory, listdir=list_directory):
+    """Generate the Paths of all files below a directory Path."""
+    stack = [directory]
+    while stack:
+        files, subdirectories = scan(stack.pop(), listdir)
+        for path in files:
+            yield path
+        stack.extend(reversed(subdirectories))
+
+
+def walk_files_parallel(
+    directories, max_workers, max_pending=None, listdir=list_directory
+):
+    """Generate the Paths of all files below several directory Paths.
+
+    Directories are listed on a pool of max_workers threads. As soon as a
+    listing comes back, its subdirectories are queued, so any idle thread
+    picks up work from any tree. At most max_pending listings, by default
+    four per thread, are submitted at a time. The rest wait in a stack, so
+    wide trees don't flood the pool.
+
+    listdir is the function that lists a directory, as for walk_files.
+    """
+    max_pending = max_pending or max_workers * 4
+    todo = list(reversed(directories))
+    running = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while todo or running:
+            while todo and len(running) < max_pending:
+                running.add(executor.submit(scan, todo.pop(), listdir))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirectories = future.result()
+                for path in files:
+                    yield path
+                todo.extend(reversed(subdirectories))
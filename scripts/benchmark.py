@@ -0,0 +1,671 @@
+"""Micro benchmarks for ciopath.
+
+Run from the root of the repo, for example:
+
+python scripts/benchmark.py dedup --count 2000000
+
+Each scenario prints the timings it measured. Numbers are only comparable
+between runs on the same machine.
+"""
+import argparse
+import asyncio
+import fnmatch
+import gc
+import hashlib
+import glob
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ciopath.fs_cache import FileSystemCache  # noqa: E402
+from ciopath.gpath import Path  # noqa: E402
+from ciopath.gpath_list import PathList  # noqa: E402
+from ciopath.hashing import HashCache  # noqa: E402
+from ciopath.path_mapper import PathMapper  # noqa: E402
+from ciopath.scan_cache import ScanCache  # noqa: E402
+
+
+def synthetic_paths(count, duplicates=0.1, seed=1):
+    """Return a shuffled list of asset-like path strings.
+
+    A fraction of the list, given by duplicates, is made of repeated entries.
+    """
+    unique = int(count * (1 - duplicates))
+    result = []
+    for i in range(unique):
+        result.append(
+            "/proj/seq{:02d}/shot{:03d}/tex/char_{:03d}/diffuse.{:04d}.exr".format(
+                i % 7, (i // 7) % 500, (i // 3500) % 1000, i % 10000
+            )
+        )
+    rng = random.Random(seed)
+    result += [rng.choice(result) for _ in range(count - unique)]
+    rng.shuffle(result)
+    return result
+
+
+def scraped_paths(count, files_per_dir=100):
+    """Return path strings grouped in directories, like a scraper would find them.
+
+    Every tenth path starts with $PROJ instead of /proj.
+    """
+    result = []
+    for i in range(count):
+        d = i // files_per_dir
+        result.append(
+            "{}/seq{:02d}/shot{:03d}/tex/char_{:03d}/diffuse.{:04d}.exr".format(
+                "$PROJ" if i % 10 == 0 else "/proj",
+                d % 7,
+                (d // 7) % 500,
+                d // 3500,
+                i % files_per_dir,
+            )
+        )
+    return result
+
+
+def timed(label, func, *args):
+    gc.collect()
+    start = time.time()
+    result = func(*args)
+    print("{:<40} {:>10.3f}s".format(label, time.time() - start))
+    return result
+
+
+def bench_dedup(args):
+    """Time deduplication of a large PathList of Path objects."""
+    strings = timed("generate strings", synthetic_paths, args.count)
+    plist = timed("PathList(*strings)", PathList, *strings)
+    timed("first len() (dedup)", len, plist)
+    plist.add(strings[0])
+    timed("len() after one add", len, plist)
+
+
+def bench_mapping(args):
+    """Map Windows paths to render node mounts with 2000 prefix rules.
+
+    Compares a PathMapper with replacing the first matching prefix of each
+    fslash string and parsing the result, which is how callers did it.
+    The string version only runs on the first 10000 paths.
+    """
+    rules = {
+        "P:/proj{:04d}".format(i): "/mnt/proj{:04d}".format(i) for i in range(2000)
+    }
+    rules["//fileserver/share"] = "/mnt/share"
+    strings = [
+        "P:/proj{:04d}/seq{:02d}/shot{:03d}/tex/diffuse.{:04d}.exr".format(
+            i % 2000, (i // 2000) % 7, (i // 14000) % 100, i % 1000
+        )
+        for i in range(args.count)
+    ]
+    plist = PathList(*strings)
+    len(plist)
+    entries = list(plist)
+    sample = entries[:: max(1, len(entries) // 10000)][:10000]
+    del entries
+    prefixes = sorted(rules, key=len, reverse=True)
+
+    def replace_strings():
+        result = []
+        for path in sample:
+            text = path.fslash()
+            for prefix in prefixes:
+                if text.startswith(prefix + "/"):
+                    text = rules[prefix] + text[len(prefix) :]
+                    break
+            result.append(Path(text))
+        return result
+
+    timed("string replace x 10000", replace_strings)
+    mapper = timed("PathMapper(rules)", PathMapper, rules)
+    timed("PathMapper.map x 10000", lambda: [mapper.map(p) for p in sample])
+    timed("PathList.remap x {}".format(len(plist)), plist.remap, mapper)
+    print("{:<40} {:>10}".format("example", list(plist)[0].fslash()))
+
+
+def bench_manifest(args):
+    """Write a file list and read it back: JSON against a binary manifest.
+
+    After loading, up to 10000 membership tests are made, as an upload daemon
+    checking files against the job would.
+    """
+    strings = synthetic_paths(args.count, duplicates=0)
+    probes = random.Random(2).sample(strings, min(10000, len(strings)))
+    plist = PathList(storage="packed")
+    plist.add_many(strings)
+    len(plist)
+    root = tempfile.mkdtemp()
+    try:
+        json_file = os.path.join(root, "files.json")
+        manifest_file = os.path.join(root, "files.manifest")
+
+        def save_json():
+            with open(json_file, "w") as fh:
+                json.dump([p.fslash() for p in plist], fh)
+
+        def load_json():
+            with open(json_file) as fh:
+                result = PathList()
+                result.add_many(json.load(fh), no_expand=True)
+                len(result)
+                return result
+
+        def probe(loaded):
+            return sum(1 for p in probes if p in loaded)
+
+        timed("json save", save_json)
+        loaded = timed("json load", load_json)
+        timed("json contains", probe, loaded)
+        del loaded
+        timed("manifest save", plist.save, manifest_file)
+        loaded = timed("manifest load", PathList.load, manifest_file)
+        timed("manifest contains", probe, loaded)
+        timed("manifest iterate", lambda: sum(1 for _ in loaded))
+        for label, filename in [("json", json_file), ("manifest", manifest_file)]:
+            size = os.path.getsize(filename) / 1e6
+            print("{:<40} {:>10.1f} MB".format(label + " size", size))
+        del loaded
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_memory(args):
+    """Measure bytes per path held in a PathList with tracemalloc.
+
+    The input strings are allocated before tracing starts, so only the
+    storage engine is counted. We measure after deduplication, which is the
+    state a PathList is usually held in. Entries of "packed" storage are
+    added in batches, as its docstring suggests.
+    """
+    strings = synthetic_paths(args.count, duplicates=0)
+    for storage in ["list", "packed"]:
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        plist = PathList(storage=storage)
+        for i in range(0, len(strings), 100000):
+            plist.add_many(strings[i : i + 100000])
+            len(plist)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        held = current - start
+        print("storage={}".format(storage))
+        print("{:<40} {:>10}".format("paths", len(plist)))
+        print("{:<40} {:>10.1f} MB".format("held", held / 1e6))
+        print("{:<40} {:>10.1f} MB".format("peak", (peak - start) / 1e6))
+        print("{:<40} {:>10.1f}".format("bytes per path", held / float(args.count)))
+        del plist
+
+
+def bench_containment(args):
+    """Compare plain deduplication with remove_contained deduplication.
+
+    About one shot in ten is also listed as a directory, so its files are
+    contained.
+    """
+    strings = synthetic_paths(args.count)
+    strings += [
+        "/proj/seq{:02d}/shot{:03d}/tex".format(i % 7, i) for i in range(0, 500, 10)
+    ]
+    for storage in ["list", "trie"]:
+        for remove_contained in [False, True]:
+            plist = PathList(
+                *strings, storage=storage, remove_contained=remove_contained
+            )
+            label = "len() storage={} remove_contained={}".format(
+                storage, remove_contained
+            )
+            timed(label, len, plist)
+            print("{:<40} {:>10}".format("entries", len(plist)))
+            del plist
+
+
+def bench_interleaved(args):
+    """Time a scraper-like loop that adds a few paths and then asks for len()."""
+    strings = synthetic_paths(args.count)
+    plist = PathList(*strings)
+    timed("first len() (dedup)", len, plist)
+
+    def add_and_len(rounds, batch):
+        for i in range(rounds):
+            plist.add(
+                *["/proj/new/{:04d}/file.{:04d}.exr".format(i, j) for j in range(batch)]
+            )
+            len(plist)
+
+    timed("100 x (add 1 + len())", add_and_len, 100, 1)
+    timed("10 x (add 1000 + len())", add_and_len, 10, 1000)
+
+
+def bench_remove(args):
+    """Remove a fifth of the entries, as remove_missing or remove_pattern would."""
+    strings = synthetic_paths(args.count, duplicates=0)
+    removals = strings[: args.count // 5]
+    plist = PathList(*strings)
+    len(plist)
+    timed("remove({} of {})".format(len(removals), args.count), plist.remove, *removals)
+    timed("len() after remove", len, plist)
+
+
+def bench_ingest(args):
+    """Time turning scraped strings into Paths in a PathList."""
+    strings = scraped_paths(args.count)
+    os.environ["PROJ"] = "/proj"
+
+    def one_at_a_time():
+        plist = PathList()
+        for s in strings:
+            plist.add(s)
+        return plist
+
+    timed("PathList.add() one at a time", one_at_a_time)
+    timed("PathList(*strings)", PathList, *strings)
+    timed("PathList().add_many(strings)", PathList().add_many, strings)
+
+
+def make_tree(root, count, files_per_dir=100, dirs_per_dir=10):
+    """Make a tree of count empty files under root, a few levels deep."""
+    dirs = count // files_per_dir
+    for d in range(dirs):
+        parts = []
+        n = d
+        while True:
+            parts.append("d{:02d}".format(n % dirs_per_dir))
+            n //= dirs_per_dir
+            if not n:
+                break
+        directory = os.path.join(root, *reversed(parts))
+        os.makedirs(directory)
+        for f in range(files_per_dir):
+            open(os.path.join(directory, "file.{:04d}.exr".format(f)), "w").close()
+
+
+def bench_walk(args):
+    """Time real_files on a synthetic tree of empty files in a temp directory.
+
+    Each top level directory of the tree is an entry, as if a submission
+    listed several asset directories. Use --latency to add a delay to every
+    directory listing, like a round trip to network storage.
+    """
+    if args.latency:
+        scandir = os.scandir
+
+        def slow_scandir(path):
+            time.sleep(args.latency / 1000.0)
+            return scandir(path)
+
+        os.scandir = slow_scandir
+    root = tempfile.mkdtemp()
+    try:
+        timed("make tree of {} files".format(args.count), make_tree, root, args.count)
+        roots = sorted(os.path.join(root, name) for name in os.listdir(root))
+        plist = PathList(*roots)
+        timed("real_files()", plist.real_files)
+        print("{:<40} {:>10}".format("files", len(plist)))
+        for workers in [4, 16]:
+            parallel = PathList(*roots)
+            label = "real_files(max_workers={})".format(workers)
+            timed(label, parallel.real_files, workers)
+            assert list(parallel) == list(plist)
+        for concurrency in [16, 64]:
+            aio = PathList(*roots)
+            label = "areal_files(concurrency={})".format(concurrency)
+            timed(label, asyncio.run, aio.areal_files(concurrency))
+            assert list(aio) == list(plist)
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_glob(args):
+    """Glob one pattern per texture, all in a few directories.
+
+    Compares PathList.glob with calling glob.glob on each pattern, which is
+    how it used to work.
+    """
+    root = tempfile.mkdtemp()
+    try:
+        patterns = []
+        for d in range(5):
+            directory = os.path.join(root, "tex{}".format(d))
+            os.makedirs(directory)
+            for i in range(args.count // 50):
+                for udim in range(1001, 1011):
+                    name = "char_{:04d}_diffuse.{}.tx".format(i, udim)
+                    open(os.path.join(directory, name), "w").close()
+                pattern = "char_{:04d}_diffuse.*.tx".format(i)
+                patterns.append(os.path.join(directory, pattern))
+        print("{:<40} {:>10}".format("patterns", len(patterns)))
+
+        def glob_each():
+            return [g for pattern in patterns for g in glob.glob(pattern)]
+
+        expected = timed("glob.glob per pattern", glob_each)
+        plist = PathList(*patterns)
+        timed("PathList.glob()", plist.glob)
+        print("{:<40} {:>10}".format("files", len(plist)))
+        assert len(plist) == len(set(expected))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_tokens(args):
+    """Expand <UDIM> texture references, one per texture, in a few directories.
+
+    Compares globbing with * in place of the token, which is what callers
+    did before, with PathList.expand_tokens with and without verify.
+    """
+    root = tempfile.mkdtemp()
+    try:
+        references = []
+        for d in range(5):
+            directory = os.path.join(root, "tex{}".format(d))
+            os.makedirs(directory)
+            for i in range(args.count // 50):
+                for udim in range(1001, 1011):
+                    name = "char_{:04d}_diffuse.{}.tx".format(i, udim)
+                    open(os.path.join(directory, name), "w").close()
+                name = "char_{:04d}_diffuse.<UDIM>.tx".format(i)
+                references.append(os.path.join(directory, name))
+        print("{:<40} {:>10}".format("references", len(references)))
+        tiles = range(1001, 1011)
+
+        plist = PathList(*[r.replace("<UDIM>", "*") for r in references])
+        timed("PathList.glob() with *", plist.glob)
+        expected = list(plist)
+        plist = PathList(*references)
+        timed("expand_tokens()", plist.expand_tokens, None, tiles)
+        assert list(plist) == expected
+        plist = PathList(*references)
+        timed("expand_tokens(verify=True)", plist.expand_tokens, None, tiles, True)
+        assert list(plist) == expected
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_cache(args):
+    """Count filesystem calls of a glob, real_files, remove_missing round.
+
+    The round runs twice, with and without a shared FileSystemCache. The
+    second cached round only revalidates directory listings.
+    """
+    root = tempfile.mkdtemp()
+    calls = {"stat": 0, "scandir": 0}
+    os_stat, os_scandir = os.stat, os.scandir
+
+    def counted(name, func):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    try:
+        make_tree(root, args.count)
+        entries = [os.path.join(root, name, "*.exr") for name in os.listdir(root)]
+        entries += [os.path.join(root, name) for name in os.listdir(root)]
+        os.stat, os.scandir = counted("stat", os_stat), counted("scandir", os_scandir)
+        for cache in [None, FileSystemCache()]:
+            for round_number in [1, 2]:
+                calls.update(stat=0, scandir=0)
+                plist = PathList(*entries)
+
+                def one_round():
+                    plist.real_files(cache=cache)
+                    plist.remove_missing(cache=cache)
+
+                label = "cache={} round {}".format(cache is not None, round_number)
+                timed(label, one_round)
+                print("{:<40} {:>10}".format("os.stat calls", calls["stat"]))
+                print("{:<40} {:>10}".format("os.scandir calls", calls["scandir"]))
+    finally:
+        os.stat, os.scandir = os_stat, os_scandir
+        shutil.rmtree(root)
+
+
+def bench_patterns(args):
+    """Remove entries matching 30 exclusion patterns.
+
+    Compares remove_pattern with fnmatch on the forward and back slash form
+    of each entry, which is how it used to work.
+    """
+    strings = synthetic_paths(args.count, duplicates=0)
+    extensions = ["*.{}".format(e) for e in ["bak", "tmp", "swp", "log", "pyc"]]
+    suffixes = ["*_v{:03d}.exr".format(i) for i in range(5)]
+    others = ["*/seq{:02d}/shot{:03d}/*".format(i % 7, i * 37) for i in range(15)]
+    others += ["*/char_{:03d}/*.0??0.exr".format(i) for i in range(5)]
+    patterns = extensions + suffixes + others
+    plist = PathList(*strings)
+    len(plist)
+
+    def fnmatch_each():
+        return [
+            p
+            for p in plist
+            if any(
+                fnmatch.fnmatch(p.fslash(), pattern)
+                or fnmatch.fnmatch(p.bslash(), pattern)
+                for pattern in patterns
+            )
+        ]
+
+    expected = timed("fnmatch per entry and pattern", fnmatch_each)
+    label = "remove_pattern({} patterns)".format(len(patterns))
+    timed(label, plist.remove_pattern, *patterns)
+    print("{:<40} {:>10}".format("removed", args.count - len(plist)))
+    assert args.count - len(plist) == len(expected)
+
+
+def bench_stream(args):
+    """Compare real_files with iter_real_files on a synthetic tree.
+
+    Prints the time to the first file and the peak memory traced while
+    going through all files.
+    """
+    root = tempfile.mkdtemp()
+    try:
+        make_tree(root, args.count)
+        roots = sorted(os.path.join(root, name) for name in os.listdir(root))
+
+        def consume(func):
+            gc.collect()
+            tracemalloc.start()
+            start = time.time()
+            first = None
+            count = 0
+            for _ in func():
+                if first is None:
+                    first = time.time() - start
+                count += 1
+            total = time.time() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return first, total, peak, count
+
+        def materialized():
+            plist = PathList(*roots)
+            plist.real_files()
+            return ((path, path.stat()) for path in plist)
+
+        def streamed():
+            return PathList(*roots).iter_real_files()
+
+        for label, func in [
+            ("real_files()", materialized),
+            ("iter_real_files()", streamed),
+        ]:
+            first, total, peak, count = consume(func)
+            print("{:<40} {:>10.3f}s".format(label + " first file", first))
+            print("{:<40} {:>10.3f}s".format(label + " all files", total))
+            print("{:<40} {:>10.1f} MB".format(label + " peak", peak / 1e6))
+            print("{:<40} {:>10}".format("files", count))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_rescan(args):
+    """Rescan an unchanged tree with a ScanCache saved by an earlier run.
+
+    Each run goes through iter_real_files, which stats every file, as an
+    uploader would. Use --latency to add a delay to every stat and listing.
+    """
+    root = tempfile.mkdtemp()
+    filename = os.path.join(tempfile.mkdtemp(), "scan.db")
+    calls = {"stat": 0, "scandir": 0}
+    os_stat, os_scandir = os.stat, os.scandir
+    latency = args.latency / 1000.0
+
+    def counted(name, func):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            if latency:
+                time.sleep(latency)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    try:
+        make_tree(root, args.count)
+        os.stat, os.scandir = counted("stat", os_stat), counted("scandir", os_scandir)
+
+        def scan(cache=None):
+            calls.update(stat=0, scandir=0)
+            return sum(1 for _ in PathList(root).iter_real_files(cache=cache))
+
+        def report():
+            print("{:<40} {:>10}".format("os.stat calls", calls["stat"]))
+            print("{:<40} {:>10}".format("os.scandir calls", calls["scandir"]))
+
+        timed("no cache", scan)
+        report()
+        cache = ScanCache(filename)
+        timed("first run with ScanCache", scan, cache)
+        report()
+        timed("save()", cache.save)
+        size = os_stat(filename).st_size
+        print("{:<40} {:>10.1f} MB".format("file size", size / 1e6))
+        cache = timed("load", ScanCache, filename)
+        count = timed("rescan with ScanCache", scan, cache)
+        report()
+        print("{:<40} {:>10}".format("files", count))
+    finally:
+        os.stat, os.scandir = os_stat, os_scandir
+        shutil.rmtree(root)
+        shutil.rmtree(os.path.dirname(filename))
+
+
+def bench_hash(args):
+    """Hash count files of 1 MB, then hash them again with a HashCache.
+
+    The baseline reads each file in 64 KB blocks, one file at a time.
+    """
+    root = tempfile.mkdtemp()
+    try:
+        for i in range(args.count):
+            with open(os.path.join(root, "f{:05d}.bin".format(i)), "wb") as fh:
+                fh.write(os.urandom(1 << 20))
+        plist = PathList(root)
+        plist.real_files()
+
+        def one_at_a_time():
+            for path in plist:
+                digest = hashlib.md5()
+                with open(path.fslash(), "rb") as fh:
+                    for block in iter(lambda: fh.read(65536), b""):
+                        digest.update(block)
+
+        timed("64 KB reads, one at a time", one_at_a_time)
+        for workers in [1, 4]:
+            digests = timed("md5(max_workers={})".format(workers), plist.md5, workers)
+            print("{:<40} {:>10.1f}".format("MB/s", digests.mb_per_second))
+        cache = HashCache(os.path.join(root, "md5.db"))
+        timed("md5() filling a HashCache", plist.md5, 4, cache)
+        cache.save()
+        cache = HashCache(os.path.join(root, "md5.db"))
+        digests = timed("md5() with a saved HashCache", plist.md5, 4, cache)
+        print("{:<40} {:>10}".format("cache hits", digests.cache_hits))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_sequences(args):
+    """Compare list and sequence storage on render outputs.
+
+    Each shot has 4 passes of 1000 frames. Memory is traced in a second run,
+    from before the PathList is made until after deduplication.
+    """
+    passes = ["beauty", "depth", "normal", "crypto"]
+    strings = []
+    for i in range(args.count):
+        pass_ = passes[(i // 1000) % 4]
+        strings.append(
+            "/renders/shot{:04d}/{}/{}.{:04d}.exr".format(
+                i // 4000, pass_, pass_, 1001 + i % 1000
+            )
+        )
+    random.Random(1).shuffle(strings)
+    probe = strings[len(strings) // 2]
+
+    def build(storage):
+        plist = PathList(*strings, storage=storage)
+        len(plist)
+        return plist
+
+    for storage in ["list", "sequence"]:
+        plist = timed("add and dedup storage={}".format(storage), build, storage)
+        timed("contains x 10000", lambda: [probe in plist for _ in range(10000)])
+        timed("iterate", lambda: sum(1 for _ in plist))
+        timed("remove_pattern", plist.remove_pattern, "*.tmp", "*/crypto/*")
+        print("{:<40} {:>10}".format("entries", len(plist)))
+        del plist
+        gc.collect()
+        tracemalloc.start()
+        plist = build(storage)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print("{:<40} {:>10.1f} MB".format("held", held / 1e6))
+        del plist
+
+
+SCENARIOS = {
+    "cache": bench_cache,
+    "containment": bench_containment,
+    "dedup": bench_dedup,
+    "glob": bench_glob,
+    "hash": bench_hash,
+    "ingest": bench_ingest,
+    "interleaved": bench_interleaved,
+    "manifest": bench_manifest,
+    "mapping": bench_mapping,
+    "memory": bench_memory,
+    "patterns": bench_patterns,
+    "remove": bench_remove,
+    "rescan": bench_rescan,
+    "sequences": bench_sequences,
+    "stream": bench_stream,
+    "tokens": bench_tokens,
+    "walk": bench_walk,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0,
+        help="Milliseconds per listing (walk) or stat and listing (rescan)",
+    )
+    args = parser.parse_args()
+    SCENARIOS[args.scenario](args)
+
+
+if __name__ == "__main__":
+    main()
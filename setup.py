@@ -12,7 +12,7 @@ DESCRIPTION = "Object-oriented platform-transparent path manipulations."
 URL = "https://github.com/ConductorTechnologies/sequence"
 EMAIL = "info@conductortech.com"
 AUTHOR = "conductor"
-REQUIRED = ["future>=0.18.2"]
+REQUIRED = []
 HERE = os.path.abspath(os.path.dirname(__file__))
 
 
@@ -37,7 +37,8 @@ setuptools.setup(
     author_email=EMAIL,
     classifiers=[
         "Operating System :: OS Independent",
-        "Programming Language :: Python"
+        "Programming Language :: Python",
+        "Programming Language :: Python :: 3",
     ],
     cmdclass={"build_py": BuildCommand},
     description=DESCRIPTION,
@@ -47,7 +48,7 @@ setuptools.setup(
     name=NAME,
     package_dir={"": "."},
     packages=setuptools.find_packages(where="."),
-    options={"bdist_wheel": {"universal": True}},
+    python_requires=">=3.7",
     include_package_data=True, 
     url=URL,
     version=VERSION,
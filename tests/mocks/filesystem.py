@@ -0,0 +1,121 @@
+"""An in-memory filesystem for tests that list or stat files.
+
+Use patch() to route os.scandir, os.listdir, os.stat and os.path.exists
+to it.
+"""
+
+import os
+import stat as stat_module
+from unittest import mock
+
+
+def _parent(path):
+    return path.rstrip("/").rpartition("/")[0] or "/"
+
+
+class FakeDirEntry(object):
+    def __init__(self, fs, directory, name):
+        self._fs = fs
+        self.name = name
+        self.path = "{}/{}".format(directory.rstrip("/"), name)
+
+    def is_dir(self, follow_symlinks=True):
+        return self.path in self._fs.dirs
+
+    def is_file(self, follow_symlinks=True):
+        return self.path in self._fs.files
+
+    def is_symlink(self):
+        return False
+
+    def stat(self, follow_symlinks=True):
+        return self._fs.stat(self.path)
+
+
+class _ScandirIterator(object):
+    def __init__(self, entries):
+        self._entries = iter(entries)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def close(self):
+        pass
+
+
+class FakeFileSystem(object):
+    def __init__(self, files, dirs=None, sizes=None):
+        """Files is a list of absolute forward slash paths. Their parents are created.
+
+        Extra, possibly empty, directories can be given in dirs. Sizes is an
+        optional dict of file sizes, which otherwise default to 100.
+        """
+        sizes = sizes or {}
+        self.files = {f: sizes.get(f, 100) for f in files}
+        self.dirs = set()
+        self.children = {}
+        self.mtimes = {}
+        self.calls = {"scandir": 0, "stat": 0}
+        for path in list(files) + list(dirs or []):
+            if path not in self.files:
+                self._add_dir(path)
+            while path != "/":
+                parent = _parent(path)
+                self._add_dir(parent)
+                self.children[parent].add(path.rpartition("/")[2])
+                path = parent
+
+    def _add_dir(self, path):
+        self.dirs.add(path)
+        self.children.setdefault(path, set())
+        self.mtimes.setdefault(path, 1000)
+
+    def touch_dir(self, path):
+        """Bump the mtime of a directory, as if its contents changed."""
+        self.mtimes[path] += 1
+
+    def scandir(self, path="."):
+        self.calls["scandir"] += 1
+        path = path.rstrip("/") or "/"
+        if path not in self.dirs:
+            raise OSError(2, "No such directory", path)
+        names = sorted(self.children[path])
+        return _ScandirIterator([FakeDirEntry(self, path, n) for n in names])
+
+    def listdir(self, path="."):
+        with self.scandir(path) as entries:
+            return [e.name for e in entries]
+
+    def stat(self, path, *args, **kwargs):
+        self.calls["stat"] += 1
+        path = path.rstrip("/") or "/"
+        if path in self.files:
+            mode, size, mtime = stat_module.S_IFREG | 0o644, self.files[path], 500
+        elif path in self.dirs:
+            mode, size, mtime = stat_module.S_IFDIR | 0o755, 0, self.mtimes[path]
+        else:
+            raise OSError(2, "No such file or directory", path)
+        ino = abs(hash(path)) % 1000000
+        return os.stat_result((mode, ino, 1, 1, 0, 0, size, mtime, mtime, mtime))
+
+    def exists(self, path):
+        path = path.rstrip("/") or "/"
+        return path in self.files or path in self.dirs
+
+    def patch(self):
+        """Return a context manager that routes os calls to this filesystem."""
+        return mock.patch.multiple(
+            os,
+            scandir=self.scandir,
+            listdir=self.listdir,
+            stat=self.stat,
+        )
@@ -0,0 +1,95 @@
+""" test aio
+
+   isort:skip_file
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath import walk
+from ciopath.fs_cache import FileSystemCache
+from ciopath.gpath_list import PathList
+from mocks.filesystem import FakeFileSystem
+
+ENTRIES = ["/tmp/dir*", "/tmp/file1.txt", "/tmp/missing", "/tmp/sub/*/*.exr"]
+
+
+class AsyncPathListTest(unittest.TestCase):
+    def setUp(self):
+        files = [
+            "/tmp/file1.txt",
+            "/tmp/file2.txt",
+            "/tmp/dir1/file3.txt",
+            "/tmp/dir1/deep/file4.txt",
+            "/tmp/sub/a/x.exr",
+            "/tmp/sub/b/y.exr",
+        ]
+        files += ["/tmp/dir2/d{}/f{}.txt".format(i % 5, i) for i in range(50)]
+        self.fs = FakeFileSystem(files)
+        patcher = self.fs.patch()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_areal_files_same_as_real_files(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            p = PathList(*ENTRIES, storage=storage)
+            expected = PathList(*ENTRIES, storage=storage)
+            missing = asyncio.run(p.areal_files(concurrency=4))
+            self.assertEqual(missing, expected.real_files())
+            self.assertEqual(list(p), list(expected))
+            self.assertEqual(len(p), 55)
+
+    def test_aglob_same_as_glob(self):
+        p = PathList(*ENTRIES)
+        expected = PathList(*ENTRIES)
+        asyncio.run(p.aglob(concurrency=4))
+        expected.glob()
+        self.assertEqual(list(p), list(expected))
+
+    def test_aremove_missing_same_as_remove_missing(self):
+        p = PathList(*ENTRIES)
+        expected = PathList(*ENTRIES)
+        asyncio.run(p.aremove_missing(concurrency=4, cache=FileSystemCache()))
+        expected.remove_missing()
+        self.assertEqual(list(p), list(expected))
+        self.assertNotIn("/tmp/missing", p)
+
+    def test_cancel_stops_the_walk_and_keeps_the_list(self):
+        calls = []
+        started = threading.Event()
+
+        def slow_scan(directory, listdir):
+            calls.append(directory)
+            started.set()
+            time.sleep(0.02)
+            return walk.scan(directory, listdir)
+
+        async def cancel_mid_walk(plist):
+            task = asyncio.ensure_future(plist.areal_files(concurrency=2))
+            while not started.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        p = PathList("/tmp")
+        with mock.patch("ciopath.aio.scan", side_effect=slow_scan):
+            asyncio.run(cancel_mid_walk(p))
+            count = len(calls)
+            time.sleep(0.1)
+        self.assertLess(count, 5)
+        self.assertEqual(len(calls), count)
+        self.assertEqual([x.fslash() for x in p], ["/tmp"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+""" test fs_cache
+
+   isort:skip_file
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath.fs_cache import FileSystemCache, child_key, parent_key
+from ciopath.gpath import Path
+from ciopath.gpath_list import PathList
+from mocks.filesystem import FakeFileSystem
+
+
+class FileSystemCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFileSystem(
+            ["/tex/a.tx", "/tex/b.tx", "/tex/sub/c.tx", "/other/d.tx"]
+        )
+        patcher = self.fs.patch()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = FileSystemCache()
+
+    def test_stat_is_cached(self):
+        self.assertEqual(self.cache.stat("/tex/a.tx").st_size, 100)
+        self.assertEqual(self.cache.stat("/tex/a.tx").st_size, 100)
+        self.assertEqual(self.fs.calls["stat"], 1)
+        self.assertEqual(self.cache.hits["stat"], 1)
+        self.assertEqual(self.cache.misses["stat"], 1)
+
+    def test_missing_is_cached(self):
+        self.assertFalse(self.cache.exists("/tex/nope.tx"))
+        self.assertFalse(self.cache.exists("/tex/nope.tx"))
+        self.assertEqual(self.fs.calls["stat"], 1)
+
+    def test_listing_is_revalidated_by_mtime(self):
+        names = [e[0] for e in self.cache.listdir("/tex")]
+        self.assertEqual(names, ["a.tx", "b.tx", "sub"])
+        self.cache.listdir("/tex")
+        self.assertEqual(self.fs.calls["scandir"], 1)
+        self.assertEqual(self.cache.hits["listdir"], 1)
+
+    def test_changed_directory_is_listed_again(self):
+        self.cache.listdir("/tex")
+        self.assertFalse(self.cache.exists("/tex/new.tx"))
+        self.fs.files["/tex/new.tx"] = 100
+        self.fs.children["/tex"].add("new.tx")
+        self.fs.touch_dir("/tex")
+        names = [e[0] for e in self.cache.listdir("/tex")]
+        self.assertIn("new.tx", names)
+        self.assertEqual(self.fs.calls["scandir"], 2)
+        # The stale "missing" result was dropped.
+        self.assertTrue(self.cache.exists("/tex/new.tx"))
+
+    def test_exists_answered_by_listing(self):
+        self.cache.listdir("/tex")
+        stats = self.fs.calls["stat"]
+        self.assertTrue(self.cache.exists("/tex/a.tx"))
+        self.assertEqual(self.fs.calls["stat"], stats)
+        # A name that isn't listed could exist under another case.
+        self.assertFalse(self.cache.exists("/tex/nope.tx"))
+        self.assertEqual(self.fs.calls["stat"], stats + 1)
+
+    def test_exists_ignores_case_like_the_filesystem(self):
+        # As on Windows, where normcase lowers, and on macOS, where it doesn't
+        # but the filesystem ignores case all the same.
+        fs_stat = self.fs.stat
+        stat = mock.patch("os.stat", lambda path: fs_stat(path.lower()))
+        for normcase in [str.lower, os.path.normcase]:
+            with stat, mock.patch("os.path.normcase", normcase):
+                entries = ["/tex/a.tx", "/tex/B.TX", "/tex/nope.tx"]
+                uncached = PathList(*entries)
+                uncached.remove_missing()
+                cached = PathList(*entries)
+                cache = FileSystemCache()
+                cache.listdir("/tex")
+                cached.remove_missing(cache=cache)
+                self.assertEqual(list(cached), list(uncached))
+                self.assertEqual(len(uncached), 2)
+
+    def test_least_recently_used_stat_is_evicted(self):
+        cache = FileSystemCache(max_stats=2)
+        cache.stat("/tex/a.tx")
+        cache.stat("/tex/b.tx")
+        cache.stat("/tex/a.tx")
+        cache.stat("/other/d.tx")
+        cache.stat("/tex/a.tx")
+        cache.stat("/tex/b.tx")
+        self.assertEqual(cache.misses["stat"], 4)
+        self.assertEqual(cache.hits["stat"], 2)
+
+    def test_listing_limit(self):
+        cache = FileSystemCache(max_listings=1)
+        cache.listdir("/tex")
+        cache.listdir("/other")
+        cache.listdir("/tex")
+        self.assertEqual(self.fs.calls["scandir"], 3)
+
+    def test_path_stat_uses_cache(self):
+        self.assertTrue(Path("/tex/a.tx").stat(self.cache)["is_file"])
+        self.assertTrue(Path("/tex/a.tx").stat(cache=self.cache)["is_file"])
+        self.assertIsNone(Path("/tex/nope").stat(cache=self.cache))
+        self.assertEqual(self.fs.calls["stat"], 2)
+
+    def test_path_list_methods_share_the_cache(self):
+        p = PathList("/tex/*.tx", "/tex/sub", "/other/d.tx")
+        p.real_files(cache=self.cache)
+        self.assertEqual(
+            [x.fslash() for x in p],
+            ["/other/d.tx", "/tex/a.tx", "/tex/b.tx", "/tex/sub/c.tx"],
+        )
+        stats = self.fs.calls["stat"]
+        p.remove_missing(cache=self.cache)
+        self.assertEqual(len(p), 4)
+        # Files found by glob were stat'ed by real_files, and the walked file
+        # is in a cached listing.
+        self.assertEqual(self.fs.calls["stat"], stats)
+
+        scandirs = self.fs.calls["scandir"]
+        PathList("/tex/*.tx").glob(cache=self.cache)
+        self.assertEqual(self.fs.calls["scandir"], scandirs)
+
+
+@unittest.skipUnless(hasattr(os, "symlink") and os.name == "posix", "posix only")
+class SymlinkTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        join = os.path.join
+        with open(join(self.root, "a.txt"), "w") as fh:
+            fh.write("a")
+        os.symlink(join(self.root, "a.txt"), join(self.root, "link.txt"))
+        os.symlink(join(self.root, "gone"), join(self.root, "broken.txt"))
+
+    def test_broken_symlinks_are_missing(self):
+        uncached = PathList(self.root)
+        uncached.real_files()
+        uncached.remove_missing()
+        cache = FileSystemCache()
+        cached = PathList(self.root)
+        cached.real_files(cache=cache)
+        cached.remove_missing(cache=cache)
+        self.assertEqual(list(cached), list(uncached))
+        self.assertEqual([x.tail for x in cached], ["a.txt", "link.txt"])
+
+
+class RelativePathTest(unittest.TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(root)
+        with open("a.txt", "w") as fh:
+            fh.write("a")
+
+    def test_keys(self):
+        self.assertEqual(parent_key("a.txt"), "")
+        self.assertEqual(parent_key("a/b.txt"), "a")
+        self.assertEqual(parent_key("/a"), "/")
+        self.assertEqual(parent_key("C:/a"), "C:/")
+        self.assertEqual(child_key("", "a.txt"), "a.txt")
+        self.assertEqual(child_key("/", "a"), "/a")
+
+    def test_relative_names_are_in_the_current_directory(self):
+        cache = FileSystemCache()
+        root_names = [e[0] for e in cache.listdir("/")]
+        self.assertFalse(cache.exists(root_names[0]))
+        self.assertEqual([e[0] for e in cache.listdir("")], ["a.txt"])
+        self.assertTrue(cache.exists("a.txt"))
+        self.assertFalse(cache.exists(root_names[0]))
+
+        p = PathList(root_names[0], "a.txt")
+        p.remove_missing(cache=cache)
+        self.assertEqual([x.fslash() for x in p], ["a.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,10 @@
 """
 
 import os
+import pathlib
+import shutil
 import sys
+import tempfile
 import unittest
 
 from unittest import mock
@@ -14,7 +17,7 @@ SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
 
-from ciopath.gpath import Path
+from ciopath.gpath import Path, PathStat
 
 # sys.modules["glob"] = __import__("mocks.glob", fromlist=["dummy"])
 
@@ -243,6 +246,78 @@ class PathContextExpansionTest(unittest.TestCase):
         self.assertEqual(self.p.fslash(), "foo/fooBAR/thefile.$F.jpg")
 
 
+class FromStringsTest(unittest.TestCase):
+    def setUp(self):
+        self.env = {
+            "HOME": "/users/joebloggs",
+            "SHOT": "/metropolis/shot01",
+            "DEPT": "texturing",
+        }
+        self.strings = [
+            "/a/b/c",
+            "/a/b/d",
+            "C:\\a\\b/c",
+            "C:/a/b/c",
+            "//server/share/file",
+            "\\\\server\\share\\file",
+            "//f",
+            "/f",
+            "rel/a",
+            "a/../b",
+            "a/../../b",
+            "./a/b/../../../c/d",
+            "/a/./b/../c",
+            "/a/b/.",
+            "/a/b/..",
+            "/a/b/",
+            "file",
+            "$SHOT/a/b",
+            "${SHOT}/a/$DEPT/c",
+            "$NOT_SET/a",
+            "~/a/b",
+            "/a/b/\xc3/c",
+        ]
+
+    def test_same_as_constructor(self):
+        with mock.patch.dict("os.environ", self.env):
+            expected = [Path(s) for s in self.strings]
+            result = Path.from_strings(self.strings)
+        for p, e, s in zip(result, expected, self.strings):
+            self.assertEqual(p, e, s)
+            self.assertEqual(p.all_components, e.all_components, s)
+            self.assertEqual(p.absolute, e.absolute, s)
+
+    def test_same_as_constructor_no_expand(self):
+        with mock.patch.dict("os.environ", self.env):
+            expected = [Path(s, no_expand=True) for s in self.strings]
+            result = Path.from_strings(self.strings, no_expand=True)
+        self.assertEqual(result, expected)
+
+    def test_same_as_constructor_with_context(self):
+        context = {"SHOT": "/context/shot", "DEPT": "lighting"}
+        with mock.patch.dict("os.environ", self.env):
+            expected = [Path(s, context=context) for s in self.strings]
+            result = Path.from_strings(self.strings, context=context)
+        self.assertEqual(result, expected)
+
+    def test_passes_paths_through(self):
+        p = Path("/a/b")
+        self.assertIs(Path.from_strings([p, "/c"])[0], p)
+
+    def test_accepts_path_like_objects(self):
+        result = Path.from_strings([pathlib.PurePosixPath("/a/b"), "/c"])
+        self.assertEqual([p.fslash() for p in result], ["/a/b", "/c"])
+        self.assertEqual(result[0], Path(pathlib.PurePosixPath("/a/b")))
+
+    def test_empty_string_raises(self):
+        with self.assertRaises(ValueError):
+            Path.from_strings(["/a", ""])
+
+    def test_overflow_raises(self):
+        with self.assertRaises(ValueError):
+            Path.from_strings(["/a/../../b"])
+
+
 class PathLengthTest(unittest.TestCase):
     def test_len_with_drive_letter(self):
         self.p = Path("C:\\aaa\\bbb/c")
@@ -389,6 +464,36 @@ class EqualityTests(unittest.TestCase):
         s = {Path("a/b/c"), Path("a/b/c/d"), Path("a/b/c/d/e"), Path("a/b/c/")}
         self.assertEqual(len(s), 3)
 
+    def test_paths_sort_by_fslash(self):
+        paths = [Path("/a/c"), Path("C:\\a\\b"), Path("/a/b")]
+        self.assertEqual(
+            [p.fslash() for p in sorted(paths)], ["/a/b", "/a/c", "C:/a/b"]
+        )
+
+    def test_hash_and_equality_of_relative_path(self):
+        p = Path("/a/b/c/d")
+        hash(p)
+        rel = p.make_relative_to(Path("/a/b"))
+        self.assertEqual(rel, Path("c/d"))
+        self.assertEqual(hash(rel), hash(Path("c/d")))
+        self.assertEqual(hash(p), hash(Path("/a/b/c/d")))
+
+
+class CompactPathTests(unittest.TestCase):
+    def test_has_no_instance_dict(self):
+        p = Path("/a/b/c")
+        self.assertFalse(hasattr(p, "__dict__"))
+
+    def test_components_are_shared(self):
+        p1 = Path("/proj/tex/a.tx")
+        p2 = Path("/proj/tex/b.tx")
+        self.assertIs(p1._components[1], p2._components[1])
+
+    def test_components_property_is_a_copy(self):
+        p = Path("/a/b/c")
+        p.components.append("d")
+        self.assertEqual(p.fslash(), "/a/b/c")
+
 
 class InitializeWithComponentsTests(unittest.TestCase):
     def test_initialize_with_lettered_components(self):
@@ -478,62 +583,70 @@ class MakeRelativeTest(unittest.TestCase):
     def test_make_posix_absolute_relative(self):
         p = Path("/a/b/c/d")
         base = Path("/a/b/f/g")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "../../c/d")
         self.assertTrue(p.relative)
 
     def test_ignore_different_windows_drives(self):
         p = Path("C:/a/b/c/d")
         base = Path("D:/a/b/f/g")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "../../c/d")
         self.assertTrue(p.relative)
 
     def test_leave_relative_unchanged(self):
         p = Path("a/b/c/d")
         base = Path("/a/b/f/g")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "a/b/c/d")
         self.assertTrue(p.relative)
 
     def test_file_at_root(self):
         p = Path("/d")
         base = Path("/a/b/f/g")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "../../../../d")
         self.assertTrue(p.relative)
 
     def test_base_at_root(self):
         p = Path("/d/e")
         base = Path("/")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "d/e")
         self.assertTrue(p.relative)
 
     def test_file_is_root_folder(self):
         p = Path("/")
         base = Path("/a/b/c/d")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "../../../../")
         self.assertTrue(p.relative)
 
     def test_file_at_same_folder(self):
         p = Path("/a/b/c/d")
         base = Path("/a/b/c/z")
-        p.make_relative_to(base)
+        p = p.make_relative_to(base)
         self.assertEqual(p.fslash(), "../d")
 
+    def test_original_path_is_unchanged(self):
+        p = Path("/a/b/c/d")
+        base = Path("/a/b/f/g")
+        rel = p.make_relative_to(base)
+        self.assertEqual(p.fslash(), "/a/b/c/d")
+        self.assertTrue(p.absolute)
+        self.assertEqual(rel.fslash(), "../../c/d")
+
     def test_same_path_is_error(self):
         p = Path("/a/b/c/d")
         base = Path("/a/b/c/d")
         with self.assertRaises(ValueError):
-            p.make_relative_to(base)
+            p = p.make_relative_to(base)
 
     def test_not_path_is_error(self):
         p = Path("/a/b")
         base = "/a"
         with self.assertRaises(TypeError):
-            p.make_relative_to(base)
+            p = p.make_relative_to(base)
 
 
 class StatsTest(unittest.TestCase):
@@ -545,7 +658,9 @@ class StatsTest(unittest.TestCase):
     @patch("stat.S_ISDIR")
     def test_stat_is_file(self, mock_isdir, mock_isreg, mock_stat):
         mock_stat_result = type(
-            "MockStatResult", (), {"st_mode": 33206, "st_size": 100}
+            "MockStatResult",
+            (),
+            {"st_mode": 33206, "st_size": 100, "st_mtime": 1.0, "st_ino": 1},
         )
         mock_stat.return_value = mock_stat_result
         mock_isreg.return_value = True
@@ -560,7 +675,11 @@ class StatsTest(unittest.TestCase):
     @patch("stat.S_ISREG")
     @patch("stat.S_ISDIR")
     def test_stat_is_dir(self, mock_isdir, mock_isreg, mock_stat):
-        mock_stat_result = type("MockStatResult", (), {"st_mode": 16384, "st_size": 0})
+        mock_stat_result = type(
+            "MockStatResult",
+            (),
+            {"st_mode": 16384, "st_size": 0, "st_mtime": 1.0, "st_ino": 2},
+        )
         mock_stat.return_value = mock_stat_result
         mock_isreg.return_value = False
         mock_isdir.return_value = True
@@ -570,6 +689,49 @@ class StatsTest(unittest.TestCase):
         self.assertTrue(result["is_dir"])
         self.assertEqual(result["size"], 0)
 
+    def test_stat_is_carried(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        filename = os.path.join(tmpdir, "d.txt")
+        with open(filename, "w") as fh:
+            fh.write("12345")
+        pth = Path(filename)
+        self.assertIsNone(pth.stat_info)
+        self.assertIsNone(pth.size)
+        pth.stat()
+        self.assertEqual(pth.size, 5)
+        self.assertEqual(pth.inode, os.stat(filename).st_ino)
+        self.assertEqual(pth.mtime, os.stat(filename).st_mtime)
+        self.assertTrue(pth.stat_info.is_file)
+        self.assertEqual(pth, Path(filename))
+        self.assertEqual(hash(pth), hash(Path(filename)))
+
+    @patch("os.stat")
+    def test_wide_inode_is_dropped(self, mock_stat):
+        mock_stat.return_value = type(
+            "MockStatResult",
+            (),
+            {"st_mode": 33206, "st_size": 100, "st_mtime": 1.0, "st_ino": 2**100},
+        )
+        pth = Path("/a/b/c/d.txt")
+        self.assertTrue(pth.stat()["is_file"])
+        self.assertIsNone(pth.inode)
+        self.assertEqual(pth.size, 100)
+        self.assertIsNone(PathStat(33206, 1, 2.0, 2**64).inode)
+        self.assertEqual(PathStat(33206, 1, 2.0, 2**64 - 2).inode, 2**64 - 2)
+
+    def test_missing_file_forgets_stat(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        filename = os.path.join(tmpdir, "d.txt")
+        open(filename, "w").close()
+        pth = Path(filename)
+        pth.stat()
+        self.assertEqual(pth.size, 0)
+        os.remove(filename)
+        self.assertIsNone(pth.stat())
+        self.assertIsNone(pth.stat_info)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,8 +3,12 @@
    isort:skip_file
 """
 
+import asyncio
 import sys
 import os
+import pathlib
+import shutil
+import tempfile
 import unittest
 from unittest import mock
 from unittest.mock import patch
@@ -14,19 +18,19 @@ SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
 
-
-# Make sure the mocked version of glob is in the sys modules
-sys.modules["glob"] = __import__("mocks.glob", fromlist=["dummy"])
-
-# Import gpath_list and anything else that may use glob which will NOT import
-# the real glob because it's already here.
 from ciopath.gpath_list import PathList
 from ciopath.gpath import Path
+from ciopath.path_glob import PatternSet
+from mocks.filesystem import FakeFileSystem
 
 # from cioseq.sequence import Sequence
 
-# Now import glob because we need to populate it.
-import glob  # isort:skip
+
+def populate(test, files):
+    """Put files on a fake filesystem for the rest of the test."""
+    patcher = FakeFileSystem(files).patch()
+    patcher.start()
+    test.addCleanup(patcher.stop)
 
 
 class PathListTest(unittest.TestCase):
@@ -107,6 +111,25 @@ class PathListTest(unittest.TestCase):
         d.add("/a/file1", "/a/file2", Path("/a/file3"))
         self.assertEqual(len(d), 3)
 
+    def test_add_many(self):
+        d = PathList()
+        d.add_many(["/a/file1", Path("/a/file2"), "/a/file1"])
+        self.assertEqual(len(d), 2)
+
+    def test_add_many_with_options(self):
+        with mock.patch.dict("os.environ", self.env):
+            d = PathList()
+            d.add_many(["$SHOT/file1", "$FOO/file2"], context={"FOO": "/foo"})
+            d.add_many(["$SHOT/file3"], no_expand=True)
+            self.assertIn("/metropolis/shot01/file1", d)
+            self.assertIn("/foo/file2", d)
+            self.assertIn(Path("$SHOT/file3", no_expand=True), d)
+
+    def test_adds_path_like_objects(self):
+        d = PathList(pathlib.PurePosixPath("/a/file1"))
+        d.add_many([pathlib.PurePosixPath("/a/file2")])
+        self.assertEqual([p.fslash() for p in d], ["/a/file1", "/a/file2"])
+
     # remove
     def test_removes_string(self):
         d = PathList()
@@ -176,11 +199,10 @@ class PathListTest(unittest.TestCase):
         self.assertIn("/file1", d)
         self.assertIn("/file2", d)
 
-    # Keep this test in case one day we can reinstate the deep deduplication.
-    # def test_dedup_contained_file(self):
-    #     d = PathList()
-    #     d.add("/dir1/", "/dir1/file1", "/dir2/file1", "/dir3/file2")
-    #     self.assertEqual(len(d), 3)
+    def test_dedup_keeps_contained_file_by_default(self):
+        d = PathList()
+        d.add("/dir1/", "/dir1/file1", "/dir2/file1", "/dir3/file2")
+        self.assertEqual(len(d), 4)
 
     def test_dedup_dirtied_on_add(self):
         d = PathList()
@@ -205,6 +227,31 @@ class PathListTest(unittest.TestCase):
         n = next(d)
         self.assertTrue(d._clean)
 
+    def test_dedup_merges_new_entries_into_sorted_list(self):
+        d = PathList("/file3", "/file1", "/file5")
+        self.assertEqual(len(d), 3)
+        d.add("/file4", "/file1", "/file0", "/file4")
+        self.assertEqual(len(d._entries._pending), 4)
+        self.assertEqual(
+            [p.fslash() for p in d],
+            ["/file0", "/file1", "/file3", "/file4", "/file5"],
+        )
+        self.assertEqual(len(d._entries._pending), 0)
+
+    def test_dedup_merges_many_new_entries(self):
+        d = PathList(*["/a/file{:04d}".format(i) for i in range(0, 1000, 2)])
+        self.assertEqual(len(d), 500)
+        d.add(*["/a/file{:04d}".format(i) for i in range(0, 600)])
+        self.assertEqual(len(d), 800)
+        self.assertEqual(list(d), sorted(d))
+
+    def test_contains_after_add(self):
+        d = PathList("/file3", "/file1")
+        len(d)
+        d.add("/file2")
+        self.assertIn("/file2", d)
+        self.assertNotIn("/file4", d)
+
     def test_next(self):
         d = PathList()
         d.add("/file1", "/file2", "/file3")
@@ -311,6 +358,27 @@ class PathListTest(unittest.TestCase):
         d = PathList()
         self.assertIsNone(d.common_path())
 
+    def test_common_path_kept_up_to_date_on_add(self):
+        d = PathList("/renders/shot1/a/beauty.0001.exr")
+        self.assertEqual(d.common_path(), Path("/renders/shot1/a/beauty.0001.exr"))
+        d.add("/renders/shot1/a/beauty.0002.exr")
+        # The entries are not looked at again.
+        with mock.patch.object(type(d._entries), "__iter__") as iterate:
+            self.assertEqual(d.common_path(), Path("/renders/shot1/a"))
+            d.add("/renders/shot2/b/beauty.0001.exr")
+            self.assertEqual(d.common_path(), Path("/renders"))
+        self.assertEqual(iterate.call_count, 0)
+
+    def test_common_path_recomputed_after_remove(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList("/r/s1/a.exr", "/r/s1/b.exr", "/r/s2/c.exr", storage=storage)
+            self.assertEqual(d.common_path(), Path("/r"))
+            d.remove("/r/s2/c.exr")
+            self.assertEqual(d.common_path(), Path("/r/s1"))
+            d.remove_pattern("*/b.exr")
+            self.assertEqual(d.common_path(), Path("/r/s1/a.exr"))
+            self.assertEqual(d.difference(["/r/s1/a.exr"]).common_path(), None)
+
     def test_common_path_is_slash_when_root(self):
         d = PathList()
         files = ["/users/joebloggs/tmp/foo.txt", "/dev/joebloggs/tmp/foo.txt"]
@@ -318,7 +386,7 @@ class PathListTest(unittest.TestCase):
         self.assertEqual(d.common_path(), Path("/"))
 
     def test_glob_when_files_match_with_asterisk(self):
-        glob.populate(self.some_files_on_disk)
+        populate(self, self.some_files_on_disk)
         d = PathList()
         file = "/some/file.*.exr"
         d.add(file)
@@ -326,7 +394,7 @@ class PathListTest(unittest.TestCase):
         self.assertEqual(len(d), 20)
 
     def test_glob_when_files_match_with_question_mark(self):
-        glob.populate(self.some_files_on_disk)
+        populate(self, self.some_files_on_disk)
         d = PathList()
         file = "/some/file.00?0.exr"
         d.add(file)
@@ -334,7 +402,7 @@ class PathListTest(unittest.TestCase):
         self.assertEqual(len(d), 2)
 
     def test_glob_when_files_match_with_range(self):
-        glob.populate(self.some_files_on_disk)
+        populate(self, self.some_files_on_disk)
         d = PathList()
         file = "/some/file.000[0-9].exr"
         d.add(file)
@@ -342,7 +410,7 @@ class PathListTest(unittest.TestCase):
         self.assertEqual(len(d), 9)
 
     def test_glob_dedups_when_many_files_match(self):
-        glob.populate(self.some_files_on_disk)
+        populate(self, self.some_files_on_disk)
         d = PathList()
         files = ["/some/file.*.exr", "/some/*.exr"]
         d.add(*files)
@@ -350,7 +418,7 @@ class PathListTest(unittest.TestCase):
         self.assertEqual(len(d), 20)
 
     def test_glob_when_files_dont_match(self):
-        glob.populate(self.other_files_on_disk)
+        populate(self, self.other_files_on_disk)
         d = PathList()
         file = "/some/file.*.exr"
         d.add(file)
@@ -364,7 +432,7 @@ class PathListTest(unittest.TestCase):
         self.assertEqual(type(a), Path)
 
     def test_glob_leaves_non_existent_unglobbable_entries_untouched(self):
-        glob.populate(self.some_files_on_disk[:3])
+        populate(self, self.some_files_on_disk[:3])
         d = PathList()
         d.add("/some/file.*.exr", "/other/file1.exr", "/other/file2.exr")
         d.glob()
@@ -372,7 +440,7 @@ class PathListTest(unittest.TestCase):
 
     def test_ignore_invalid_glob(self):
         bad_glob = "/path/to/Model[b-a]"
-        glob.populate(bad_glob)
+        populate(self, [bad_glob])
         d = PathList()
         d.add(bad_glob)
         d.glob()
@@ -392,6 +460,291 @@ class PathListTest(unittest.TestCase):
         self.assertTrue(PathList("/file"))
 
 
+class SetOperationsTest(unittest.TestCase):
+    def setUp(self):
+        self.a = PathList("/a/file1", "/a/file2", "/a/file3", "/a/file2")
+        self.b = PathList("/a/file3", "/a/file4", "/a/file2")
+
+    @staticmethod
+    def _strings(plist):
+        return [p.fslash() for p in plist]
+
+    def test_difference(self):
+        result = self.a.difference(self.b)
+        self.assertEqual(self._strings(result), ["/a/file1"])
+
+    def test_difference_with_strings(self):
+        result = self.a.difference(["/a/file1", "/a/file3"])
+        self.assertEqual(self._strings(result), ["/a/file2"])
+
+    def test_intersection(self):
+        result = self.a.intersection(self.b)
+        self.assertEqual(self._strings(result), ["/a/file2", "/a/file3"])
+
+    def test_union(self):
+        result = self.a.union(self.b)
+        self.assertEqual(
+            self._strings(result), ["/a/file1", "/a/file2", "/a/file3", "/a/file4"]
+        )
+
+    def test_symmetric_difference(self):
+        result = self.a.symmetric_difference(self.b)
+        self.assertEqual(self._strings(result), ["/a/file1", "/a/file4"])
+
+    def test_operands_are_unchanged(self):
+        self.a.union(self.b)
+        self.a.difference(self.b)
+        self.assertEqual(len(self.a), 3)
+        self.assertEqual(len(self.b), 3)
+
+    def test_result_keeps_storage_and_options(self):
+        a = PathList("/a", "/b/c", storage="trie", remove_contained=True)
+        result = a.union(["/a/b", "/b"])
+        self.assertEqual(self._strings(result), ["/a", "/b"])
+        self.assertEqual(type(result._entries).__name__, "TrieStorage")
+
+    def test_result_can_be_extended(self):
+        result = self.a.difference(self.b)
+        result.add("/a/file0")
+        self.assertEqual(self._strings(result), ["/a/file0", "/a/file1"])
+
+
+class RelativeToTest(unittest.TestCase):
+    def test_entries_made_relative(self):
+        d = PathList("/a/b/c.exr", "/a/d/e.exr", "/a/b", "C:/a/b/f.exr", "rel/g.exr")
+        result = d.relative_to("/a/b")
+        self.assertEqual(
+            [p.fslash() for p in result],
+            ["../d/e.exr", "./", "c.exr", "f.exr", "rel/g.exr"],
+        )
+        self.assertEqual(
+            [p.fslash() for p in d],
+            ["/a/b", "/a/b/c.exr", "/a/d/e.exr", "C:/a/b/f.exr", "rel/g.exr"],
+        )
+
+    def test_same_as_make_relative_to(self):
+        entries = ["/a/b/c/d", "/x/y", "/a/b/e", "/a"]
+        start = Path("/a/b/c")
+        expected = sorted(Path(e).make_relative_to(start).fslash() for e in entries)
+        result = PathList(*entries, storage="trie").relative_to(start)
+        self.assertEqual([p.fslash() for p in result], expected)
+        self.assertEqual(type(result._entries).__name__, "TrieStorage")
+
+
+class StorageTest(unittest.TestCase):
+    def test_unknown_storage_raises(self):
+        with self.assertRaises(ValueError):
+            PathList(storage="foo")
+
+    def test_under(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList("/a/b", "/a/b/c", "/a/b-c", "/a/bc/d", "/x", storage=storage)
+            self.assertEqual(
+                [p.fslash() for p in d.under("/a/b")], ["/a/b", "/a/b/c"]
+            )
+
+    def test_ancestor_of(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList("/a", "/a/b", "/x/y", storage=storage)
+            self.assertEqual(d.ancestor_of("/a/b/c"), Path("/a"))
+            self.assertEqual(d.ancestor_of("/x/y/z"), Path("/x/y"))
+            self.assertIsNone(d.ancestor_of("/x"))
+            self.assertIsNone(d.ancestor_of("/a"))
+
+
+class RemoveContainedTest(unittest.TestCase):
+    def test_dedup_contained_file(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList(remove_contained=True, storage=storage)
+            d.add("/dir1/", "/dir1/file1", "/dir2/file1", "/dir3/file2")
+            self.assertEqual(len(d), 3)
+
+    def test_dedup_deeply_contained_files(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList(remove_contained=True, storage=storage)
+            d.add("/a/b/c/d", "/a/b", "/a/b/c", "/a/b-c/d", "/a/bc", "/a/b/e")
+            self.assertEqual(
+                [p.fslash() for p in d], ["/a/b", "/a/b-c/d", "/a/bc"]
+            )
+
+    def test_root_contains_everything_on_its_drive(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList(remove_contained=True, storage=storage)
+            d.add("/a/b", "/", "/c", "C:/a", "C:/a/b", "rel/a")
+            self.assertEqual([p.fslash() for p in d], ["/", "C:/a", "rel/a"])
+
+    def test_contained_file_added_later(self):
+        for storage in ["list", "trie", "sequence", "packed"]:
+            d = PathList("/a/b", remove_contained=True, storage=storage)
+            self.assertEqual(len(d), 1)
+            d.add("/a/b/c", "/a/c")
+            self.assertEqual([p.fslash() for p in d], ["/a/b", "/a/c"])
+            d.add("/a")
+            self.assertEqual([p.fslash() for p in d], ["/a"])
+
+
+class TrieStorageTest(unittest.TestCase):
+    def test_dedups_and_sorts(self):
+        d = PathList("/b", "/a/b", "/a-b", "/a/b", storage="trie")
+        self.assertEqual([p.fslash() for p in d], ["/a-b", "/a/b", "/b"])
+
+    def test_contains(self):
+        d = PathList("/a/file1", "/a/file2", storage="trie")
+        self.assertIn("/a/file1", d)
+        self.assertNotIn("/a", d)
+
+    def test_removes(self):
+        d = PathList("/a/file1", "/a/file2", "/a/file3", "/a/file2", storage="trie")
+        d.remove("/a/file2", "/a/file4")
+        self.assertEqual([p.fslash() for p in d], ["/a/file1", "/a/file3"])
+
+    def test_contains_after_remove_does_not_sort(self):
+        d = PathList("/a/file1", "/a/file2", "/a/file3", storage="trie")
+        self.assertEqual(len(d), 3)
+        d.remove("/a/file2")
+        self.assertIn("/a/file1", d)
+        self.assertNotIn("/a/file2", d)
+        self.assertIsNone(d._entries._sorted)
+        self.assertEqual([p.fslash() for p in d], ["/a/file1", "/a/file3"])
+
+    def test_next_after_remove(self):
+        d = PathList("/a/file1", "/a/file2", "/a/file3", storage="trie")
+        self.assertEqual(next(d), Path("/a/file1"))
+        d.remove("/a/file1")
+        self.assertEqual(next(d), Path("/a/file2"))
+
+    def test_common_path(self):
+        d = PathList("/a/b/c", "/a/b/d", storage="trie")
+        self.assertEqual(d.common_path(), Path("/a/b"))
+
+    def test_remove_pattern(self):
+        d = PathList("/tmp/foo.txt", "/tmp/bar.bak", storage="trie")
+        d.remove_pattern("*.bak")
+        self.assertEqual(list(d), [Path("/tmp/foo.txt")])
+
+    def test_glob_keeps_storage(self):
+        populate(self, ["/some/file.0001.exr", "/some/file.0002.exr"])
+        d = PathList("/some/file.*.exr", storage="trie")
+        d.glob()
+        self.assertEqual(len(d), 2)
+        self.assertEqual(type(d._entries).__name__, "TrieStorage")
+
+
+class SequenceStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.frames = ["/r/beauty.{:04d}.exr".format(i) for i in range(1001, 1101)]
+        self.others = ["/r/a.txt", "/r/beauty.0005.exr", "/r/beauty.10000.exr"]
+
+    def test_same_entries_as_list(self):
+        files = self.frames + self.others + self.frames[:10] + ["/r/v2/x.exr"]
+        d = PathList(*files, storage="sequence")
+        expected = PathList(*files)
+        self.assertEqual(list(d), list(expected))
+        self.assertEqual(len(d), 104)
+        self.assertEqual(d._entries.sequences, 2)
+        self.assertEqual([next(d) for _ in range(5)], list(expected)[:5])
+
+    def test_runs_are_stored_as_ranges(self):
+        d = PathList(*self.frames[::-1], storage="sequence")
+        d.add("/r/beauty.1200.exr")
+        len(d)
+        sequence = list(d._entries._sequences.values())[0]
+        self.assertEqual(sequence.ranges, [(1001, 1100), (1200, 1200)])
+
+    def test_contains_and_remove(self):
+        d = PathList(*self.frames, storage="sequence")
+        self.assertIn("/r/beauty.1050.exr", d)
+        self.assertNotIn("/r/beauty.1050.jpg", d)
+        self.assertNotIn("/r/beauty.050.exr", d)
+        d.remove("/r/beauty.1050.exr", "/r/beauty.1001.exr", "/r/a.txt")
+        self.assertNotIn("/r/beauty.1050.exr", d)
+        self.assertEqual(len(d), 98)
+        sequence = list(d._entries._sequences.values())[0]
+        self.assertEqual(sequence.ranges, [(1002, 1049), (1051, 1100)])
+
+    def test_remove_pattern_without_digits_matches_one_frame(self):
+        d = PathList(*(self.frames + self.others), storage="sequence")
+        with mock.patch.object(
+            PatternSet, "match", autospec=True, side_effect=PatternSet.match
+        ) as match:
+            d.remove_pattern("*.exr")
+        self.assertEqual([p.fslash() for p in d], ["/r/a.txt"])
+        # a.txt, then one frame each of the 4 and 5 digit sequences.
+        self.assertEqual(match.call_count, 3)
+
+    def test_remove_pattern_with_digits(self):
+        d = PathList(*(self.frames + self.others), storage="sequence")
+        d.remove_pattern("*.10[0-4]?.exr", "*.txt")
+        self.assertEqual(len(d), 53)
+        self.assertNotIn("/r/beauty.1049.exr", d)
+        self.assertIn("/r/beauty.1050.exr", d)
+
+    def test_numbered_directory_contains_files(self):
+        files = ["/r/v001", "/r/v001/a.exr", "/r/v001/s/b.0001.exr", "/r/v002/a.exr"]
+        d = PathList(*files, storage="sequence", remove_contained=True)
+        self.assertEqual([p.fslash() for p in d], ["/r/v001", "/r/v002/a.exr"])
+        self.assertEqual(d.ancestor_of("/r/v001/s/b.0002.exr"), Path("/r/v001"))
+        d = PathList(*self.frames, storage="sequence")
+        self.assertEqual(len(d.under("/r")), 100)
+        self.assertEqual(len(d.under("/r/beauty.1001.exr")), 1)
+
+
+class PackedStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.files = ["/b", "/a/b", "/a-b", "/a/b", "C:/x/y", "//srv/share/z", "r/c"]
+
+    def test_same_entries_as_list(self):
+        d = PathList(*self.files, storage="packed")
+        expected = PathList(*self.files)
+        self.assertEqual(list(d), list(expected))
+        self.assertEqual([next(d) for _ in range(3)], list(expected)[:3])
+        self.assertEqual(d._entries[-1], Path("r/c"))
+
+    def test_no_paths_are_held(self):
+        d = PathList(*self.files, storage="packed")
+        len(d)
+        self.assertEqual(d._entries._buffer, "".join(sorted(set(self.files))).encode())
+        self.assertEqual(len(d._entries._offsets), 7)
+
+    def test_added_paths_are_merged(self):
+        d = PathList(*self.files, storage="packed")
+        self.assertIn("/a/b", d)
+        d.add("/a/a", "/b", "/c")
+        self.assertIn("/a/a", d)
+        self.assertNotIn("/a", d)
+        self.assertEqual(len(d), 8)
+        self.assertEqual(d._entries[2], Path("/a/a"))
+        d._entries.add(Path("/d"))
+        entries = iter(d._entries)
+        d._entries.add(Path("/e"))
+        self.assertEqual(len(list(entries)), 9)
+
+    def test_removes(self):
+        d = PathList(*self.files, storage="packed")
+        d.remove("/a/b", "/nothing")
+        d.remove_pattern("*/z")
+        self.assertEqual(
+            [p.fslash() for p in d], ["/a-b", "/b", "C:/x/y", "r/c"]
+        )
+
+    def test_root_is_not_above_unc_paths(self):
+        d = PathList("/", "/a", "//srv/share/z", storage="packed")
+        self.assertEqual([p.fslash() for p in d.under("/")], ["/", "/a"])
+        d = PathList(
+            "/", "/a", "//srv/share/z", storage="packed", remove_contained=True
+        )
+        self.assertEqual([p.fslash() for p in d], ["/", "//srv/share/z"])
+
+    def test_paths_are_not_expanded_again(self):
+        with mock.patch.dict("os.environ", {"HOME": "/home/me", "X": "y"}):
+            d = PathList(storage="packed")
+            d.add_many(["/a/$X/~", "/a/$Y"], no_expand=True)
+            self.assertEqual([p.fslash() for p in d], ["/a/$X/~", "/a/$Y"])
+        self.assertEqual(
+            [p.fslash() for p in d.relative_to("/a/$X/~")], ["../../$Y", "./"]
+        )
+
+
 class MissingFilesTest(unittest.TestCase):
     @staticmethod
     def side_effect(arg):
@@ -459,6 +812,15 @@ class MissingFilesTest(unittest.TestCase):
         d.remove_missing()
         self.assertEqual(len(d), 2)
 
+    def test_remove_missing_on_threads(self):
+        d = PathList()
+        files = ["/tmp/missing{}".format(i) for i in range(50)]
+        files += ["/tmp/foo{}".format(i) for i in range(50)]
+        d.add(*files)
+        d.remove_missing(max_workers=8)
+        self.assertEqual(len(d), 50)
+        self.assertNotIn("/tmp/missing1", d)
+
     def test_dont_remove_globbable_files(self):
         d = PathList()
         files = [
@@ -522,6 +884,11 @@ class RemovePatternTest(unittest.TestCase):
         d.remove_pattern("*tmp\\*")
         self.assertEqual(len(d), 2)
 
+    def test_remove_when_pattern_mixes_slashes(self):
+        d = PathList("/tmp/foo.txt", "/tmp2/bar.txt", "/tmp2/bar.bak", "/tmp/yum.dum")
+        d.remove_pattern("/tmp2\\*.bak", "*.txt")
+        self.assertEqual([x.fslash() for x in d], ["/tmp/yum.dum"])
+
     def test_empty_the_list(self):
         d = PathList()
         files = ["/tmp2/bar.txt", "/tmp2/bar.bak", "/tmp/yum.dum"]
@@ -532,16 +899,23 @@ class RemovePatternTest(unittest.TestCase):
 
 
 class RealFilesTest(unittest.TestCase):
-    @patch("os.walk")
-    # @patch("os.path.realpath")
+    def setUp(self):
+        self.fs = FakeFileSystem(
+            [
+                "/tmp/file1.txt",
+                "/tmp/file2.txt",
+                "/tmp/dir1/file3.txt",
+                "/tmp/dir1/file4.txt",
+            ],
+            dirs=["/tmp/dir2"],
+        )
+        patcher = self.fs.patch()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch.object(PathList, "glob")
     @patch.object(Path, "stat")
-    def test_expands_a_folder(self, mock_stat, mock_glob, mock_walk):
-        mock_walk.return_value = [
-            ("/tmp", ["dir1", "dir2"], ["file1.txt", "file2.txt"]),
-            ("/tmp/dir1", [], ["file3.txt", "file4.txt"]),
-            ("/tmp/dir2", [], []),
-        ]
+    def test_expands_a_folder(self, mock_stat, mock_glob):
         mock_stat.return_value = {"is_dir": True, "is_file": False}
         p = PathList()
         p.add("/tmp")
@@ -555,6 +929,63 @@ class RealFilesTest(unittest.TestCase):
         p.real_files()
         self.assertEqual(len(p), 4)
 
+    @patch.object(PathList, "glob")
+    def test_expands_folders_and_files(self, mock_glob):
+        p = PathList("/tmp/dir1", "/tmp/file1.txt", "/tmp/dir2", "/tmp/missing")
+        missing = p.real_files()
+        self.assertEqual(missing, ["/tmp/missing"])
+        self.assertEqual(
+            [x.fslash() for x in p],
+            ["/tmp/dir1/file3.txt", "/tmp/dir1/file4.txt", "/tmp/file1.txt"],
+        )
+
+    @patch.object(PathList, "glob")
+    def test_walks_folders_on_threads(self, mock_glob):
+        p = PathList("/tmp/dir1", "/tmp/file1.txt", "/tmp/dir2", "/tmp/missing")
+        sequential = PathList(*p)
+        self.assertEqual(p.real_files(max_workers=4), sequential.real_files())
+        self.assertEqual(list(p), list(sequential))
+        self.assertEqual(len(p), 3)
+
+    @patch.object(PathList, "glob")
+    def test_walk_does_not_expand_variables_in_names(self, mock_glob):
+        fs = FakeFileSystem(["/data/$HOME/a.txt"])
+        with fs.patch():
+            p = PathList("/data")
+            p.real_files()
+        self.assertEqual([x.fslash() for x in p], ["/data/$HOME/a.txt"])
+
+    @patch.object(PathList, "glob")
+    @patch.object(Path, "stat", autospec=True)
+    def test_stats_on_threads_keep_missing_order(self, mock_stat, mock_glob):
+        mock_stat.side_effect = lambda path, cache=None: (
+            None if "missing" in path.fslash() else {"is_file": True, "is_dir": False}
+        )
+        files = ["/tmp/missing{:02d}".format(i) for i in range(40)]
+        p = PathList()
+        p.add(*(files + ["/tmp/foo", "/tmp/bar"]))
+        len(p)
+        result = p.real_files(max_workers=8)
+        self.assertEqual(result, files)
+        self.assertEqual([x.fslash() for x in p], ["/tmp/bar", "/tmp/foo"])
+
+    @patch.object(PathList, "glob")
+    def test_files_carry_stats(self, mock_glob):
+        for storage in ["list", "trie"]:
+            p = PathList("/tmp/dir1", "/tmp/file1.txt", storage=storage)
+            p.real_files()
+            sizes = {x.fslash(): x.size for x in p}
+            self.assertEqual(sizes["/tmp/file1.txt"], 100)
+            self.assertIsNone(sizes["/tmp/dir1/file3.txt"])
+
+            p = PathList("/tmp/dir1", "/tmp/file1.txt", storage=storage)
+            p.real_files(max_workers=4, with_stats=True)
+            stats = self.fs.calls["stat"]
+            self.assertEqual([x.size for x in p], [100, 100, 100])
+            self.assertEqual([x.mtime for x in p], [500, 500, 500])
+            self.assertTrue(all(x.stat_info.is_file for x in p))
+            self.assertEqual(self.fs.calls["stat"], stats)
+
     @patch.object(Path, "stat")
     def test_removes_and_returns_missing_files_list(self, mock_stat):
         mock_stat.return_value = None
@@ -566,5 +997,77 @@ class RealFilesTest(unittest.TestCase):
         self.assertEqual(len(result), 2)
 
 
+class RelativeRealFilesTest(unittest.TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(root)
+        os.mkdir("sub")
+        for name in ["a.txt", "sub/b.txt"]:
+            with open(name, "w") as fh:
+                fh.write("x")
+
+    def test_files_in_the_current_directory_are_relative(self):
+        expected = [Path("a.txt"), Path("sub/b.txt")]
+        p = PathList(".")
+        p.real_files()
+        self.assertEqual(list(p), expected)
+        self.assertIn(Path("a.txt"), p)
+
+        p = PathList(".", "a.txt")
+        p.real_files()
+        self.assertEqual(list(p), expected)
+
+        result = PathList(".").iter_real_files()
+        self.assertEqual(sorted(path for path, _ in result), expected)
+
+        p = PathList(".")
+        asyncio.run(p.areal_files())
+        self.assertEqual(list(p), expected)
+
+
+class IterRealFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFileSystem(
+            [
+                "/tmp/file1.txt",
+                "/tmp/file2.txt",
+                "/tmp/dir1/file3.txt",
+                "/tmp/dir1/sub/file4.txt",
+            ],
+            dirs=["/tmp/dir2"],
+        )
+        patcher = self.fs.patch()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_files_as_real_files(self):
+        entries = ["/tmp/dir*", "/tmp/file1.txt", "/tmp/missing"]
+        missing = []
+        result = list(PathList(*entries).iter_real_files(on_missing=missing.append))
+        p = PathList(*entries)
+        self.assertEqual(missing, p.real_files())
+        self.assertEqual(sorted(path for path, _ in result), list(p))
+        self.assertEqual([stats["size"] for _, stats in result], [100, 100, 100])
+
+    def test_list_is_unchanged(self):
+        p = PathList("/tmp/dir1", "/tmp/dir*")
+        list(p.iter_real_files())
+        self.assertEqual([x.fslash() for x in p], ["/tmp/dir*", "/tmp/dir1"])
+
+    def test_yields_before_walking(self):
+        files = PathList("/tmp/dir1", "/tmp/file1.txt").iter_real_files()
+        self.assertEqual(next(files)[0], Path("/tmp/file1.txt"))
+        self.assertEqual(self.fs.calls["scandir"], 0)
+        self.assertEqual(len(list(files)), 2)
+
+    def test_nested_entries_are_not_repeated(self):
+        p = PathList("/tmp", "/tmp/dir1", "/tmp/file1.txt")
+        result = [path.fslash() for path, _ in p.iter_real_files(max_workers=4)]
+        self.assertEqual(len(result), 4)
+        self.assertEqual(len(set(result)), 4)
+
+
 if __name__ == "__main__":
     unittest.main()
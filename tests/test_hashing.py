@@ -0,0 +1,99 @@
+""" test hashing
+
+   isort:skip_file
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath import hashing
+from ciopath.gpath import Path
+from ciopath.gpath_list import PathList
+from ciopath.hashing import HashCache
+
+
+class HashingTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.files = {}
+        for i in range(6):
+            filename = os.path.join(self.root, "f{}.bin".format(i))
+            data = os.urandom(1000 * i + 3)
+            with open(filename, "wb") as fh:
+                fh.write(data)
+            self.files[Path(filename)] = hashlib.md5(data).hexdigest()
+        self.cache_file = os.path.join(self.root, "cache", "md5.db")
+
+    def test_md5_file_small_chunks(self):
+        path, expected = sorted(self.files.items())[-1]
+        digest, size = hashing.md5_file(path.fslash(), chunk_size=7)
+        self.assertEqual(digest, expected)
+        self.assertEqual(size, 5003)
+
+    def test_path_md5(self):
+        path, expected = sorted(self.files.items())[0]
+        self.assertEqual(path.md5(), expected)
+
+    def test_path_list_md5_on_threads(self):
+        p = PathList(*self.files)
+        p.add(os.path.join(self.root, "missing.bin"))
+        digests = p.md5(max_workers=3)
+        self.assertEqual({k: v for k, v in digests.items() if v}, self.files)
+        self.assertIsNone(digests[Path(os.path.join(self.root, "missing.bin"))])
+        self.assertEqual(digests.files_read, 6)
+        self.assertEqual(digests.bytes_read, sum(1000 * i + 3 for i in range(6)))
+
+    def test_cache_skips_unchanged_files(self):
+        with HashCache(self.cache_file) as cache:
+            PathList(*self.files).md5(cache=cache)
+
+        changed = sorted(self.files)[0]
+        with open(changed.fslash(), "ab") as fh:
+            fh.write(b"more")
+
+        cache = HashCache(self.cache_file)
+        self.assertEqual(len(cache), 6)
+        with mock.patch.object(hashing, "md5_file", wraps=hashing.md5_file) as md5:
+            digests = PathList(*self.files).md5(cache=cache)
+        self.assertEqual(md5.call_count, 1)
+        self.assertEqual(digests.cache_hits, 5)
+        self.assertEqual(digests.files_read, 1)
+        self.assertNotEqual(digests[changed], self.files[changed])
+
+    def test_carried_stats_are_not_stated_again(self):
+        p = PathList(*self.files)
+        for path in p:
+            path.stat()
+        with mock.patch.object(hashing.os, "stat", wraps=os.stat) as stat:
+            digests = p.md5(max_workers=1)
+        self.assertEqual(stat.call_count, 0)
+        self.assertEqual(dict(digests), self.files)
+
+    def test_unreadable_cache_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+        with open(self.cache_file, "w") as fh:
+            fh.write("not a database")
+        with HashCache(self.cache_file) as cache:
+            self.assertEqual(len(cache), 0)
+            PathList(*self.files).md5(cache=cache)
+        self.assertEqual(len(HashCache(self.cache_file)), 6)
+
+    def test_throughput(self):
+        digests = hashing.Digests()
+        digests.bytes_read, digests.seconds = 5000000, 2.0
+        self.assertEqual(digests.mb_per_second, 2.5)
+        self.assertEqual(hashing.Digests().mb_per_second, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+""" test manifest
+
+   isort:skip_file
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath import manifest
+from ciopath.gpath import Path
+from ciopath.gpath_list import PathList
+
+
+def fslashes(paths):
+    return [p.fslash() for p in paths]
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.filename = os.path.join(self.root, "job", "files.manifest")
+        self.files = ["/r/beauty.{:04d}.exr".format(i) for i in range(1001, 1101)]
+        self.files += ["/r/a.txt", "C:/tex/d.tx", "//srv/share/x", "rel/y", "/"]
+
+    def saved(self, *paths, **kwargs):
+        plist = PathList(*paths, **kwargs)
+        plist.save(self.filename)
+        return plist
+
+    def test_round_trip(self):
+        for storage, mmap in [("list", True), ("packed", True), ("trie", False)]:
+            plist = self.saved(*self.files, storage=storage)
+            loaded = PathList.load(self.filename, mmap=mmap)
+            self.assertEqual(list(loaded), list(plist))
+            self.assertEqual(len(loaded), 105)
+            self.assertEqual(loaded.common_path(), plist.common_path())
+
+    def test_keys_are_prefix_compressed(self):
+        self.saved(*self.files)
+        size = os.path.getsize(self.filename)
+        self.assertLess(size, sum(len(f) for f in self.files) * 2 // 3)
+
+    def test_membership_and_indexing(self):
+        plist = self.saved(*self.files)
+        loaded = PathList.load(self.filename)
+        for path in self.files:
+            self.assertIn(path, loaded)
+        for path in ["/r/beauty.1101.exr", "/r/a", "/0", "zzz", "/r/beauty.1000.exr"]:
+            self.assertNotIn(path, loaded)
+        entries = loaded._entries
+        expected = list(plist)[-3:] + list(plist)[:40]
+        self.assertEqual([entries[i] for i in range(-3, 40)], expected)
+        self.assertEqual([next(loaded) for _ in range(20)], list(plist)[:20])
+        with self.assertRaises(IndexError):
+            entries[105]
+
+    def test_containment_queries(self):
+        self.saved(*self.files)
+        loaded = PathList.load(self.filename)
+        self.assertEqual(len(loaded.under("/r")), 101)
+        expected = ["/", "/r/a.txt"] + self.files[:100]
+        self.assertEqual(fslashes(loaded.under("/")), expected)
+        self.assertEqual(loaded.ancestor_of("/r/b"), Path("/"))
+
+    def test_changes_copy_the_entries(self):
+        self.saved(*self.files)
+        loaded = PathList.load(self.filename)
+        loaded.add("/r/b.txt")
+        loaded.remove("/r/a.txt")
+        self.assertIsNone(loaded._entries._manifest)
+        self.assertIn("/r/b.txt", loaded)
+        self.assertNotIn("/r/a.txt", loaded)
+        self.assertEqual(len(loaded), 105)
+        loaded.remove_pattern("*.exr")
+        self.assertEqual(len(loaded), 5)
+
+        loaded.save(self.filename)
+        self.assertEqual(list(PathList.load(self.filename)), list(loaded))
+
+    def test_empty_list(self):
+        self.saved()
+        loaded = PathList.load(self.filename)
+        self.assertEqual(list(loaded), [])
+        self.assertNotIn("/a", loaded)
+
+    def test_other_files_are_refused(self):
+        filename = os.path.join(self.root, "files.json")
+        for data in [b"", b"not a manifest at all, just text"]:
+            with open(filename, "wb") as fh:
+                fh.write(data)
+            with self.assertRaises(ValueError):
+                PathList.load(filename)
+
+    def test_restart_interval(self):
+        keys = sorted(f.encode() for f in self.files)
+        manifest.write(self.filename, keys, restart_interval=3)
+        m = manifest.Manifest(self.filename)
+        self.assertEqual(list(m), keys)
+        for index, key in enumerate(keys):
+            self.assertEqual(m.bisect(key), index)
+            self.assertEqual(m.key(index), key)
+        self.assertEqual(m.bisect(b"~"), len(keys))
+        m.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+""" test path_glob
+
+   isort:skip_file
+"""
+
+import fnmatch
+import os
+import re
+import sys
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath.gpath import Path
+from ciopath.path_glob import PatternSet, glob_paths, translate
+from mocks.filesystem import FakeFileSystem
+
+
+class TranslateTest(unittest.TestCase):
+    def test_wildcards(self):
+        rx = re.compile(translate("file.*.[0-9]?x"))
+        self.assertTrue(rx.match("file.0001.1ex"))
+        self.assertFalse(rx.match("file.0001.aex"))
+
+    def test_negated_range(self):
+        rx = re.compile(translate("[!a]*"))
+        self.assertTrue(rx.match("b.txt"))
+        self.assertFalse(rx.match("a.txt"))
+
+    def test_unclosed_bracket_is_literal(self):
+        self.assertTrue(re.compile(translate("a[b")).match("a[b"))
+
+    def test_invalid_range_raises(self):
+        with self.assertRaises(re.error):
+            re.compile(translate("Model[b-a]"))
+
+
+class GlobPathsTest(unittest.TestCase):
+    def setUp(self):
+        files = [
+            "/tex/char_{:02d}_diffuse.{}.tx".format(i, 1001 + i) for i in range(20)
+        ]
+        files += [
+            "/tex/.hidden.tx",
+            "/shots/sh010/cache/a.abc",
+            "/shots/sh020/cache/b.abc",
+            "/shots/sh020/notes.txt",
+        ]
+        self.fs = FakeFileSystem(files)
+        patcher = self.fs.patch()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _glob(self, *patterns):
+        return sorted(p.fslash() for p in glob_paths([Path(p) for p in patterns]))
+
+    def test_lists_each_directory_once(self):
+        patterns = ["/tex/char_{:02d}_diffuse.*.tx".format(i) for i in range(20)]
+        self.assertEqual(len(self._glob(*patterns)), 20)
+        self.assertEqual(self.fs.calls["scandir"], 1)
+
+    def test_wildcard_in_directory(self):
+        self.assertEqual(
+            self._glob("/shots/*/cache/*.abc"),
+            ["/shots/sh010/cache/a.abc", "/shots/sh020/cache/b.abc"],
+        )
+
+    def test_files_are_not_descended_into(self):
+        self.assertEqual(self._glob("/shots/sh020/*/a.abc"), [])
+
+    def test_hidden_files_need_a_dot(self):
+        self.assertNotIn("/tex/.hidden.tx", self._glob("/tex/*"))
+        self.assertEqual(self._glob("/tex/.*"), ["/tex/.hidden.tx"])
+
+    def test_invalid_pattern_is_returned_unchanged(self):
+        self.assertEqual(self._glob("/tex/Model[b-a]"), ["/tex/Model[b-a]"])
+
+    def test_missing_directory_matches_nothing(self):
+        self.assertEqual(self._glob("/nope/*.tx"), [])
+
+
+class PatternSetTest(unittest.TestCase):
+    paths = [
+        "/tmp/foo.bak",
+        "/tmp/foo.bak.txt",
+        "/tmp/.bak",
+        "/tmp/x.bak/file",
+        "/proj/tex/char_v001.exr",
+        "/proj/tex/char_v002.exr",
+        "C:/proj/cache/a.abc",
+        "/tmp/notes",
+    ]
+
+    def _matches(self, *patterns):
+        matcher = PatternSet(patterns)
+        return [p for p in self.paths if matcher.match(Path(p))]
+
+    def test_extension(self):
+        self.assertEqual(self._matches("*.bak"), ["/tmp/foo.bak", "/tmp/.bak"])
+        self.assertEqual(PatternSet(["*.bak"]).extensions, {"bak"})
+
+    def test_suffix(self):
+        self.assertEqual(self._matches("*_v001.exr"), ["/proj/tex/char_v001.exr"])
+        self.assertEqual(PatternSet(["*_v001.exr"]).suffixes, ("_v001.exr",))
+
+    def test_slashes_are_interchangeable(self):
+        expected = ["C:/proj/cache/a.abc"]
+        self.assertEqual(self._matches("C:\\proj\\cache\\*"), expected)
+        self.assertEqual(self._matches("C:/proj\\cache/*"), expected)
+
+    def test_same_as_fnmatch_on_both_slash_styles(self):
+        patterns = ["*.bak", "*_v00?.exr", "/tmp/*", "*cache\\*", "*[!a-z]", "*"]
+        for pattern in patterns:
+            expected = [
+                p
+                for p in self.paths
+                if fnmatch.fnmatch(Path(p).fslash(), pattern)
+                or fnmatch.fnmatch(Path(p).bslash(), pattern)
+            ]
+            self.assertEqual(self._matches(pattern), expected, pattern)
+
+    def test_invalid_range_matches_nothing(self):
+        self.assertEqual(self._matches("*[b-a]"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+""" test path_mapper
+
+   isort:skip_file
+"""
+
+import os
+import sys
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath.gpath import Path
+from ciopath.gpath_list import PathList
+from ciopath.path_mapper import PathMapper
+
+
+class PathMapperTest(unittest.TestCase):
+    def setUp(self):
+        self.mapper = PathMapper(
+            {
+                "P:/proj": "/mnt/proj",
+                "P:/proj/shared": "/mnt/shared",
+                "//fileserver/share": "/mnt/share",
+                "/Volumes/proj": "/mnt/proj",
+            }
+        )
+
+    def assertMaps(self, source, expected, mapper=None):
+        mapper = mapper or self.mapper
+        self.assertEqual(mapper.map(source).fslash(), expected)
+
+    def test_longest_prefix_wins(self):
+        self.assertMaps("P:/proj/a/b.exr", "/mnt/proj/a/b.exr")
+        self.assertMaps("P:/proj/shared/b.exr", "/mnt/shared/b.exr")
+        self.assertMaps("P:/proj/shared", "/mnt/shared")
+
+    def test_drive_letter_ignores_case(self):
+        self.assertMaps("p:\\proj\\a.exr", "/mnt/proj/a.exr")
+
+    def test_unc_paths(self):
+        self.assertMaps("\\\\fileserver\\share\\a\\b.exr", "/mnt/share/a/b.exr")
+        self.assertMaps("//fileserver/other/b.exr", "//fileserver/other/b.exr")
+
+    def test_whole_components_only(self):
+        self.assertMaps("P:/project/a.exr", "P:/project/a.exr")
+        self.assertMaps("/Volumes/proj2/a", "/Volumes/proj2/a")
+
+    def test_roots_are_kept_apart(self):
+        self.assertMaps("/proj/a.exr", "/proj/a.exr")
+        self.assertMaps("Volumes/proj/a.exr", "Volumes/proj/a.exr")
+        self.assertMaps("Q:/proj/a.exr", "Q:/proj/a.exr")
+
+    def test_ignore_case(self):
+        mapper = PathMapper([("P:/Proj/Shots", "/mnt/shots")], ignore_case=True)
+        self.assertMaps("p:/PROJ/shots/A.exr", "/mnt/shots/A.exr", mapper)
+        self.assertMaps("p:/PROJ/shots/A.exr", "p:/PROJ/shots/A.exr")
+
+    def test_later_rule_replaces_earlier(self):
+        self.mapper.add("P:/proj", "/net/proj")
+        self.assertEqual(len(self.mapper), 4)
+        self.assertMaps("P:/proj/a.exr", "/net/proj/a.exr")
+
+    def test_map_to_windows(self):
+        mapper = PathMapper({"/mnt/proj": "P:/proj"})
+        self.assertEqual(mapper.map(Path("/mnt/proj/a")).bslash(), "P:\\proj\\a")
+
+    def test_remap_path_list(self):
+        p = PathList("P:/proj/a.exr", "/Volumes/proj/a.exr", "/other/b.exr")
+        p.remap(self.mapper)
+        self.assertEqual([x.fslash() for x in p], ["/mnt/proj/a.exr", "/other/b.exr"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+""" test path_trie
+
+   isort:skip_file
+"""
+
+import os
+import sys
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath.gpath import Path
+from ciopath.path_trie import PathTrie
+
+
+class PathTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.trie = PathTrie(
+            [Path("/a/b"), Path("/a/b/c/d"), Path("/a/bc"), Path("C:/a/b"), Path("a/b")]
+        )
+
+    def test_len(self):
+        self.assertEqual(len(self.trie), 5)
+
+    def test_add_existing_returns_false(self):
+        self.assertFalse(self.trie.add(Path("/a/b")))
+        self.assertEqual(len(self.trie), 5)
+
+    def test_contains(self):
+        self.assertIn(Path("/a/b/c/d"), self.trie)
+        self.assertNotIn(Path("/a/b/c"), self.trie)
+
+    def test_relative_and_absolute_are_different(self):
+        self.assertIn(Path("a/b"), self.trie)
+        self.assertNotIn(Path("a/b/c/d"), self.trie)
+
+    def test_drive_and_unc_are_different(self):
+        self.assertNotIn(Path("D:/a/b"), self.trie)
+        self.assertNotIn(Path("//a/b"), self.trie)
+
+    def test_discard(self):
+        self.assertTrue(self.trie.discard(Path("/a/b/c/d")))
+        self.assertNotIn(Path("/a/b/c/d"), self.trie)
+        self.assertIn(Path("/a/b"), self.trie)
+        self.assertEqual(len(self.trie), 4)
+
+    def test_discard_prunes_empty_nodes(self):
+        self.trie.discard(Path("/a/b/c/d"))
+        self.assertNotIn("c", self.trie._find(Path("/a/b")._component_key()))
+
+    def test_discard_missing_returns_false(self):
+        self.assertFalse(self.trie.discard(Path("/a/b/c")))
+        self.assertEqual(len(self.trie), 5)
+
+    def test_under(self):
+        result = sorted(self.trie.under(Path("/a/b")))
+        self.assertEqual(result, [Path("/a/b"), Path("/a/b/c/d")])
+
+    def test_under_is_component_wise(self):
+        result = list(self.trie.under(Path("/a/bc")))
+        self.assertEqual(result, [Path("/a/bc")])
+
+    def test_under_nothing(self):
+        self.assertEqual(list(self.trie.under(Path("/x"))), [])
+
+    def test_ancestor_of(self):
+        self.assertEqual(self.trie.ancestor_of(Path("/a/b/c/d/e")), Path("/a/b"))
+
+    def test_path_is_not_its_own_ancestor(self):
+        self.assertIsNone(self.trie.ancestor_of(Path("/a/b")))
+
+    def test_no_ancestor(self):
+        self.assertIsNone(self.trie.ancestor_of(Path("/a/bcd/e")))
+
+    def test_root_is_ancestor(self):
+        self.trie.add(Path("/"))
+        self.assertEqual(self.trie.ancestor_of(Path("/x/y")), Path("/"))
+        self.assertIsNone(self.trie.ancestor_of(Path("x/y")))
+
+    def test_iter(self):
+        self.assertEqual(len(list(self.trie)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+""" test scan_cache
+
+   isort:skip_file
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath.gpath_list import PathList
+from ciopath.scan_cache import ScanCache
+from mocks.filesystem import FakeFileSystem
+
+FILES = ["/proj/a/f{}.exr".format(i) for i in range(5)]
+FILES += ["/proj/b/c/g{}.exr".format(i) for i in range(5)]
+
+
+class ScanCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.filename = os.path.join(tmpdir, "cache", "scan.db")
+        self.fs = FakeFileSystem(FILES)
+        self.first = self._scan()
+
+    def _scan(self, cache=None):
+        """Run real_files on /proj with a cache loaded from the file and save it."""
+        cache = cache or ScanCache(self.filename)
+        p = PathList("/proj")
+        with self.fs.patch():
+            p.real_files(cache=cache)
+        cache.save()
+        return [x.fslash() for x in p]
+
+    def test_unchanged_tree_is_not_listed_again(self):
+        cache = ScanCache(self.filename)
+        scandirs = self.fs.calls["scandir"]
+        self.assertEqual(self._scan(cache), self.first)
+        self.assertEqual(self.fs.calls["scandir"], scandirs)
+        self.assertEqual(cache.hits["listdir"], 4)
+        self.assertEqual(len(self.first), 10)
+
+    def test_changed_directory_is_listed_again(self):
+        self.fs.files["/proj/b/c/new.exr"] = 100
+        self.fs.children["/proj/b/c"].add("new.exr")
+        self.fs.touch_dir("/proj/b/c")
+        scandirs = self.fs.calls["scandir"]
+        self.assertIn("/proj/b/c/new.exr", self._scan())
+        self.assertEqual(self.fs.calls["scandir"], scandirs + 1)
+
+    def test_saved_stats_need_a_validated_directory(self):
+        cache = ScanCache(self.filename)
+        with self.fs.patch():
+            list(PathList("/proj").iter_real_files(cache=cache))
+        cache.save()
+
+        cache = ScanCache(self.filename)
+        with self.fs.patch():
+            stats = self.fs.calls["stat"]
+            cache.stat("/proj/a/f0.exr")
+            self.assertEqual(self.fs.calls["stat"], stats + 1)
+            result = list(PathList("/proj").iter_real_files(cache=cache))
+        self.assertEqual(len(result), 10)
+        # One stat per directory to check its mtime, none for the files.
+        self.assertEqual(self.fs.calls["stat"], stats + 1 + 1 + 4)
+        self.assertEqual(result[0][1]["size"], 100)
+
+    def test_limits_dont_evict_saved_data(self):
+        fs = FakeFileSystem(["/big/d{:02d}/f.exr".format(i) for i in range(20)])
+        filename = os.path.join(os.path.dirname(self.filename), "big.db")
+
+        def scan():
+            cache = ScanCache(filename, max_listings=5, max_stats=5)
+            with fs.patch():
+                result = list(PathList("/big").iter_real_files(cache=cache))
+            cache.save()
+            return cache, result
+
+        _, first = scan()
+        scandirs = fs.calls["scandir"]
+        cache, second = scan()
+        self.assertEqual(second, first)
+        self.assertEqual(fs.calls["scandir"], scandirs)
+        self.assertEqual(cache.hits["listdir"], 21)
+        # /big, its 20 directories and their 20 files.
+        self.assertEqual(len(ScanCache(filename)._saved_stats), 41)
+
+    def test_wide_inode_is_saved_as_zero(self):
+        cache = ScanCache(self.filename)
+        wide = os.stat_result((0o100644, 1 << 100, 0, 1, 0, 0, 5, 1, 1, 1))
+        cache._store(cache._stats, cache.max_stats, "/proj/a/wide.exr", wide)
+        cache.save()
+        saved = ScanCache(self.filename)._saved_stats["/proj/a/wide.exr"]
+        self.assertEqual((saved.st_ino, saved.st_size), (0, 5))
+
+    def test_unreadable_file_is_ignored(self):
+        with open(self.filename, "w") as fh:
+            fh.write("not a database")
+        cache = ScanCache(self.filename)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(self._scan(cache), self.first)
+
+    def test_with_block_saves(self):
+        os.remove(self.filename)
+        with ScanCache(self.filename) as cache:
+            with self.fs.patch():
+                cache.listdir("/proj/a")
+        self.assertEqual(len(ScanCache(self.filename)._listings), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
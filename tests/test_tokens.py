@@ -0,0 +1,116 @@
+""" test tokens
+
+   isort:skip_file
+"""
+
+import os
+import sys
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath import tokens
+from ciopath.fs_cache import FileSystemCache
+from ciopath.gpath import Path
+from ciopath.gpath_list import PathList
+from mocks.filesystem import FakeFileSystem
+
+
+def fslashes(paths):
+    return [p.fslash() for p in paths]
+
+
+class ExpandTest(unittest.TestCase):
+    def test_hashes_pad_to_their_count(self):
+        p = Path("/r/beauty.####.exr")
+        self.assertEqual(
+            fslashes(p.expand_tokens(frames=[1, 1001, 10000])),
+            ["/r/beauty.0001.exr", "/r/beauty.1001.exr", "/r/beauty.10000.exr"],
+        )
+
+    def test_printf_tokens(self):
+        p = Path("/r/a.%04d.b.%d.exr")
+        self.assertEqual(fslashes(p.expand_tokens(frames=[7])), ["/r/a.0007.b.7.exr"])
+
+    def test_udim_in_any_case(self):
+        p = Path("/tex/diffuse.<UDIM>.<udim>.tx")
+        self.assertEqual(
+            fslashes(p.expand_tokens(tiles=[1001, 1012])),
+            ["/tex/diffuse.1001.1001.tx", "/tex/diffuse.1012.1012.tx"],
+        )
+
+    def test_frames_and_tiles_combine(self):
+        p = Path("/tex/v###/d.<UDIM>.{x}.tx")
+        self.assertEqual(
+            fslashes(p.expand_tokens(frames=[1, 2], tiles=[1001, 1002])),
+            [
+                "/tex/v001/d.1001.{x}.tx",
+                "/tex/v001/d.1002.{x}.tx",
+                "/tex/v002/d.1001.{x}.tx",
+                "/tex/v002/d.1002.{x}.tx",
+            ],
+        )
+
+    def test_tokens_without_values_are_kept(self):
+        p = Path("/r/b.####.<UDIM>.exr")
+        self.assertEqual(
+            fslashes(p.expand_tokens(tiles=[1001])), ["/r/b.####.1001.exr"]
+        )
+        self.assertEqual(p.expand_tokens(), [p])
+        self.assertFalse(tokens.has_tokens("/r/b.exr"))
+
+    def test_literal_braces_are_not_fields(self):
+        p = Path("/a/f{1}.####.exr")
+        self.assertEqual(fslashes(p.expand_tokens(frames=[1])), ["/a/f{1}.0001.exr"])
+        p = Path("/a/f{0}.<UDIM>.tx")
+        self.assertEqual(
+            fslashes(p.expand_tokens(tiles=[1001])), ["/a/f{0}.1001.tx"]
+        )
+
+    def test_drive_letter_is_kept(self):
+        p = Path("C:\\r\\b.##.exr")
+        self.assertEqual(fslashes(p.expand_tokens(frames=[3])), ["C:/r/b.03.exr"])
+
+
+class VerifyTest(unittest.TestCase):
+    def setUp(self):
+        files = ["/r/beauty.{:04d}.exr".format(f) for f in range(1001, 1011)]
+        files += ["/tex/d.1001.tx", "/tex/d.1002.tx", "/r/keep.txt"]
+        self.fs = FakeFileSystem(files)
+        patcher = self.fs.patch()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_listing_per_parent(self):
+        paths = Path("/r/beauty.####.exr").expand_tokens(frames=range(1001, 1021))
+        paths += Path("/tex/d.<UDIM>.tx").expand_tokens(tiles=[1001, 1002, 1003])
+        found = tokens.verify(paths)
+        self.assertEqual(len(found), 12)
+        self.assertEqual(self.fs.calls["scandir"], 2)
+        self.assertEqual(self.fs.calls["stat"], 0)
+
+    def test_path_list_expand_tokens(self):
+        p = PathList("/r/beauty.####.exr", "/r/keep.txt", "/tex/d.<UDIM>.tx")
+        missing = p.expand_tokens(frames=range(1009, 1013), tiles=[1001, 1003])
+        self.assertEqual(missing, [])
+        self.assertEqual(len(p), 7)
+        self.assertIn("/r/beauty.1012.exr", p)
+
+        p = PathList("/r/beauty.####.exr", "/r/keep.txt", "/tex/d.<UDIM>.tx")
+        missing = p.expand_tokens(
+            frames=range(1009, 1013),
+            tiles=[1001, 1003],
+            verify=True,
+            cache=FileSystemCache(),
+        )
+        self.assertEqual(
+            missing, ["/r/beauty.1011.exr", "/r/beauty.1012.exr", "/tex/d.1003.tx"]
+        )
+        expected = ["/r/beauty.1009.exr", "/r/beauty.1010.exr", "/r/keep.txt"]
+        self.assertEqual(fslashes(p), expected + ["/tex/d.1001.tx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
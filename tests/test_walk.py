@@ -0,0 +1,91 @@
+""" test walk
+
+   isort:skip_file
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ciopath.gpath import Path
+from ciopath.walk import walk_files, walk_files_parallel
+
+
+class WalkFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for rel in ["a.txt", "d1/b.txt", "d1/d2/c.txt", "d1/d2/d3/e.txt", "d4/f.txt"]:
+            path = os.path.join(self.root, rel)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "w") as fh:
+                fh.write("x")
+        os.makedirs(os.path.join(self.root, "empty"))
+
+    def _os_walk_files(self):
+        return sorted(
+            Path(os.path.join(root, name))
+            for root, _, files in os.walk(self.root)
+            for name in files
+        )
+
+    def test_same_files_as_os_walk(self):
+        self.assertEqual(sorted(walk_files(Path(self.root))), self._os_walk_files())
+        self.assertEqual(len(self._os_walk_files()), 5)
+
+    @unittest.skipUnless(hasattr(os, "symlink") and os.name == "posix", "posix only")
+    def test_symlinks_like_os_walk(self):
+        join = os.path.join
+        os.symlink(join(self.root, "d1"), join(self.root, "link_to_dir"))
+        os.symlink(join(self.root, "a.txt"), join(self.root, "link.txt"))
+        os.symlink(join(self.root, "gone"), join(self.root, "broken"))
+        self.assertEqual(sorted(walk_files(Path(self.root))), self._os_walk_files())
+        self.assertEqual(len(self._os_walk_files()), 7)
+
+    def test_files_are_built_from_parent_components(self):
+        root = Path(self.root)
+        result = [p for p in walk_files(root) if p.tail == "a.txt"][0]
+        self.assertEqual(result.components[:-1], root.components)
+
+    def test_missing_directory_yields_nothing(self):
+        self.assertEqual(list(walk_files(Path(os.path.join(self.root, "nope")))), [])
+
+
+class WalkFilesParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for i in range(4):
+            for j in range(5):
+                directory = os.path.join(self.root, "r{}".format(i), "d{}".format(j))
+                os.makedirs(os.path.join(directory, "sub"))
+                for name in ["a.txt", "b.txt", "sub/c.txt"]:
+                    open(os.path.join(directory, name), "w").close()
+        self.roots = [Path(os.path.join(self.root, "r{}".format(i))) for i in range(4)]
+
+    def _sequential(self):
+        return sorted(p for root in self.roots for p in walk_files(root))
+
+    def test_same_files_as_sequential_walk(self):
+        result = sorted(walk_files_parallel(self.roots, 4))
+        self.assertEqual(result, self._sequential())
+        self.assertEqual(len(result), 60)
+
+    def test_one_pending_listing_at_a_time(self):
+        result = sorted(walk_files_parallel(self.roots, 4, max_pending=1))
+        self.assertEqual(result, self._sequential())
+
+    def test_missing_root_yields_nothing(self):
+        missing = Path(os.path.join(self.root, "nope"))
+        self.assertEqual(list(walk_files_parallel([missing], 4)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()